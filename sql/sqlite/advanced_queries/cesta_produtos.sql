@@ -0,0 +1,24 @@
+-- Query: Análise de Cesta de Produtos (versão SQLite)
+-- ARRAY_TO_STRING(ARRAY[...]) ignora os nulos: aqui cada produto comprado
+-- acrescenta ', Produto' e o separador inicial é removido com SUBSTR
+SELECT 
+    product_combination,
+    COUNT(*) AS total_customers,
+    AVG(Income) AS avg_income,
+    CORR(MntWines, MntMeatProducts) AS wine_meat_corr
+FROM (
+    SELECT 
+        Customer_ID,
+        Income,
+        MntWines,
+        MntMeatProducts,
+        SUBSTR(
+            CASE WHEN MntWines > 500 THEN ', Wine' ELSE '' END ||
+            CASE WHEN MntMeatProducts > 300 THEN ', Meat' ELSE '' END ||
+            CASE WHEN MntSweetProducts > 100 THEN ', Sweets' ELSE '' END
+        , 3) AS product_combination
+    FROM main_table
+) combos
+GROUP BY 1
+HAVING COUNT(*) > 10;
+-- Identifica combinações de produtos mais comuns para cross-selling
@@ -0,0 +1,35 @@
+-- Query: Análise de Cohorte por Canal de Compra (versão SQLite)
+-- Não há Customer_Enrollment_Date: o ano da coorte é o de 2020-01-01 menos
+-- Customer_Days (a data de referência de ifood.cohorts). A média móvel e a
+-- correlação são calculadas em etapas separadas, já que o SQLite não mistura
+-- funções de janela e agregados no mesmo SELECT
+WITH Base AS (
+    /* Propósito: Entender padrões de compra ao longo do tempo */
+    SELECT 
+        CAST(STRFTIME('%Y', DATE('2020-01-01', '-' || Customer_Days || ' days')) AS INTEGER) AS cohort_year,
+        CASE 
+            WHEN NumWebPurchases > NumStorePurchases THEN 'Digital'
+            WHEN NumCatalogPurchases > 3 THEN 'Catálogo'
+            ELSE 'Loja Física'
+        END AS primary_channel,
+        MntTotal, Customer_Days, NumWebVisitsMonth, NumWebPurchases
+    FROM main_table
+),
+CohortAnalysis AS (
+    SELECT 
+        cohort_year,
+        primary_channel,
+        AVG(MntTotal) OVER (PARTITION BY cohort_year 
+            ORDER BY Customer_Days ROWS BETWEEN 30 PRECEDING AND CURRENT ROW) AS rolling_spend,
+        NumWebVisitsMonth,
+        NumWebPurchases
+    FROM Base
+)
+SELECT 
+    cohort_year,
+    primary_channel,
+    AVG(rolling_spend) AS avg_3month_spend,
+    CORR(NumWebVisitsMonth, NumWebPurchases) AS web_engagement_corr
+FROM CohortAnalysis
+GROUP BY 1,2
+HAVING COUNT(*) > 30;
@@ -0,0 +1,16 @@
+-- Query: Modelo Preditivo de Aceitação de Campanha (versão SQLite)
+/* Propósito: Prever probabilidade de aceitação usando dados históricos */
+/* Fecha o parêntese que faltava no original e divide em ponto flutuante
+   (divisão de inteiros truncaria os termos do modelo) */
+SELECT 
+    Customer_ID,
+    1/(1+EXP(-(
+        0.5*(MntTotal/1000.0) + 
+        0.3*(NumDealsPurchases/5.0) - 
+        0.2*(Recency/30.0) + 
+        0.4*(CASE WHEN education_PhD = 1 THEN 1 ELSE 0 END)
+    ))) AS acceptance_probability,
+    NTILE(4) OVER (ORDER BY (MntTotal/1000.0 + NumDealsPurchases/5.0) DESC) AS target_group
+FROM main_table
+WHERE Complain = 0;
+-- Fórmula inspirada em regressão logística usando variáveis-chave
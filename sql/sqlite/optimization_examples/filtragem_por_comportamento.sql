@@ -0,0 +1,6 @@
+-- Índice: Filtragem por Comportamento de Compra (versão SQLite)
+-- O SQLite não aceita INCLUDE: as colunas incluídas entram no fim da chave,
+-- e o índice continua cobrindo as consultas sem ler a tabela
+CREATE INDEX idx_purchase_behavior ON main_table 
+    (NumWebPurchases, NumCatalogPurchases, NumStorePurchases, Recency, MntWines);
+-- Motivo: Consultas combinadas de canais de compra com dados relacionados
@@ -0,0 +1,21 @@
+-- Particionamento: Segmentação por Categoria de Produto (versão SQLite)
+-- O SQLite não tem particionamento: a faixa de gastos é uma coluna da visão
+-- main_table_partitioned, e um índice sobre a mesma expressão faz com que
+-- filtrar uma faixa leia só as linhas dela
+CREATE VIEW main_table_partitioned AS
+SELECT 
+    CASE 
+        WHEN MntTotal < 500 THEN 'low_spenders'
+        WHEN MntTotal < 1500 THEN 'medium_spenders'
+        ELSE 'high_spenders'
+    END AS spend_partition,
+    *
+FROM main_table;
+CREATE INDEX idx_spend_partition ON main_table (
+    CASE 
+        WHEN MntTotal < 500 THEN 'low_spenders'
+        WHEN MntTotal < 1500 THEN 'medium_spenders'
+        ELSE 'high_spenders'
+    END
+);
+-- Motivo: Acelera relatórios específicos por faixa de gastos
@@ -0,0 +1,51 @@
+
+-- Tabela: Eficácia de Campanhas por Perfil Demográfico (versão SQLite)
+CREATE TABLE campaign_performance (
+    campaign_id INT,
+    marital_status VARCHAR(20),
+    education_level VARCHAR(20),
+    acceptance_rate NUMERIC(5,2),
+    cost_per_conversion NUMERIC(10,2)
+);
+/* Propósito: Otimizar alocação de orçamento de marketing */
+/* Sem ARRAY/unnest: a base é lida uma vez, somando as aceitações das cinco
+   campanhas por perfil, e só o resultado agrupado é desempilhado com UNION ALL.
+   O custo por conversão é o custo total de contato do perfil dividido pelas
+   conversões da campanha */
+INSERT INTO campaign_performance
+WITH perfis AS (
+    SELECT 
+        CASE 
+            WHEN marital_Married = 1 THEN 'Casado'
+            WHEN marital_Single = 1 THEN 'Solteiro'
+            ELSE 'Outro'
+        END AS marital_status,
+        CASE 
+            WHEN education_PhD = 1 THEN 'Doutorado'
+            WHEN education_Master = 1 THEN 'Mestrado'
+            ELSE 'Graduação ou menos'
+        END AS education_level,
+        COUNT(*) AS customers,
+        SUM(Z_CostContact) * 1.0 AS contact_cost,
+        SUM(AcceptedCmp1) AS accepted_1,
+        SUM(AcceptedCmp2) AS accepted_2,
+        SUM(AcceptedCmp3) AS accepted_3,
+        SUM(AcceptedCmp4) AS accepted_4,
+        SUM(AcceptedCmp5) AS accepted_5
+    FROM main_table
+    GROUP BY 1,2
+)
+SELECT 1, marital_status, education_level, accepted_1 * 100.0 / customers, contact_cost / NULLIF(accepted_1, 0)
+FROM perfis
+UNION ALL
+SELECT 2, marital_status, education_level, accepted_2 * 100.0 / customers, contact_cost / NULLIF(accepted_2, 0)
+FROM perfis
+UNION ALL
+SELECT 3, marital_status, education_level, accepted_3 * 100.0 / customers, contact_cost / NULLIF(accepted_3, 0)
+FROM perfis
+UNION ALL
+SELECT 4, marital_status, education_level, accepted_4 * 100.0 / customers, contact_cost / NULLIF(accepted_4, 0)
+FROM perfis
+UNION ALL
+SELECT 5, marital_status, education_level, accepted_5 * 100.0 / customers, contact_cost / NULLIF(accepted_5, 0)
+FROM perfis;
@@ -0,0 +1,71 @@
+"""
+Aplicação multipágina com todos os dashboards de análise de clientes do iFood.
+
+Um único servidor atende todas as páginas: as bibliotecas são importadas uma vez,
+o cache colunar e os cubos de agregados são aquecidos na primeira sessão e ficam
+compartilhados por todas as páginas e sessões. Trocar de página só executa a
+função ``main`` da página escolhida, sem reler nem reprocessar os dados.
+
+Uso (a partir do diretório ``streamlit/``):
+    streamlit run app.py
+"""
+
+import streamlit as st
+
+import dashboard_campanhas
+import dashboard_coortes
+import dashboard_correlacoes
+import dashboard_cross_sell
+import dashboard_family_
+import dashboard_marketing
+import dashboard_renda_gastos
+import dashboard_retencao
+import dashboard_segmentos
+from ifood import aggregates, campaigns, correlations, data_layer, partitions, sql_engine, ui
+
+CAMINHO_DADOS = data_layer.CAMINHO_CSV_PADRAO
+
+
+@st.cache_resource(show_spinner="Preparando dados compartilhados...")
+def warm_up(caminho: str) -> str:
+    """
+    Abre o cache colunar e as partições e carrega os cubos, a grade de co-momentos,
+    a matriz de campanhas e o banco dos scripts SQL de todas as páginas uma vez
+    por servidor; retorna a versão do dataset aquecida.
+    """
+    store = data_layer.open_store(caminho)
+    partitions.open_partitions(store)
+    for nome in aggregates.CUBOS:
+        aggregates.load_cube(caminho, nome)
+    correlations.load_grid(caminho)
+    campaigns.load_matrix(caminho)
+    sql_engine.ensure_database(caminho)
+    return store.version
+
+
+ui.configure_page("Análise de Clientes - iFood", "📊")
+
+try:
+    warm_up(CAMINHO_DADOS)
+except Exception as e:
+    st.error(f"Erro ao carregar dados: {str(e)}")
+    st.stop()
+
+paginas = st.navigation({
+    "Análises": [
+        st.Page(dashboard_marketing.main, title="Campanhas por Demografia", icon="📈",
+                url_path="campanhas", default=True),
+        st.Page(dashboard_campanhas.main, title="Comparação de Campanhas", icon="🎯",
+                url_path="comparacao-campanhas"),
+        st.Page(dashboard_renda_gastos.main, title="Renda vs Gastos", icon="🍷", url_path="renda-gastos"),
+        st.Page(dashboard_family_.main, title="Família vs Compras", icon="👨‍👩‍👧", url_path="familia"),
+        st.Page(dashboard_correlacoes.main, title="Mapa de Correlações", icon="🔗", url_path="correlacoes"),
+    ],
+    "Clientes": [
+        st.Page(dashboard_segmentos.main, title="Segmentação", icon="🧩", url_path="segmentos"),
+        st.Page(dashboard_cross_sell.main, title="Venda Cruzada", icon="🛒", url_path="venda-cruzada"),
+        st.Page(dashboard_coortes.main, title="Coortes", icon="📅", url_path="coortes"),
+        st.Page(dashboard_retencao.main, title="Retenção", icon="🛟", url_path="retencao"),
+    ],
+})
+paginas.run()
@@ -0,0 +1,233 @@
+"""
+Benchmark das etapas dos dashboards sobre datasets sintéticos, sem navegador.
+
+Para cada tamanho pedido é gerado (uma vez, e reaproveitado nas execuções
+seguintes) um CSV sintético com o schema de ``ifood_df_atualizado.csv``. Cada
+etapa dos três dashboards (carga, filtro, agrupamento em pandas e no cubo,
+montagem e serialização das figuras, relatório) é medida separadamente:
+
+  - tempo: mediana e mínimo de ``--repeticoes`` execuções;
+  - memória: pico alocado durante uma execução extra sob ``tracemalloc``
+    (páginas do cache colunar mapeadas em memória não entram na conta).
+
+Os resultados vão para um JSON; com ``--comparar`` cada etapa é comparada com
+um JSON de uma execução anterior.
+
+Uso (a partir do diretório ``streamlit/``):
+    python benchmark.py --linhas 10000 1000000 10000000 --saida benchmark.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import dashboard_family_
+import dashboard_marketing
+import dashboard_renda_gastos
+from ifood import aggregates, data_layer, synthetic
+
+# Fora do ``streamlit run`` chamadas como ``st.spinner`` só geram avisos, silenciados aqui
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+DIRETORIO_PADRAO = os.path.join('..', 'data', 'benchmark')
+
+
+def medir(funcao: Callable[[], object], repeticoes: int, memoria: bool = True) -> Dict[str, float]:
+    """
+    Mede o tempo (e, opcionalmente, o pico de memória) de uma etapa.
+
+    Retorna:
+      - dict: ``tempo_mediano_s``, ``tempo_minimo_s`` e ``pico_memoria_mb``.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            funcao()
+            pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'tempo_mediano_s': statistics.median(tempos),
+        'tempo_minimo_s': min(tempos),
+        'pico_memoria_mb': pico,
+    }
+
+
+def _etapas_marketing(caminho: str) -> Dict[str, Callable[[], object]]:
+    painel = dashboard_marketing
+    df = painel.load_data(caminho)
+    cubo = aggregates.load_cube(caminho, 'idade_educacao')
+    faixa = (25, 55)
+    taxa_idade, taxa_educacao = painel.process_data_cube(cubo, faixa, 'Todos')
+    figuras = [painel.create_bar_plot(taxa_idade, 'Faixa_Etaria', 'Aceitação por Faixa Etária'),
+               painel.create_bar_plot(taxa_educacao, 'education_Graduation', 'Aceitação por Educação')]
+    return {
+        'carga': lambda: painel.load_data(caminho),
+        'filtro_pandas': lambda: df[df['Age'].between(*faixa)],
+        'filtro_pushdown': lambda: painel.load_data(caminho, faixa),
+        'agrupamento_pandas': lambda: painel.process_data(df[df['Age'].between(*faixa)].copy()),
+        'agrupamento_cubo': lambda: painel.process_data_cube(cubo, faixa, 'Todos'),
+        'figuras': lambda: [painel.create_bar_plot(taxa_idade, 'Faixa_Etaria', ''),
+                            painel.create_bar_plot(taxa_educacao, 'education_Graduation', '')],
+        'serializacao': lambda: [f.to_json() for f in figuras],
+        'relatorio': lambda: painel.generate_insights(taxa_idade, taxa_educacao),
+    }
+
+
+def _etapas_renda(caminho: str) -> Dict[str, Callable[[], object]]:
+    painel = dashboard_renda_gastos
+    df = painel.load_data(caminho)
+    cubo = aggregates.load_cube(caminho, 'renda_produtos')
+    faixa = (int(cubo.quantile(0.25)), int(cubo.quantile(0.75)))
+    coluna = 'MntWines'
+    filtrado = painel.filter_income(df, faixa)
+    correlacao, gastos_medios = painel.calculate_analysis_cube(cubo, coluna, faixa)
+    figuras = [painel.create_scatter_plot(filtrado, coluna), painel.create_bar_plot(gastos_medios, coluna)]
+    return {
+        'carga': lambda: painel.load_data(caminho),
+        'filtro_pandas': lambda: painel.filter_income(df, faixa),
+        'filtro_pushdown': lambda: painel.query_income(caminho, faixa),
+        'agrupamento_pandas': lambda: painel.calculate_analysis(filtrado.copy(), coluna),
+        'agrupamento_cubo': lambda: painel.calculate_analysis_cube(cubo, coluna, faixa),
+        'figuras': lambda: [painel.create_scatter_plot(filtrado, coluna),
+                            painel.create_bar_plot(gastos_medios, coluna)],
+        'serializacao': lambda: [f.to_json() for f in figuras],
+        'relatorio': lambda: painel.generate_report(correlacao, gastos_medios, coluna),
+    }
+
+
+def _etapas_familia(caminho: str) -> Dict[str, Callable[[], object]]:
+    painel = dashboard_family_
+    df = painel.load_data(caminho)
+    cubo = aggregates.load_cube(caminho, 'filhos_gastos')
+    gastos_medios, _ = painel.analisar_familia_vs_comportamento_compra(df, cubo=cubo)
+    figura = painel.plot_gastos_interactive(gastos_medios, 'MntTotal')
+    return {
+        'carga': lambda: painel.load_data(caminho),
+        'agrupamento_pandas': lambda: painel.analisar_familia_vs_comportamento_compra(df.copy()),
+        'agrupamento_cubo': lambda: painel.analisar_familia_vs_comportamento_compra(df, cubo=cubo),
+        'figuras': lambda: painel.plot_gastos_interactive(gastos_medios, 'MntTotal'),
+        'serializacao': lambda: figura.to_json(),
+    }
+
+
+DASHBOARDS = {
+    'marketing': _etapas_marketing,
+    'renda_gastos': _etapas_renda,
+    'familia': _etapas_familia,
+}
+
+
+def run_benchmark(linhas: int, diretorio: str = DIRETORIO_PADRAO, repeticoes: int = 3,
+                  memoria: bool = True, dashboards: Optional[List[str]] = None) -> List[dict]:
+    """
+    Executa o benchmark para um tamanho de dataset.
+
+    Parâmetros:
+      - linhas (int): Número de clientes do dataset sintético.
+      - diretorio (str): Onde ficam os CSVs sintéticos (e seus caches).
+      - repeticoes (int): Execuções cronometradas por etapa.
+      - memoria (bool): Mede o pico de memória de cada etapa.
+      - dashboards (list, opcional): Subconjunto de ``DASHBOARDS``.
+
+    Retorna:
+      - list: Um registro por (dashboard, etapa).
+    """
+    caminho = synthetic.synthetic_path(diretorio, linhas)
+    if not os.path.exists(caminho):
+        print(f"Gerando {linhas:,} clientes sintéticos em '{caminho}'...")
+        synthetic.write_synthetic_csv(caminho, linhas)
+
+    resultados = []
+
+    def registrar(dashboard: str, etapa: str, medidas: Dict[str, float]) -> None:
+        resultados.append({'linhas': linhas, 'dashboard': dashboard, 'etapa': etapa, **medidas})
+        pico = medidas['pico_memoria_mb']
+        print(f"{linhas:>12,} {dashboard:<14} {etapa:<20} {medidas['tempo_mediano_s'] * 1000:>10.1f} ms"
+              + (f" {pico:>10.1f} MB" if pico is not None else ''))
+
+    # Custos pagos uma vez por versão do dataset
+    registrar('dados', 'cache_colunar', medir(lambda: data_layer.build_store(caminho), 1, memoria))
+    store = data_layer.open_store(caminho)
+    for nome in aggregates.CUBOS:
+        registrar('dados', f'cubo_{nome}', medir(lambda: aggregates.build_cube(nome, store.column), 1, memoria))
+
+    for dashboard in dashboards or list(DASHBOARDS):
+        for etapa, funcao in DASHBOARDS[dashboard](caminho).items():
+            registrar(dashboard, etapa, medir(funcao, repeticoes, memoria))
+    return resultados
+
+
+def compare(atuais: List[dict], anteriores: List[dict]) -> None:
+    """Imprime a razão de tempo (atual / anterior) das etapas presentes nas duas execuções."""
+    chave = lambda r: (r['linhas'], r['dashboard'], r['etapa'])  # noqa: E731
+    referencia = {chave(r): r for r in anteriores}
+    print("\nComparação com a execução anterior (tempo atual / anterior):")
+    for r in atuais:
+        anterior = referencia.get(chave(r))
+        if anterior and anterior['tempo_mediano_s'] > 0:
+            razao = r['tempo_mediano_s'] / anterior['tempo_mediano_s']
+            alerta = ' ⚠️' if razao > 1.2 else ''
+            print(f"{r['linhas']:>12,} {r['dashboard']:<14} {r['etapa']:<20} {razao:>6.2f}x{alerta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas dos dashboards em dados sintéticos.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000],
+                        help="Tamanhos dos datasets sintéticos")
+    parser.add_argument('--diretorio', default=DIRETORIO_PADRAO, help="Diretório dos CSVs sintéticos")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções cronometradas por etapa")
+    parser.add_argument('--dashboards', nargs='+', choices=list(DASHBOARDS), help="Dashboards medidos")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede o pico de memória")
+    parser.add_argument('--saida', default='benchmark.json', help="Arquivo JSON de resultados")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    resultados = []
+    for linhas in args.linhas:
+        resultados += run_benchmark(linhas, args.diretorio, args.repeticoes,
+                                    not args.sem_memoria, args.dashboards)
+
+    relatorio = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plataforma': platform.platform(),
+            'processador': platform.processor() or platform.machine(),
+        },
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Resultados salvos em '{args.saida}'")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            compare(resultados, json.load(f)['resultados'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from ifood import campaigns, ui
+from ifood.campaigns import DIMENSOES, MatrizCampanhas
+
+# Dimensões de comparação e medidas exibidas
+NOMES_DIMENSOES = {'estado_civil': 'Estado Civil', 'educacao': 'Educação', 'faixa_idade': 'Faixa Etária'}
+MEDIDAS = {
+    'acceptance_rate': 'Taxa de Aceitação (%)',
+    'cost_per_conversion': 'Custo por Conversão',
+    'roi': 'Retorno sobre o Custo',
+}
+COLUNAS_TABELA = {
+    'campanha': 'Campanha',
+    'clientes': 'Clientes',
+    'conversoes': 'Conversões',
+    'acceptance_rate': 'Taxa de Aceitação (%)',
+    'custo': 'Custo Total',
+    'cost_per_conversion': 'Custo por Conversão',
+    'receita': 'Receita',
+    'roi': 'Retorno sobre o Custo',
+}
+
+def load_matrix(file_path: str) -> MatrizCampanhas:
+    """
+    Retorna a matriz campanha x estado civil x educação x faixa etária da versão
+    atual do dataset (calculada numa passada e gravada no cache colunar), com
+    tratamento de erros
+    """
+    try:
+        with st.spinner("Calculando matriz de campanhas..."):
+            return campaigns.load_matrix(file_path)
+    except Exception as e:
+        st.error(f"Erro ao calcular matriz de campanhas: {str(e)}")
+        return None
+
+def create_comparison_plot(tabela: pd.DataFrame, dimensao: str, medida: str) -> go.Figure:
+    """Cria gráfico de barras agrupadas com a medida de cada campanha por categoria"""
+    fig = px.bar(
+        tabela,
+        x=dimensao,
+        y=medida,
+        color='campanha',
+        barmode='group',
+        category_orders={'campanha': DIMENSOES['campanha'], dimensao: DIMENSOES[dimensao]},
+        color_discrete_sequence=px.colors.sequential.Reds[3:],
+        title=f'{MEDIDAS[medida]} por Campanha e {NOMES_DIMENSOES[dimensao]}',
+        labels={dimensao: NOMES_DIMENSOES[dimensao], medida: MEDIDAS[medida], 'campanha': 'Campanha'}
+    )
+    fig.update_layout(plot_bgcolor='white', height=450)
+    return fig
+
+def create_overlap_heatmap(sobreposicao: pd.DataFrame) -> go.Figure:
+    """Cria mapa de calor com os clientes que aceitaram cada par de campanhas"""
+    fig = px.imshow(
+        sobreposicao,
+        text_auto=True,
+        color_continuous_scale='Reds',
+        labels={'color': 'Clientes'},
+        title='Clientes que Aceitaram Cada Par de Campanhas',
+        aspect='auto'
+    )
+    fig.update_layout(plot_bgcolor='white', height=450)
+    return fig
+
+def display_metrics(resumo: pd.DataFrame) -> None:
+    """Exibe métricas principais em cards estilizados"""
+    com_conversoes = resumo[resumo['conversoes'] > 0]
+    melhor = resumo.loc[resumo['acceptance_rate'].idxmax()] if resumo['clientes'].sum() else None
+    barata = com_conversoes.loc[com_conversoes['cost_per_conversion'].idxmin()] if len(com_conversoes) else None
+    cols = st.columns(3)
+    metrics = [
+        ('🏆 Maior Aceitação', f"{melhor['campanha']} ({melhor['acceptance_rate']:.1f}%)"
+                              if melhor is not None else "-", '#B22222'),
+        ('💸 Menor Custo por Conversão', f"{barata['campanha']} ({barata['cost_per_conversion']:.2f})"
+                                        if barata is not None else "-", '#CD5C5C'),
+        ('✅ Conversões', f"{int(resumo['conversoes'].sum()):,}", '#DC143C')
+    ]
+
+    for col, (title, value, color) in zip(cols, metrics):
+        with col:
+            st.markdown(
+                f'<div class="metric-card" style="border-color: {color}">'
+                f'<h3 style="color: {color}">{title}</h3><h2>{value}</h2></div>',
+                unsafe_allow_html=True
+            )
+
+def main():
+    """Função principal do dashboard"""
+    ui.apply_theme()
+    st.markdown('<h1 class="header-text">🎯 Comparação de Campanhas</h1>', unsafe_allow_html=True)
+
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+
+    matriz = load_matrix(data_path)
+    if matriz is None:
+        st.stop()
+
+    # Controles interativos: cada filtro seleciona fatias da matriz, sem ler as linhas
+    with st.container():
+        col1, col2, col3 = st.columns(3)
+        filtros = {}
+        for col, dimensao in zip((col1, col2, col3), NOMES_DIMENSOES):
+            with col:
+                filtros[dimensao] = st.multiselect(f'{NOMES_DIMENSOES[dimensao]}:', options=DIMENSOES[dimensao],
+                                                   default=DIMENSOES[dimensao])
+        col1, col2 = st.columns(2)
+        with col1:
+            dimensao = st.radio('📊 Comparar por:', options=list(NOMES_DIMENSOES),
+                                format_func=NOMES_DIMENSOES.get, horizontal=True)
+        with col2:
+            medida = st.radio('📏 Medida:', options=list(MEDIDAS), format_func=MEDIDAS.get, horizontal=True)
+
+    resumo = campaigns.summarize(matriz, ['campanha'], filtros)
+    if resumo['clientes'].sum() == 0:
+        st.info("Nenhum cliente no perfil selecionado.")
+        st.stop()
+
+    st.markdown("### 📊 Métricas das Campanhas")
+    display_metrics(resumo)
+
+    comparacao = campaigns.summarize(matriz, ['campanha', dimensao], filtros)
+    with st.container():
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            st.plotly_chart(create_comparison_plot(comparacao[comparacao['clientes'] > 0], dimensao, medida),
+                            use_container_width=True)
+        with col2:
+            st.plotly_chart(create_overlap_heatmap(campaigns.overlap(matriz, filtros)), use_container_width=True)
+
+    st.markdown("### 📄 Eficácia por Campanha")
+    st.dataframe(resumo[list(COLUNAS_TABELA)].rename(columns=COLUNAS_TABELA).round(2),
+                 use_container_width=True, hide_index=True)
+
+if __name__ == "__main__":
+    ui.configure_page("Comparação de Campanhas - iFood", "🎯")
+    main()
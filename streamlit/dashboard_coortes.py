@@ -0,0 +1,145 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from datetime import date
+
+from ifood import cohorts, ui
+from ifood.cohorts import CANAIS, Coortes
+
+def load_cohorts(file_path: str, data_referencia: date, janela: int) -> Coortes:
+    """
+    Retorna os acumulados de coorte x canal da versão atual do dataset (calculados
+    em streaming e gravados no cache colunar), com tratamento de erros
+    """
+    try:
+        with st.spinner("Calculando coortes..."):
+            return cohorts.load_cohorts(file_path, data_referencia.isoformat(), janela)
+    except Exception as e:
+        st.error(f"Erro ao calcular coortes: {str(e)}")
+        return None
+
+def create_heatmap(tabela: pd.DataFrame) -> go.Figure:
+    """Cria mapa de calor com o gasto móvel médio por coorte x canal"""
+    grade = tabela.pivot(index='cohort_year', columns='primary_channel', values='avg_rolling_spend')
+    grade = grade.reindex(columns=[c for c in CANAIS if c in grade.columns])
+    fig = px.imshow(
+        grade,
+        text_auto='.0f',
+        color_continuous_scale='Reds',
+        labels={'x': 'Canal Principal', 'y': 'Ano de Cadastro', 'color': 'Gasto Móvel (USD)'},
+        title='Gasto Móvel Médio por Coorte x Canal',
+        aspect='auto'
+    )
+    fig.update_yaxes(type='category')
+    fig.update_layout(plot_bgcolor='white', height=400)
+    return fig
+
+def create_correlation_plot(tabela: pd.DataFrame) -> go.Figure:
+    """Cria gráfico de barras com a correlação visitas ao site x compras online"""
+    fig = px.bar(
+        tabela,
+        x='cohort_year',
+        y='web_engagement_corr',
+        color='primary_channel',
+        barmode='group',
+        category_orders={'primary_channel': CANAIS},
+        color_discrete_sequence=['#B22222', '#CD5C5C', '#F08080'],
+        title='Engajamento Web: Correlação Visitas x Compras Online',
+        labels={'cohort_year': 'Ano de Cadastro', 'web_engagement_corr': 'Correlação',
+                'primary_channel': 'Canal'}
+    )
+    fig.update_xaxes(type='category')
+    fig.update_layout(plot_bgcolor='white', height=400)
+    return fig
+
+def create_rolling_plot(curva: pd.DataFrame, janela: int) -> go.Figure:
+    """Cria gráfico de linha com a média móvel de gasto ao longo dos dias de cadastro"""
+    fig = px.line(
+        curva,
+        x='Customer_Days',
+        y='rolling_spend',
+        color=curva['cohort_year'].astype(str),
+        color_discrete_sequence=px.colors.sequential.Reds[3:],
+        title=f'Média Móvel de Gasto ({janela + 1} clientes) por Dias como Cliente',
+        labels={'Customer_Days': 'Dias como Cliente', 'rolling_spend': 'Gasto Móvel (USD)', 'color': 'Coorte'}
+    )
+    fig.update_layout(plot_bgcolor='white', height=400)
+    return fig
+
+def display_metrics(tabela: pd.DataFrame) -> None:
+    """Exibe métricas principais em cards estilizados"""
+    melhor = tabela.loc[tabela['avg_rolling_spend'].idxmax()]
+    engajada = tabela.loc[tabela['web_engagement_corr'].idxmax()]
+    cols = st.columns(3)
+    metrics = [
+        ('👥 Coortes x Canais', f"{len(tabela)} ({int(tabela['clientes'].sum()):,} clientes)", '#B22222'),
+        ('💰 Maior Gasto Móvel', f"{melhor['cohort_year']} · {melhor['primary_channel']} "
+                                f"(USD {melhor['avg_rolling_spend']:.0f})", '#CD5C5C'),
+        ('🌐 Maior Engajamento Web', f"{engajada['cohort_year']} · {engajada['primary_channel']} "
+                                    f"({engajada['web_engagement_corr']:.2f})", '#DC143C')
+    ]
+
+    for col, (title, value, color) in zip(cols, metrics):
+        with col:
+            st.markdown(
+                f'<div class="metric-card" style="border-color: {color}">'
+                f'<h3 style="color: {color}">{title}</h3><h2>{value}</h2></div>',
+                unsafe_allow_html=True
+            )
+
+def main():
+    """Função principal do dashboard"""
+    ui.apply_theme()
+    st.markdown('<h1 class="header-text">📅 Coortes por Canal de Compra</h1>', unsafe_allow_html=True)
+
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+
+    # Controles interativos
+    with st.container():
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            data_referencia = st.date_input(
+                '📆 Data de referência de Customer_Days:',
+                value=date.fromisoformat(cohorts.DATA_REFERENCIA_PADRAO),
+                help="Data em que os dias como cliente foram calculados; o ano da coorte é esta data menos os dias."
+            )
+        with col2:
+            janela = st.slider('📈 Clientes anteriores na média móvel:', min_value=5, max_value=200,
+                               value=cohorts.JANELA_PADRAO, step=5)
+        with col3:
+            minimo = st.number_input('👥 Mínimo de clientes por coorte x canal:', min_value=0,
+                                     value=cohorts.MINIMO_CLIENTES, step=10)
+
+    co = load_cohorts(data_path, data_referencia, janela)
+    if co is None:
+        st.stop()
+
+    tabela = cohorts.cohort_table(co, int(minimo))
+    if tabela.empty:
+        st.info("Nenhuma coorte x canal com clientes suficientes.")
+        st.stop()
+
+    with st.container():
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(create_heatmap(tabela), use_container_width=True)
+        with col2:
+            st.plotly_chart(create_correlation_plot(tabela), use_container_width=True)
+    st.plotly_chart(create_rolling_plot(cohorts.rolling_curve(co, data_referencia.isoformat()), janela),
+                    use_container_width=True)
+
+    st.markdown("### 📊 Métricas das Coortes")
+    display_metrics(tabela)
+
+    st.markdown("### 📄 Tabela Coorte x Canal")
+    st.dataframe(
+        tabela.rename(columns={'cohort_year': 'Coorte', 'primary_channel': 'Canal', 'clientes': 'Clientes',
+                               'avg_rolling_spend': 'Gasto Móvel Médio',
+                               'web_engagement_corr': 'Correlação Visitas x Compras Web'}).round(3),
+        use_container_width=True, hide_index=True
+    )
+
+if __name__ == "__main__":
+    ui.configure_page("Coortes por Canal - iFood", "📅")
+    main()
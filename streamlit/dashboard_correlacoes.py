@@ -0,0 +1,116 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from ifood import correlations, ui
+from ifood.correlations import CoMomentGrid
+
+# Rótulos curtos das variáveis no mapa de calor
+ROTULOS = {
+    'MntWines': 'Vinhos', 'MntFruits': 'Frutas', 'MntMeatProducts': 'Carnes', 'MntFishProducts': 'Peixes',
+    'MntSweetProducts': 'Doces', 'MntGoldProds': 'Ouro', 'MntTotal': 'Gasto Total',
+    'MntRegularProds': 'Produtos Regulares', 'NumDealsPurchases': 'Compras c/ Desconto',
+    'NumWebPurchases': 'Compras Web', 'NumCatalogPurchases': 'Compras Catálogo',
+    'NumStorePurchases': 'Compras Loja', 'Income': 'Renda', 'Age': 'Idade', 'Recency': 'Recência',
+}
+
+def load_grid(file_path: str) -> CoMomentGrid:
+    """
+    Retorna a grade de co-momentos idade x renda da versão atual do dataset
+    (calculada uma vez e gravada no cache colunar), com tratamento de erros
+    """
+    try:
+        with st.spinner("Pré-calculando co-momentos..."):
+            return correlations.load_grid(file_path)
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {str(e)}")
+        return None
+
+def create_heatmap(matriz: pd.DataFrame, variaveis: list) -> go.Figure:
+    """Cria mapa de calor da matriz de correlação (escala divergente de -1 a 1)"""
+    matriz = matriz.loc[variaveis, variaveis].rename(index=ROTULOS, columns=ROTULOS)
+    fig = px.imshow(
+        matriz,
+        text_auto='.2f',
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale='RdBu_r',
+        labels={'color': 'Correlação'},
+        title='Matriz de Correlação na Faixa Selecionada',
+        aspect='auto'
+    )
+    fig.update_layout(plot_bgcolor='white', height=650)
+    return fig
+
+def display_metrics(n: int, pares: pd.DataFrame) -> None:
+    """Exibe métricas principais em cards estilizados"""
+    positivos = pares[pares['correlacao'] > 0]
+    negativos = pares[pares['correlacao'] < 0]
+    formatar = lambda linha: (f"{ROTULOS[linha['variavel_1']]} x {ROTULOS[linha['variavel_2']]} "
+                              f"({linha['correlacao']:.2f})")
+    cols = st.columns(3)
+    metrics = [
+        ('👥 Clientes na Faixa', f"{n:,}", '#B22222'),
+        ('📈 Maior Correlação Positiva', formatar(positivos.iloc[0]) if len(positivos) else "-", '#CD5C5C'),
+        ('📉 Maior Correlação Negativa', formatar(negativos.iloc[0]) if len(negativos) else "-", '#DC143C')
+    ]
+
+    for col, (title, value, color) in zip(cols, metrics):
+        with col:
+            st.markdown(
+                f'<div class="metric-card" style="border-color: {color}">'
+                f'<h3 style="color: {color}">{title}</h3><h2>{value}</h2></div>',
+                unsafe_allow_html=True
+            )
+
+def main():
+    """Função principal do dashboard"""
+    ui.apply_theme()
+    st.markdown('<h1 class="header-text">🔗 Mapa de Correlações</h1>', unsafe_allow_html=True)
+
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+
+    grade = load_grid(data_path)
+    if grade is None or not len(grade.faixas):
+        st.stop()
+
+    # Controles interativos: os limites de renda caem nas bordas da grade, onde a
+    # consulta é exata
+    with st.container():
+        col1, col2 = st.columns(2)
+        with col1:
+            idade_min, idade_max = int(grade.idades[0]), int(grade.idades[-1])
+            age_range = st.slider('🎂 Faixa Etária:', min_value=idade_min, max_value=idade_max,
+                                  value=(idade_min, idade_max))
+        with col2:
+            renda_min = int(grade.origem)
+            renda_max = renda_min + int(grade.faixas[-1] + 1) * int(grade.passo)
+            income_range = st.slider('💰 Faixa de Renda (USD):', min_value=renda_min, max_value=renda_max,
+                                     value=(renda_min, renda_max), step=int(grade.passo))
+        variaveis = st.multiselect('📋 Variáveis:', options=correlations.VARIAVEIS,
+                                   default=correlations.VARIAVEIS, format_func=ROTULOS.get)
+
+    # A matriz inteira vem de quatro leituras da grade, sem percorrer as linhas
+    matriz, n = correlations.correlation_matrix(grade, age_range, income_range)
+    if n < 2:
+        st.info("Menos de dois clientes na faixa selecionada.")
+        st.stop()
+    pares = correlations.strongest_pairs(matriz.loc[variaveis, variaveis], k=len(variaveis) ** 2)
+
+    st.markdown("### 📊 Métricas da Faixa")
+    display_metrics(n, pares)
+
+    if len(variaveis) >= 2:
+        st.plotly_chart(create_heatmap(matriz, variaveis), use_container_width=True)
+
+    st.markdown("### 📄 Pares Mais Correlacionados")
+    tabela = pares.head(15).assign(variavel_1=lambda d: d['variavel_1'].map(ROTULOS),
+                                   variavel_2=lambda d: d['variavel_2'].map(ROTULOS))
+    st.dataframe(tabela.rename(columns={'variavel_1': 'Variável 1', 'variavel_2': 'Variável 2',
+                                        'correlacao': 'Correlação'}).round(3),
+                 use_container_width=True, hide_index=True)
+
+if __name__ == "__main__":
+    ui.configure_page("Mapa de Correlações - iFood", "🔗")
+    main()
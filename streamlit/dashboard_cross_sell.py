@@ -0,0 +1,118 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from ifood import basket, sql_engine, ui
+from ifood.basket import Coocorrencia
+
+def load_cooccurrence(file_path: str, limiares: dict) -> Coocorrencia:
+    """
+    Retorna as contagens de coocorrência para os limiares escolhidos (calculadas uma
+    vez por versão do dataset e conjunto de limiares), com tratamento de erros
+    """
+    try:
+        with st.spinner("Calculando coocorrências..."):
+            return basket.load_cooccurrence(file_path, limiares)
+    except Exception as e:
+        st.error(f"Erro ao calcular coocorrências: {str(e)}")
+        return None
+
+def load_sql_table(file_path: str, nome: str) -> pd.DataFrame:
+    """
+    Retorna uma tabela materializada pelos scripts de ``sql/`` no banco SQLite
+    (recriado só quando o dataset muda sem ingestão incremental), com tratamento de erros
+    """
+    try:
+        with st.spinner("Carregando tabela SQL..."):
+            return sql_engine.read_table(nome, file_path)
+    except Exception as e:
+        st.error(f"Erro ao carregar tabela SQL: {str(e)}")
+        return None
+
+def create_lift_heatmap(co: Coocorrencia) -> go.Figure:
+    """Cria mapa de calor do lift entre cada par de produtos"""
+    nomes = [basket.product_label(p) for p in co.produtos]
+    individuais = np.diag(co.pares).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lift = co.clientes * co.pares / np.outer(individuais, individuais)
+    np.fill_diagonal(lift, np.nan)
+    fig = px.imshow(
+        pd.DataFrame(lift, index=nomes, columns=nomes),
+        text_auto='.2f',
+        color_continuous_scale='Reds',
+        title='Lift entre Pares de Produtos',
+        labels={'color': 'Lift'},
+        aspect='auto'
+    )
+    fig.update_layout(plot_bgcolor='white', height=450)
+    return fig
+
+def generate_report(pares: pd.DataFrame, triplas: pd.DataFrame) -> str:
+    """Gera relatório textual formatado com as melhores combinações"""
+    if pares.empty:
+        return "Nenhum par de produtos atinge o número mínimo de clientes."
+    melhor_par = pares.iloc[0]
+    report = f"""
+    ### 🛒 Oportunidades de Venda Cruzada
+
+    - Par com maior lift: **{melhor_par['produto_a']} + {melhor_par['produto_b']}**
+      (lift {melhor_par['lift']:.2f}, {melhor_par['clientes']} clientes)
+    """
+    if not triplas.empty:
+        melhor_tripla = triplas.iloc[0]
+        report += f"""
+    - Tripla com maior lift: **{melhor_tripla['combinacao']}**
+      (lift {melhor_tripla['lift']:.2f}, {melhor_tripla['clientes']} clientes)
+    """
+    return report
+
+def main():
+    """Função principal do dashboard"""
+    ui.apply_theme()
+    st.markdown('<h1 class="header-text">🛒 Cesta de Produtos e Venda Cruzada</h1>', unsafe_allow_html=True)
+
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+
+    # Limiares de gasto (USD) para considerar que o cliente compra cada categoria, na
+    # grade de ``basket.PASSO_LIMIAR`` (valores digitados fora dela são arredondados)
+    st.sidebar.markdown("### 🎚️ Limiares de Compra (USD)")
+    limiares = {
+        produto: st.sidebar.number_input(basket.product_label(produto), min_value=0,
+                                         value=int(basket.LIMIARES_PADRAO[produto]), step=basket.PASSO_LIMIAR)
+        for produto in basket.PRODUTOS
+    }
+    min_clientes = st.sidebar.number_input('👥 Mínimo de clientes por combinação', min_value=0, value=10)
+
+    co = load_cooccurrence(data_path, limiares)
+    if co is None:
+        st.stop()
+
+    pares = basket.pairs_table(co, min_clientes)
+    triplas = basket.triples_table(co, min_clientes)
+
+    st.plotly_chart(create_lift_heatmap(co), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### 🔗 Pares de Produtos")
+        st.dataframe(pares, use_container_width=True, hide_index=True)
+    with col2:
+        st.markdown("### 🔺 Triplas de Produtos")
+        st.dataframe(triplas, use_container_width=True, hide_index=True)
+
+    st.markdown(f'<div class="report-box">{generate_report(pares, triplas)}</div>', unsafe_allow_html=True)
+
+    # Combinações de vinho, carne e doces com os limiares fixos de sql/advanced_queries/cesta_produtos.sql
+    st.markdown("### 🧺 Combinações Mais Comuns (cesta_produtos.sql)")
+    cesta = load_sql_table(data_path, 'cesta_produtos')
+    if cesta is not None:
+        cesta = cesta.sort_values('total_customers', ascending=False).replace({'product_combination': {'': '-'}})
+        st.dataframe(cesta.rename(columns={'product_combination': 'Combinação', 'total_customers': 'Clientes',
+                                           'avg_income': 'Renda Média', 'wine_meat_corr': 'Correlação Vinho x Carne'})
+                     .round(2), use_container_width=True, hide_index=True)
+
+if __name__ == "__main__":
+    ui.configure_page("Venda Cruzada - iFood", "🛒")
+    main()
@@ -6,44 +6,47 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from ifood import aggregates, data_layer, sampling, ui
+from ifood.instrumentation import render_debug_panel, stage, start_rerun, timed
+from ifood.cube import PrefixCube, means
+from ifood.result_cache import RESULTADOS, cache_key
+from ifood.sampling import Amostra
+
 # ---------------------------
 # 1. CONFIGURAÇÃO DA PÁGINA
 # ---------------------------
-st.set_page_config(
-    page_title="📊 Análise de Clientes Ifood - Família vs. Compras",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# CSS customizado para manter a estética clean (preto e branco) e espaçamentos adequados
-st.markdown("""
-    <style>
-        body {
-            font-family: 'Segoe UI', sans-serif;
-            color: #000;
-            background-color: #fff;
-        }
-        .report-box {
-            background-color: #f9f9f9; 
-            padding: 20px;
-            border-radius: 10px;
-            border-left: 5px solid #333;
-            line-height: 1.6;
-            font-size: 16px;
-        }
-        h1, h2, h3 {
-            color: #000;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+# A configuração da página e o CSS (estética clean, preto e branco) ficam em
+# ``ifood.ui``: ``configure_page`` no ponto de entrada e ``apply_theme`` em ``main``.
 
 # ---------------------------
 # 2. CARREGAMENTO DOS DADOS COM CACHE
 # ---------------------------
-@st.cache_data(show_spinner=True)
+# Colunas usadas na análise; as demais não são lidas do cache colunar
+COLUNAS_FAMILIA = ['Kidhome', 'Teenhome', 'MntTotal', 'MntSweetProducts', 'MntGoldProds']
+
+@timed()
+def load_store(path: str) -> data_layer.ColumnStore:
+    """
+    Abre o cache colunar do dataset (sem ler linhas), usado para checar se há
+    clientes e para obter a versão dos dados.
+    
+    Parâmetros:
+      - path (str): Caminho do arquivo CSV.
+    
+    Retorna:
+      - store (ColumnStore): Cache colunar, ou None em caso de erro.
+    """
+    try:
+        return data_layer.open_store(path)
+    except Exception as e:
+        st.error(f"Erro ao carregar os dados: {e}")
+        return None
+
+@timed()
 def load_data(path: str) -> pd.DataFrame:
     """
-    Carrega o CSV com dados dos clientes do Ifood com otimização de memória.
+    Carrega as colunas de ``COLUNAS_FAMILIA`` a partir do cache colunar mapeado em memória,
+    compartilhado entre sessões e processos, com os tipos compactos de ``data_layer.SCHEMA``.
     
     Parâmetros:
       - path (str): Caminho do arquivo CSV.
@@ -52,18 +55,59 @@ def load_data(path: str) -> pd.DataFrame:
       - df (pd.DataFrame): DataFrame carregado.
     """
     try:
-        df = pd.read_csv(path)
+        df = data_layer.query(path, COLUNAS_FAMILIA)
         return df
     except Exception as e:
         st.error(f"Erro ao carregar os dados: {e}")
         return pd.DataFrame()
 
+@timed()
+def load_cube(path: str) -> PrefixCube:
+    """
+    Retorna o cubo de somas e contagens de gastos por número total de filhos
+    (Kidhome + Teenhome) da versão atual do dataset.
+    
+    Parâmetros:
+      - path (str): Caminho do arquivo CSV.
+    
+    Retorna:
+      - cubo (PrefixCube): Cubo com eixo Total_Filhos, definido em ``ifood.aggregates``,
+        ou None em caso de erro.
+    """
+    try:
+        with st.spinner("Pré-calculando agregados..."):
+            return aggregates.load_cube(path, 'filhos_gastos')
+    except Exception as e:
+        st.error(f"Erro ao carregar os agregados: {e}")
+        return None
+
+@timed()
+def load_sample(path: str) -> Amostra:
+    """
+    Retorna a amostra estratificada por número total de filhos usada na prévia rápida.
+    
+    Parâmetros:
+      - path (str): Caminho do arquivo CSV.
+    
+    Retorna:
+      - amostra (Amostra): Linhas sorteadas e tamanho de cada estrato, ou None em caso de erro.
+    """
+    try:
+        with st.spinner("Sorteando amostra..."):
+            return sampling.load_sample(path, 'filhos')
+    except Exception as e:
+        st.error(f"Erro ao carregar a amostra: {e}")
+        return None
+
 # ---------------------------
 # 3. FUNÇÃO DE ANÁLISE
 # ---------------------------
+@timed()
 def analisar_familia_vs_comportamento_compra(dados: pd.DataFrame,
                                               colunas_filhos=['Kidhome', 'Teenhome'],
-                                              colunas_gastos=['MntTotal', 'MntSweetProducts', 'MntGoldProds']):
+                                              colunas_gastos=['MntTotal', 'MntSweetProducts', 'MntGoldProds'],
+                                              cubo: PrefixCube = None,
+                                              amostra: Amostra = None):
     """
     Analisa como o número de filhos (crianças e adolescentes) afeta o gasto total e os gastos em produtos não essenciais.
     
@@ -71,6 +115,10 @@ def analisar_familia_vs_comportamento_compra(dados: pd.DataFrame,
       - dados (pd.DataFrame): DataFrame contendo os dados dos clientes.
       - colunas_filhos (list): Lista com os nomes das colunas que representam o número de filhos.
       - colunas_gastos (list): Lista com os nomes das colunas de gastos a serem analisadas.
+      - cubo (PrefixCube, opcional): Cubo pré-calculado por ``load_cube``; quando informado,
+        as médias são lidas dele em vez de reagrupar as linhas de ``dados``.
+      - amostra (Amostra, opcional): Amostra de ``load_sample`` (prévia rápida); quando informada,
+        as médias são estimadas dela, com as colunas ``<gasto>_inf`` e ``<gasto>_sup`` do intervalo de confiança.
     
     Retorna:
       - gastos_medios (pd.DataFrame): DataFrame com a média dos gastos agrupados pelo total de filhos.
@@ -83,12 +131,29 @@ def analisar_familia_vs_comportamento_compra(dados: pd.DataFrame,
         'MntGoldProds': "Gastos com Produtos Premium"
     }
 
-    # 1. Cálculo do número total de filhos (soma das colunas indicadas)
-    dados['Total_Filhos'] = dados[colunas_filhos].sum(axis=1)
-
-    # 2. Cálculo da média de gastos por número total de filhos
     try:
-        gastos_medios = dados.groupby('Total_Filhos', observed=False)[colunas_gastos].mean().reset_index()
+        if amostra is not None:
+            # 1-2. Médias estimadas pela amostra, com intervalo de confiança
+            total_filhos = amostra.dados[colunas_filhos].sum(axis=1)
+            categorias = np.sort(total_filhos.unique())
+            gastos_medios = pd.DataFrame({'Total_Filhos': categorias})
+            for coluna in colunas_gastos:
+                estimativas = sampling.group_means(amostra, coluna, total_filhos, categorias)
+                gastos_medios[coluna] = estimativas['valor']
+                gastos_medios[f'{coluna}_inf'] = estimativas['inferior']
+                gastos_medios[f'{coluna}_sup'] = estimativas['superior']
+        elif cubo is not None:
+            # 1-2. Médias lidas diretamente do cubo (uma linha por número total de filhos)
+            contagens, somas = cubo.cell_counts(), cubo.cell_sums()
+            gastos_medios = pd.DataFrame({'Total_Filhos': cubo.keys})
+            for coluna in colunas_gastos:
+                gastos_medios[coluna] = means(contagens[:, 0], cubo.measure(somas, coluna)[:, 0])
+        else:
+            # 1. Cálculo do número total de filhos (soma das colunas indicadas)
+            dados['Total_Filhos'] = dados[colunas_filhos].sum(axis=1)
+
+            # 2. Cálculo da média de gastos por número total de filhos
+            gastos_medios = dados.groupby('Total_Filhos', observed=False)[colunas_gastos].mean().reset_index()
     except Exception as e:
         st.error(f"Erro durante o agrupamento: {e}")
         return None, None
@@ -100,7 +165,10 @@ def analisar_familia_vs_comportamento_compra(dados: pd.DataFrame,
         relatorio += f"**Número total de filhos: {int(row['Total_Filhos'])}**\n"
         for coluna in colunas_gastos:
             descricao = colunas_descricao.get(coluna, coluna)
-            relatorio += f"- {descricao}: {row[coluna]:.2f}\n"
+            relatorio += f"- {descricao}: {row[coluna]:.2f}"
+            if f'{coluna}_inf' in row:
+                relatorio += f" ({sampling.interval_text(sampling.Estimativa(row[coluna], row[f'{coluna}_inf'], row[f'{coluna}_sup']))})"
+            relatorio += "\n"
         relatorio += "\n"
 
     return gastos_medios, relatorio
@@ -108,13 +176,15 @@ def analisar_familia_vs_comportamento_compra(dados: pd.DataFrame,
 # ---------------------------
 # 4. FUNÇÃO PARA EXIBIR GRÁFICOS INTERATIVOS
 # ---------------------------
+@timed()
 def plot_gastos_interactive(gastos_medios: pd.DataFrame, gasto: str):
     """
     Plota um gráfico de barras interativo para o gasto selecionado.
     
     Parâmetros:
       - gastos_medios (pd.DataFrame): DataFrame com a média dos gastos por total de filhos.
-      - gasto (str): Coluna de gastos a ser plotada.
+      - gasto (str): Coluna de gastos a ser plotada (com barras de erro quando há as
+        colunas de intervalo da prévia rápida).
     
     Retorna:
       - fig (plotly.graph_objects.Figure): Figura interativa.
@@ -125,13 +195,20 @@ def plot_gastos_interactive(gastos_medios: pd.DataFrame, gasto: str):
         'MntGoldProds': "Gastos com Produtos Premium"
     }
     
+    intervalo = {}
+    if f'{gasto}_inf' in gastos_medios.columns:
+        gastos_medios = gastos_medios.assign(erro_superior=gastos_medios[f'{gasto}_sup'] - gastos_medios[gasto],
+                                             erro_inferior=gastos_medios[gasto] - gastos_medios[f'{gasto}_inf'])
+        intervalo = {'error_y': 'erro_superior', 'error_y_minus': 'erro_inferior'}
+
     fig = px.bar(gastos_medios, 
                  x='Total_Filhos', 
                  y=gasto, 
                  title=f"Média de {descricao.get(gasto, gasto)} por Número Total de Filhos",
                  labels={'Total_Filhos': 'Número Total de Filhos', gasto: descricao.get(gasto, gasto)},
                  color='Total_Filhos',
-                 color_continuous_scale='Reds')
+                 color_continuous_scale='Reds',
+                 **intervalo)
     fig.update_layout(template="simple_white", height=500)
     return fig
 
@@ -139,11 +216,14 @@ def plot_gastos_interactive(gastos_medios: pd.DataFrame, gasto: str):
 # 5. EXECUÇÃO DO DASHBOARD
 # ---------------------------
 def main():
+    ui.apply_theme(ui.CSS_FAMILIA)
+    start_rerun('familia')
+
     # Caminho dos dados
     data_path = '../data/processed/ifood_df_atualizado.csv'
-    df = load_data(data_path)
+    store = load_store(data_path)
     
-    if df.empty:
+    if store is None or not len(store):
         st.stop()
 
     # Cabeçalho principal
@@ -151,8 +231,16 @@ def main():
     st.markdown("### Análise de Família vs. Comportamento de Compra")
     st.markdown("---")
 
-    # Aplicar a função de análise para gerar dados e relatório
-    gastos_medios, relatorio = analisar_familia_vs_comportamento_compra(df)
+    # Aplicar a função de análise (sobre o cubo pré-calculado ou, na prévia rápida,
+    # sobre a amostra estratificada) para gerar dados e relatório
+    cubo = load_cube(data_path)
+    previa = ui.preview_toggle()
+    amostra = load_sample(data_path) if previa else None
+    # As linhas só são lidas quando não há cubo nem amostra para responder
+    df = load_data(data_path) if cubo is None and amostra is None else None
+    if df is not None and df.empty:
+        st.stop()
+    gastos_medios, relatorio = analisar_familia_vs_comportamento_compra(df, cubo=cubo, amostra=amostra)
     if gastos_medios is None:
         st.error("Não foi possível realizar a análise.")
         st.stop()
@@ -174,9 +262,17 @@ def main():
         'MntGoldProds': "Gastos com Produtos Premium"
     }[x])
 
-    # Exibir gráfico interativo do gasto selecionado
-    fig = plot_gastos_interactive(gastos_filtrados, gasto_selecionado)
-    st.plotly_chart(fig, use_container_width=True)
+    # Exibir gráfico interativo do gasto selecionado (reaproveitado do cache de resultados)
+    versao = store.version
+    fig = RESULTADOS.get_or_compute(
+        cache_key('familia', versao, filhos_range=filhos_range, gasto=gasto_selecionado, previa=amostra is not None),
+        lambda: plot_gastos_interactive(gastos_filtrados, gasto_selecionado)
+    )
+    with stage('render_gastos'):
+        st.plotly_chart(fig, use_container_width=True)
+    if amostra is not None:
+        st.caption(f"⚡ Prévia com {len(amostra.dados):,} de {int(amostra.populacao.sum()):,} clientes "
+                   f"(amostra estratificada); barras de erro com IC de {sampling.NIVEL_CONFIANCA:.0%}.")
 
     st.markdown("---")
 
@@ -184,8 +280,11 @@ def main():
     st.markdown("## 📝 Relatório Executivo")
     st.markdown(f"<div class='report-box'>{relatorio.replace(chr(10), '<br>')}</div>", unsafe_allow_html=True)
 
+    render_debug_panel()
+
 # Executa a função principal com tratamento de erros
 if __name__ == "__main__":
+    ui.configure_page("📊 Análise de Clientes Ifood - Família vs. Compras", sidebar="collapsed")
     try:
         main()
     except Exception as e:
@@ -5,89 +5,140 @@ import plotly.express as px
 import plotly.graph_objects as go
 from typing import Tuple, Dict
 
-# Configuração inicial da página
-st.set_page_config(
-    page_title="Análise de Campanhas - iFood",
-    page_icon="📈",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Estilos CSS personalizados
-st.markdown("""
-    <style>
-    .main { background-color: #FFFFFF; }
-    .header-text { 
-        color: #000000;
-        font-family: 'Arial';
-        border-bottom: 2px solid #B22222;
-        padding-bottom: 10px;
-        margin-bottom: 1.5rem;
-    }
-    .metric-card {
-        background-color: #FFF5F5;
-        border: 2px solid #B22222;
-        border-radius: 8px;
-        padding: 20px;
-        margin: 10px 0;
-        box-shadow: 0 2px 4px rgba(178,34,34,0.1);
-    }
-    .report-box {
-        border: 2px solid #B22222;
-        border-radius: 8px;
-        padding: 25px;
-        margin: 15px 0;
-        background-color: #FFF5F5;
-    }
-    .stSlider>div>div>div>div {
-        background-color: #B22222 !important;
-    }
-    .analysis-section {
-        margin-top: 2rem;
-        padding: 1.5rem;
-        background-color: #F8F9FA;
-        border-radius: 8px;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-@st.cache_data(show_spinner="Carregando dados...")
-def load_data(file_path: str) -> pd.DataFrame:
-    """
-    Carrega e otimiza os dados do arquivo CSV com tratamento de erros
+from ifood import aggregates, data_layer, sampling, ui
+from ifood.instrumentation import render_debug_panel, stage, start_rerun, timed
+from ifood.cube import PrefixCube, means
+from ifood.prefetch import PREFETCHER, neighbour_ranges
+from ifood.result_cache import cache_key
+from ifood.sampling import Amostra
+
+# Colunas lidas do cache colunar; as demais nem são abertas
+COLUNAS = ['AcceptedCmpOverall', 'Age', 'education_Graduation']
+
+# Faixas etárias usadas nos gráficos e no cubo de agregados
+BINS_IDADE = aggregates.BINS_IDADE
+LABELS_IDADE = aggregates.LABELS_IDADE
+
+# Valores de education_Graduation incluídos por cada opção do filtro
+FILTROS_EDUCACAO = {'Todos': [0, 1], 'Graduados': [1], 'Não Graduados': [0]}
+
+@timed()
+def load_data(file_path: str, age_range: Tuple[int, int] = None, educ_filter: str = 'Todos') -> pd.DataFrame:
+    """
+    Carrega do cache colunar mapeado em memória só as colunas usadas e, com filtros,
+    só as linhas da faixa etária e da educação escolhidas (os predicados são
+    empurrados ao cache e grupos de linhas fora deles não são lidos), com
+    tratamento de erros
     """
     try:
-        df = pd.read_csv(
-            file_path,
-            usecols=['AcceptedCmpOverall', 'Age', 'education_Graduation'],
-            dtype={
-                'AcceptedCmpOverall': 'int8',
-                'Age': 'int16',
-                'education_Graduation': 'int8'
-            }
-        )
-        return df.dropna()
+        filtros = {}
+        if age_range is not None:
+            filtros['Age'] = tuple(age_range)
+        if educ_filter != 'Todos':
+            filtros['education_Graduation'] = FILTROS_EDUCACAO[educ_filter]
+        return data_layer.query(file_path, COLUNAS, filtros, dropna=True)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
         return pd.DataFrame()
 
+@timed()
+def load_cube(file_path: str) -> PrefixCube:
+    """
+    Retorna o cubo de somas/contagens de AcceptedCmpOverall por idade x graduação
+    da versão atual do dataset (gravado em disco e atualizado pela ingestão
+    incremental), com tratamento de erros
+    """
+    try:
+        with st.spinner("Pré-calculando agregados..."):
+            return aggregates.load_cube(file_path, 'idade_educacao')
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {str(e)}")
+        return None
+
+@timed()
+def load_sample(file_path: str) -> Amostra:
+    """
+    Retorna a amostra estratificada por faixa etária x graduação usada na prévia
+    rápida, com tratamento de erros
+    """
+    try:
+        with st.spinner("Sorteando amostra..."):
+            return sampling.load_sample(file_path, 'idade_educacao')
+    except Exception as e:
+        st.error(f"Erro ao carregar amostra: {str(e)}")
+        return None
+
+@timed()
 def process_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Processa os dados e calcula as taxas de aceitação
     """
-    bins = [0, 30, 40, 50, 60, float('inf')]
-    labels = ['≤30', '31-40', '41-50', '51-60', '>60']
-    df['Faixa_Etaria'] = pd.cut(df['Age'], bins=bins, labels=labels, right=False)
+    df['Faixa_Etaria'] = pd.cut(df['Age'], bins=BINS_IDADE, labels=LABELS_IDADE, right=False)
     
     taxa_idade = df.groupby('Faixa_Etaria', observed=False)['AcceptedCmpOverall'].mean().reset_index()
     taxa_educacao = df.groupby('education_Graduation', observed=False)['AcceptedCmpOverall'].mean().reset_index()
     
     return taxa_idade, taxa_educacao
 
+@timed()
+def process_data_cube(cubo: PrefixCube, age_range: Tuple[int, int],
+                      educ_filter: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Calcula as mesmas taxas de ``process_data`` a partir do cubo pré-calculado,
+    em tempo proporcional ao número de faixas (e não de linhas)
+    """
+    grupos = np.isin(cubo.labels, FILTROS_EDUCACAO[educ_filter])
+
+    contagens, somas = cubo.band_totals(BINS_IDADE, *age_range, right=False)
+    aceitacao = cubo.measure(somas, 'AcceptedCmpOverall')
+    taxa_idade = pd.DataFrame({
+        'Faixa_Etaria': pd.Categorical(LABELS_IDADE, categories=LABELS_IDADE, ordered=True),
+        'AcceptedCmpOverall': means(contagens[:, grupos].sum(axis=1), aceitacao[:, grupos].sum(axis=1))
+    })
+
+    contagens, somas = cubo.totals(*age_range)
+    presentes = grupos & (contagens > 0)
+    taxa_educacao = pd.DataFrame({
+        'education_Graduation': cubo.labels[presentes],
+        'AcceptedCmpOverall': means(contagens[presentes], cubo.measure(somas, 'AcceptedCmpOverall')[presentes])
+    })
+    
+    return taxa_idade, taxa_educacao
+
+@timed()
+def process_data_sample(amostra: Amostra, age_range: Tuple[int, int],
+                        educ_filter: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Estima as taxas de ``process_data`` a partir da amostra estratificada, com as
+    colunas ``inferior`` e ``superior`` do intervalo de confiança
+    """
+    dados = amostra.dados
+    dominio = (dados['Age'].between(*age_range) &
+               dados['education_Graduation'].isin(FILTROS_EDUCACAO[educ_filter])).to_numpy()
+
+    faixas = pd.cut(dados['Age'], bins=BINS_IDADE, labels=LABELS_IDADE, right=False)
+    taxa_idade = sampling.group_means(amostra, 'AcceptedCmpOverall', faixas, LABELS_IDADE, dominio)
+    taxa_idade = taxa_idade.rename(columns={'grupo': 'Faixa_Etaria', 'valor': 'AcceptedCmpOverall'})
+    taxa_idade['Faixa_Etaria'] = pd.Categorical(LABELS_IDADE, categories=LABELS_IDADE, ordered=True)
+
+    taxa_educacao = sampling.group_means(amostra, 'AcceptedCmpOverall', dados['education_Graduation'],
+                                         FILTROS_EDUCACAO[educ_filter], dominio)
+    taxa_educacao = taxa_educacao.rename(columns={'grupo': 'education_Graduation', 'valor': 'AcceptedCmpOverall'})
+    taxa_educacao = taxa_educacao.dropna(subset=['AcceptedCmpOverall']).reset_index(drop=True)
+    
+    return taxa_idade, taxa_educacao
+
+@timed()
 def create_bar_plot(df: pd.DataFrame, x_col: str, title: str) -> go.Figure:
     """
-    Cria gráfico de barras interativo com paleta vermelha
+    Cria gráfico de barras interativo com paleta vermelha (com barras de erro
+    quando ``df`` traz o intervalo de confiança da prévia rápida)
     """
+    intervalo = {}
+    if 'inferior' in df.columns:
+        df = df.assign(erro_superior=df['superior'] - df['AcceptedCmpOverall'],
+                       erro_inferior=df['AcceptedCmpOverall'] - df['inferior'])
+        intervalo = {'error_y': 'erro_superior', 'error_y_minus': 'erro_inferior'}
     fig = px.bar(
         df,
         x=x_col,
@@ -95,7 +146,8 @@ def create_bar_plot(df: pd.DataFrame, x_col: str, title: str) -> go.Figure:
         title=title,
         color=x_col,
         color_discrete_sequence=px.colors.sequential.Reds,
-        labels={'AcceptedCmpOverall': 'Taxa de Aceitação', x_col: ''}
+        labels={'AcceptedCmpOverall': 'Taxa de Aceitação', x_col: ''},
+        **intervalo
     )
     fig.update_layout(
         showlegend=False,
@@ -106,17 +158,57 @@ def create_bar_plot(df: pd.DataFrame, x_col: str, title: str) -> go.Figure:
     )
     return fig
 
+@timed()
+def build_view(cubo: PrefixCube, age_range: Tuple[int, int],
+               educ_filter: str) -> Tuple[pd.DataFrame, pd.DataFrame, go.Figure, go.Figure]:
+    """
+    Taxas e figuras de um estado dos filtros; é a unidade guardada (e pré-calculada
+    em segundo plano) por ``ifood.prefetch``
+    """
+    taxa_idade, taxa_educacao = process_data_cube(cubo, age_range, educ_filter)
+    fig_idade = create_bar_plot(taxa_idade, 'Faixa_Etaria', 'Aceitação por Faixa Etária')
+    fig_educacao = create_bar_plot(taxa_educacao, 'education_Graduation', 'Aceitação por Educação')
+    return taxa_idade, taxa_educacao, fig_idade, fig_educacao
+
+@timed()
+def build_preview(amostra: Amostra, age_range: Tuple[int, int],
+                  educ_filter: str) -> Tuple[pd.DataFrame, pd.DataFrame, go.Figure, go.Figure]:
+    """Mesmo resultado de ``build_view``, estimado a partir da amostra (prévia rápida)"""
+    taxa_idade, taxa_educacao = process_data_sample(amostra, age_range, educ_filter)
+    fig_idade = create_bar_plot(taxa_idade, 'Faixa_Etaria', 'Aceitação por Faixa Etária (prévia)')
+    fig_educacao = create_bar_plot(taxa_educacao, 'education_Graduation', 'Aceitação por Educação (prévia)')
+    return taxa_idade, taxa_educacao, fig_idade, fig_educacao
+
+def schedule_neighbours(cubo: PrefixCube, versao: str, age_range: Tuple[int, int], educ_filter: str) -> None:
+    """
+    Agenda o pré-cálculo das faixas etárias a um ano de distância e das outras
+    opções do filtro de educação
+    """
+    estados = [(faixa, educ_filter) for faixa in neighbour_ranges(age_range, int(cubo.keys[0]), int(cubo.keys[-1]))]
+    estados += [(age_range, opcao) for opcao in FILTROS_EDUCACAO if opcao != educ_filter]
+    PREFETCHER.prefetch(
+        [(cache_key('marketing', versao, age_range=faixa, educ_filter=educ), lambda faixa=faixa, educ=educ: build_view(cubo, faixa, educ))
+         for faixa, educ in estados],
+        sessao=ui.session_id()
+    )
+
 def display_key_metrics(taxa_idade: pd.DataFrame, taxa_educacao: pd.DataFrame) -> None:
     """
     Exibe métricas principais em cards estilizados
     """
     max_idade = taxa_idade.loc[taxa_idade['AcceptedCmpOverall'].idxmax()]
     max_educ = taxa_educacao.loc[taxa_educacao['AcceptedCmpOverall'].idxmax()]
+    # Na prévia rápida, o intervalo de confiança acompanha cada taxa
+    intervalo = lambda linha: (
+        f"<br><small>{sampling.interval_text(sampling.Estimativa(linha['AcceptedCmpOverall'], linha['inferior'], linha['superior']), '{:.1%}')}</small>"
+        if 'inferior' in linha else ''
+    )
     
     cols = st.columns(3)
     metrics = [
-        ('👥 Melhor Faixa Etária', f"{max_idade['Faixa_Etaria']} ({max_idade['AcceptedCmpOverall']:.1%})", '#B22222'),
-        ('🎓 Aceitação Graduados', f"{max_educ['AcceptedCmpOverall']:.1%}", '#CD5C5C'),
+        ('👥 Melhor Faixa Etária', f"{max_idade['Faixa_Etaria']} ({max_idade['AcceptedCmpOverall']:.1%})"
+                                  f"{intervalo(max_idade)}", '#B22222'),
+        ('🎓 Aceitação Graduados', f"{max_educ['AcceptedCmpOverall']:.1%}{intervalo(max_educ)}", '#CD5C5C'),
         ('📊 Diferença', f"{(max_idade['AcceptedCmpOverall'] - max_educ['AcceptedCmpOverall']):.1%}", '#DC143C')
     ]
     
@@ -128,6 +220,7 @@ def display_key_metrics(taxa_idade: pd.DataFrame, taxa_educacao: pd.DataFrame) -
                 unsafe_allow_html=True
             )
 
+@timed()
 def generate_insights(taxa_idade: pd.DataFrame, taxa_educacao: pd.DataFrame) -> str:
     """
     Gera relatório textual formatado com insights
@@ -155,20 +248,25 @@ def generate_insights(taxa_idade: pd.DataFrame, taxa_educacao: pd.DataFrame) ->
 
 def main():
     """Função principal do dashboard"""
+    ui.apply_theme()
+    start_rerun('marketing')
     st.markdown('<h1 class="header-text">📈 Eficácia de Campanhas por Demografia</h1>', unsafe_allow_html=True)
     
-    # Carregar dados
-    df = load_data('../data/processed/ifood_df_atualizado.csv')
+    # Carregar agregados: os filtros são respondidos pelo cubo, sem ler as linhas
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+    cubo = load_cube(data_path)
+    previa = ui.preview_toggle()
+    amostra = load_sample(data_path) if previa else None
     
-    if not df.empty:
+    if cubo is not None and (amostra is not None or not previa):
         # Controles interativos
         with st.container():
             col1, col2 = st.columns(2)
             with col1:
                 age_range = st.slider(
                     '🔢 Faixa Etária:',
-                    min_value=int(df['Age'].min()),
-                    max_value=int(df['Age'].max()),
+                    min_value=int(cubo.keys[0]),
+                    max_value=int(cubo.keys[-1]),
                     value=(25, 55)
                 )
             with col2:
@@ -178,29 +276,31 @@ def main():
                     index=0
                 )
 
-        # Aplicar filtros
-        filtered_df = df[df['Age'].between(*age_range)]
-        if educ_filter == 'Graduados':
-            filtered_df = filtered_df[filtered_df['education_Graduation'] == 1]
-        elif educ_filter == 'Não Graduados':
-            filtered_df = filtered_df[filtered_df['education_Graduation'] == 0]
-
-        # Processar dados
-        taxa_idade, taxa_educacao = process_data(filtered_df)
+        # Aplicar filtros e processar dados diretamente no cubo pré-calculado (ou
+        # ler o estado já calculado em segundo plano); na prévia, estimar pela amostra
+        versao = data_layer.open_store(data_path).version
+        if previa:
+            taxa_idade, taxa_educacao, fig_idade, fig_educacao = PREFETCHER.get(
+                cache_key('marketing', versao, age_range=age_range, educ_filter=educ_filter, previa=True),
+                lambda: build_preview(amostra, age_range, educ_filter)
+            )
+            st.caption(f"⚡ Prévia com {len(amostra.dados):,} de {int(amostra.populacao.sum()):,} clientes "
+                       f"(amostra estratificada); barras de erro com IC de {sampling.NIVEL_CONFIANCA:.0%}.")
+        else:
+            taxa_idade, taxa_educacao, fig_idade, fig_educacao = PREFETCHER.get(
+                cache_key('marketing', versao, age_range=age_range, educ_filter=educ_filter),
+                lambda: build_view(cubo, age_range, educ_filter)
+            )
         
         # Seção de Visualizações
         with st.container():
             col1, col2 = st.columns(2)
             with col1:
-                st.plotly_chart(
-                    create_bar_plot(taxa_idade, 'Faixa_Etaria', 'Aceitação por Faixa Etária'),
-                    use_container_width=True
-                )
+                with stage('render_idade'):
+                    st.plotly_chart(fig_idade, use_container_width=True)
             with col2:
-                st.plotly_chart(
-                    create_bar_plot(taxa_educacao, 'education_Graduation', 'Aceitação por Educação'),
-                    use_container_width=True
-                )
+                with stage('render_educacao'):
+                    st.plotly_chart(fig_educacao, use_container_width=True)
 
         # Seção Analítica
         with st.container():
@@ -217,5 +317,11 @@ def main():
                     unsafe_allow_html=True
                 )
 
+        if not previa:
+            schedule_neighbours(cubo, versao, age_range, educ_filter)
+
+    render_debug_panel()
+
 if __name__ == "__main__":
+    ui.configure_page("Análise de Campanhas - iFood", "📈")
     main()
\ No newline at end of file
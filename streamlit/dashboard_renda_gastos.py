@@ -5,90 +5,133 @@ import plotly.express as px
 import plotly.graph_objects as go
 from typing import Tuple, Dict
 
-# Configuração inicial da página
-st.set_page_config(
-    page_title="Análise Renda vs Gastos - iFood",
-    page_icon="🍷",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Estilos CSS personalizados
-st.markdown("""
-    <style>
-    .main { background-color: #FFFFFF; }
-    .header-text { 
-        color: #000000;
-        font-family: 'Arial';
-        border-bottom: 2px solid #B22222;
-        padding-bottom: 10px;
-        margin-bottom: 1.5rem;
-    }
-    .metric-card {
-        background-color: #FFF5F5;
-        border: 2px solid #B22222;
-        border-radius: 8px;
-        padding: 20px;
-        margin: 10px 0;
-        box-shadow: 0 2px 4px rgba(178,34,34,0.1);
-    }
-    .report-box {
-        border: 2px solid #B22222;
-        border-radius: 8px;
-        padding: 25px;
-        margin: 15px 0;
-        background-color: #FFF5F5;
-    }
-    .stSlider>div>div>div>div {
-        background-color: #B22222 !important;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-@st.cache_data(show_spinner="Carregando dados...")
-def load_data(file_path: str) -> pd.DataFrame:
-    """
-    Carrega e otimiza os dados do arquivo CSV com tratamento de erros
+from ifood import aggregates, data_layer, partitions, plotting, sampling, ui
+from ifood.instrumentation import render_debug_panel, stage, start_rerun, timed
+from ifood.cube import PrefixCube, means
+from ifood.prefetch import PREFETCHER, neighbour_ranges
+from ifood.result_cache import cache_key
+from ifood.sampling import Amostra, Estimativa
+
+# Colunas lidas do cache colunar; as demais nem são abertas
+COLUNAS = ['Income', 'MntWines', 'MntFruits', 'MntMeatProducts', 'Age']
+
+@timed()
+def load_data(file_path: str, income_range: Tuple[int, int] = None) -> pd.DataFrame:
+    """
+    Carrega do cache colunar mapeado em memória só as colunas usadas e, com
+    ``income_range``, só as linhas da faixa de renda (o filtro é empurrado ao cache
+    e grupos de linhas fora da faixa não são lidos), com tratamento de erros
     """
     try:
-        df = pd.read_csv(
-            file_path,
-            usecols=['Income', 'MntWines', 'MntFruits', 'MntMeatProducts', 'Age'],
-            dtype={
-                'Income': 'float32',
-                'MntWines': 'int32',
-                'MntFruits': 'int16',
-                'MntMeatProducts': 'int32',
-                'Age': 'int16'
-            }
-        )
-        return df.dropna()
+        filtros = {'Income': tuple(income_range)} if income_range is not None else None
+        return data_layer.query(file_path, COLUNAS, filtros, dropna=True)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
         return pd.DataFrame()
 
+# Produtos disponíveis no seletor e categorias de renda
+PRODUTOS = aggregates.PRODUTOS_RENDA
+BINS_RENDA = aggregates.BINS_RENDA
+LABELS_RENDA = aggregates.LABELS_RENDA
+
+# Passo do slider de renda: estados discretos podem ser pré-calculados e reaproveitados
+PASSO_RENDA = 1000
+
+@timed()
+def load_cube(file_path: str) -> PrefixCube:
+    """
+    Retorna o cubo por valor de renda com as somas de gastos de cada produto e os
+    momentos usados na correlação Renda x Gastos (definido em ``ifood.aggregates``),
+    com tratamento de erros
+    """
+    try:
+        with st.spinner("Pré-calculando agregados..."):
+            return aggregates.load_cube(file_path, 'renda_produtos')
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {str(e)}")
+        return None
+
+@timed()
+def load_sample(file_path: str) -> Amostra:
+    """
+    Retorna a amostra estratificada por faixa de renda usada na prévia rápida, com
+    tratamento de erros
+    """
+    try:
+        with st.spinner("Sorteando amostra..."):
+            return sampling.load_sample(file_path, 'renda')
+    except Exception as e:
+        st.error(f"Erro ao carregar amostra: {str(e)}")
+        return None
+
+@timed()
 def calculate_analysis(df: pd.DataFrame, coluna_gastos: str) -> Tuple[float, pd.DataFrame]:
     """
     Realiza os cálculos principais da análise
     """
-    bins = [0, 30000, 60000, 90000, float('inf')]
-    labels = ['Baixa', 'Média', 'Alta', 'Muito Alta']
-    df['Categoria_Renda'] = pd.cut(df['Income'], bins=bins, labels=labels)
+    df['Categoria_Renda'] = pd.cut(df['Income'], bins=BINS_RENDA, labels=LABELS_RENDA)
     
     correlacao = df[['Income', coluna_gastos]].corr().iloc[0, 1]
     gastos_medios = df.groupby('Categoria_Renda', observed=False)[coluna_gastos].mean().reset_index()
     
     return correlacao, gastos_medios
 
-def create_scatter_plot(df: pd.DataFrame, coluna_gastos: str) -> go.Figure:
-    """Cria gráfico de dispersão interativo com paleta vermelha"""
-    fig = px.scatter(
+@timed()
+def calculate_analysis_cube(cubo: PrefixCube, coluna_gastos: str,
+                            income_range: Tuple[int, int]) -> Tuple[float, pd.DataFrame]:
+    """
+    Calcula a correlação e os gastos médios de ``calculate_analysis`` a partir do
+    cubo pré-calculado, em tempo proporcional ao número de faixas (e não de linhas)
+    """
+    contagens, somas = cubo.totals(*income_range)
+    n, somas = contagens[0], somas[0]
+    sx, sy = cubo.measure(somas, 'Income_c'), cubo.measure(somas, f'{coluna_gastos}_c')
+    cov = cubo.measure(somas, f'Income_x_{coluna_gastos}') - sx * sy / max(n, 1)
+    var_x = cubo.measure(somas, 'Income_c2') - sx * sx / max(n, 1)
+    var_y = cubo.measure(somas, f'{coluna_gastos}_c2') - sy * sy / max(n, 1)
+    correlacao = cov / np.sqrt(var_x * var_y) if n > 1 and var_x > 0 and var_y > 0 else float('nan')
+
+    contagens, somas = cubo.band_totals(BINS_RENDA, *income_range)
+    gastos_medios = pd.DataFrame({
+        'Categoria_Renda': pd.Categorical(LABELS_RENDA, categories=LABELS_RENDA, ordered=True),
+        coluna_gastos: means(contagens[:, 0], cubo.measure(somas, coluna_gastos)[:, 0])
+    })
+    
+    return correlacao, gastos_medios
+
+@timed()
+def calculate_analysis_sample(amostra: Amostra, coluna_gastos: str,
+                              income_range: Tuple[int, int]) -> Tuple[Estimativa, pd.DataFrame]:
+    """
+    Estima a correlação e os gastos médios de ``calculate_analysis`` a partir da
+    amostra estratificada; os gastos médios trazem as colunas ``inferior`` e ``superior``
+    """
+    renda = amostra.dados['Income']
+    dominio = renda.between(*income_range).to_numpy()
+    correlacao = sampling.correlation(amostra, 'Income', coluna_gastos, dominio)
+
+    categorias = pd.cut(renda, bins=BINS_RENDA, labels=LABELS_RENDA)
+    gastos_medios = sampling.group_means(amostra, coluna_gastos, categorias, LABELS_RENDA, dominio)
+    gastos_medios = gastos_medios.rename(columns={'grupo': 'Categoria_Renda', 'valor': coluna_gastos})
+    gastos_medios['Categoria_Renda'] = pd.Categorical(LABELS_RENDA, categories=LABELS_RENDA, ordered=True)
+    
+    return correlacao, gastos_medios
+
+@timed()
+def create_scatter_plot(df: pd.DataFrame, coluna_gastos: str,
+                        modo: str = plotting.MODO_AUTOMATICO) -> go.Figure:
+    """
+    Cria gráfico de dispersão interativo com paleta vermelha; acima de
+    ``plotting.LIMITE_PONTOS`` linhas envia uma amostra (WebGL) ou uma grade agregada
+    """
+    fig = plotting.scatter_figure(
         df,
         x='Income',
         y=coluna_gastos,
-        color='Categoria_Renda',
+        cor='Categoria_Renda',
+        modo=modo,
         color_discrete_sequence=px.colors.sequential.Reds,
-        title='Renda vs. Gastos',
+        titulo='Renda vs. Gastos',
         labels={'Income': 'Renda (USD)', coluna_gastos: 'Gastos (USD)'}
     )
     fig.update_layout(
@@ -98,8 +141,17 @@ def create_scatter_plot(df: pd.DataFrame, coluna_gastos: str) -> go.Figure:
     )
     return fig
 
+@timed()
 def create_bar_plot(gastos_medios: pd.DataFrame, coluna_gastos: str) -> go.Figure:
-    """Cria gráfico de barras interativo com paleta vermelha"""
+    """
+    Cria gráfico de barras interativo com paleta vermelha (com barras de erro
+    quando ``gastos_medios`` traz o intervalo de confiança da prévia rápida)
+    """
+    intervalo = {}
+    if 'inferior' in gastos_medios.columns:
+        gastos_medios = gastos_medios.assign(erro_superior=gastos_medios['superior'] - gastos_medios[coluna_gastos],
+                                             erro_inferior=gastos_medios[coluna_gastos] - gastos_medios['inferior'])
+        intervalo = {'error_y': 'erro_superior', 'error_y_minus': 'erro_inferior'}
     fig = px.bar(
         gastos_medios,
         x='Categoria_Renda',
@@ -107,7 +159,8 @@ def create_bar_plot(gastos_medios: pd.DataFrame, coluna_gastos: str) -> go.Figur
         title='Gastos Médios por Categoria de Renda',
         labels={'Categoria_Renda': 'Categoria', coluna_gastos: 'Gastos Médios (USD)'},
         color='Categoria_Renda',
-        color_discrete_sequence=px.colors.sequential.Reds
+        color_discrete_sequence=px.colors.sequential.Reds,
+        **intervalo
     )
     fig.update_layout(
         showlegend=False,
@@ -116,11 +169,74 @@ def create_bar_plot(gastos_medios: pd.DataFrame, coluna_gastos: str) -> go.Figur
     )
     return fig
 
-def display_metrics(correlacao: float, gastos_medios: pd.DataFrame, coluna_gastos: str) -> None:
-    """Exibe métricas principais em cards estilizados"""
+@timed()
+def filter_income(df: pd.DataFrame, income_range: Tuple[int, int]) -> pd.DataFrame:
+    """Linhas na faixa de renda, com a categoria de renda usada na dispersão"""
+    filtered_df = df[df['Income'].between(*income_range)]
+    filtered_df['Categoria_Renda'] = pd.cut(filtered_df['Income'], bins=BINS_RENDA, labels=LABELS_RENDA)
+    return filtered_df
+
+@timed()
+def query_income(file_path: str, income_range: Tuple[int, int]) -> pd.DataFrame:
+    """
+    Mesmas linhas de ``filter_income``, lidas das partições por faixa de renda (só
+    as partições e os grupos de linhas que podem estar na faixa são lidos)
+    """
+    filtered_df = partitions.query(file_path, COLUNAS, {'Income': tuple(income_range)}, dropna=True)
+    filtered_df['Categoria_Renda'] = pd.cut(filtered_df['Income'], bins=BINS_RENDA, labels=LABELS_RENDA)
+    return filtered_df
+
+@timed()
+def build_view(file_path: str, cubo: PrefixCube, coluna_gastos: str, income_range: Tuple[int, int],
+               modo: str) -> Tuple[float, pd.DataFrame, go.Figure, go.Figure]:
+    """
+    Agregados e figuras de um estado dos filtros; é a unidade guardada (e
+    pré-calculada em segundo plano) por ``ifood.prefetch``
+    """
+    correlacao, gastos_medios = calculate_analysis_cube(cubo, coluna_gastos, income_range)
+    fig_dispersao = create_scatter_plot(query_income(file_path, income_range), coluna_gastos, modo)
+    fig_barras = create_bar_plot(gastos_medios, coluna_gastos)
+    return correlacao, gastos_medios, fig_dispersao, fig_barras
+
+@timed()
+def build_preview(amostra: Amostra, coluna_gastos: str, income_range: Tuple[int, int],
+                  modo: str) -> Tuple[Estimativa, pd.DataFrame, go.Figure, go.Figure]:
+    """
+    Mesmo resultado de ``build_view`` estimado a partir da amostra (prévia rápida);
+    a dispersão mostra só as linhas sorteadas na faixa de renda
+    """
+    correlacao, gastos_medios = calculate_analysis_sample(amostra, coluna_gastos, income_range)
+    linhas = amostra.dados[amostra.dados['Income'].between(*income_range)].dropna(subset=['Income', coluna_gastos])
+    linhas = linhas.assign(Categoria_Renda=pd.cut(linhas['Income'], bins=BINS_RENDA, labels=LABELS_RENDA))
+    fig_dispersao = create_scatter_plot(linhas, coluna_gastos, modo)
+    fig_barras = create_bar_plot(gastos_medios, coluna_gastos)
+    return correlacao, gastos_medios, fig_dispersao, fig_barras
+
+def schedule_neighbours(file_path: str, cubo: PrefixCube, versao: str, coluna_gastos: str,
+                        income_range: Tuple[int, int], modo: str) -> None:
+    """
+    Agenda o pré-cálculo das faixas de renda a um passo do slider e dos outros
+    produtos na faixa atual
+    """
+    estados = [(coluna_gastos, faixa) for faixa in
+               neighbour_ranges(income_range, int(cubo.keys[0]), int(cubo.keys[-1]), PASSO_RENDA)]
+    estados += [(produto, income_range) for produto in PRODUTOS if produto != coluna_gastos]
+    PREFETCHER.prefetch(
+        [(cache_key('renda_gastos', versao, coluna_gastos=produto, income_range=faixa, modo=modo),
+          lambda produto=produto, faixa=faixa: build_view(file_path, cubo, produto, faixa, modo))
+         for produto, faixa in estados],
+        sessao=ui.session_id()
+    )
+
+def display_metrics(correlacao: float, gastos_medios: pd.DataFrame, coluna_gastos: str,
+                    intervalo: str = '') -> None:
+    """
+    Exibe métricas principais em cards estilizados; ``intervalo`` é o intervalo de
+    confiança da correlação na prévia rápida
+    """
     cols = st.columns(3)
     metrics = [
-        ('📈 Correlação', f"{correlacao:.2f}", '#B22222'),
+        ('📈 Correlação', f"{correlacao:.2f}" + (f"<br><small>{intervalo}</small>" if intervalo else ''), '#B22222'),
         ('💰 Máximo Gasto', f"USD {gastos_medios[coluna_gastos].max():.2f}", '#CD5C5C'),
         ('📉 Mínimo Gasto', f"USD {gastos_medios[coluna_gastos].min():.2f}", '#DC143C')
     ]
@@ -133,20 +249,26 @@ def display_metrics(correlacao: float, gastos_medios: pd.DataFrame, coluna_gasto
                 unsafe_allow_html=True
             )
 
-def generate_report(correlacao: float, gastos_medios: pd.DataFrame, coluna_gastos: str) -> str:
+@timed()
+def generate_report(correlacao: float, gastos_medios: pd.DataFrame, coluna_gastos: str,
+                    intervalo: str = '') -> str:
     """Gera relatório textual formatado com insights"""
     produto = coluna_gastos.replace('Mnt', '').replace('Products', '')
     max_categoria = gastos_medios.loc[gastos_medios[coluna_gastos].idxmax()]
+    linhas_categorias = ''.join(
+        f'\n- {row["Categoria_Renda"]}: USD {row[coluna_gastos]:.2f}' for _, row in gastos_medios.iterrows()
+    )
+    complemento = f' ({intervalo})' if intervalo else ''
     
     report = f"""
     ### 🍷 Insights Estratégicos - {produto}
 
     **Padrões de Consumo:**
     - Categoria com maior gasto: **{max_categoria['Categoria_Renda']}** (USD {max_categoria[coluna_gastos]:.2f})
-    - Correlação Renda-Gastos: **{correlacao:.2f}**
+    - Correlação Renda-Gastos: **{correlacao:.2f}**{complemento}
     
     **Gastos Médios por Categoria:**
-    {''.join([f'\n- {row["Categoria_Renda"]}: USD {row[coluna_gastos]:.2f}' for _, row in gastos_medios.iterrows()])}
+    {linhas_categorias}
 
     **Recomendações:**
     - Desenvolver bundles premium para clientes de **alta renda**
@@ -157,48 +279,86 @@ def generate_report(correlacao: float, gastos_medios: pd.DataFrame, coluna_gasto
 
 def main():
     """Função principal do dashboard"""
+    ui.apply_theme()
+    start_rerun('renda_gastos')
     st.markdown('<h1 class="header-text">🍷 Análise Renda vs Gastos</h1>', unsafe_allow_html=True)
     
-    # Carregar dados
-    df = load_data('../data/processed/ifood_df_atualizado.csv')
+    # Carregar agregados; só as linhas da faixa escolhida são lidas, para a dispersão
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+    cubo = load_cube(data_path)
+    previa = ui.preview_toggle()
+    amostra = load_sample(data_path) if previa else None
     
-    if not df.empty:
+    if cubo is not None and (amostra is not None or not previa):
         # Controles interativos
         with st.container():
             col1, col2 = st.columns(2)
             with col1:
                 coluna_gastos = st.selectbox(
                     '🎯 Selecione o Produto:',
-                    options=['MntWines', 'MntFruits', 'MntMeatProducts'],
+                    options=PRODUTOS,
                     format_func=lambda x: x.replace('Mnt', '').replace('Products', '')
                 )
             with col2:
+                renda_min, renda_max = int(cubo.keys[0]), int(cubo.keys[-1])
+                no_passo = lambda v: renda_min + round((v - renda_min) / PASSO_RENDA) * PASSO_RENDA
                 income_range = st.slider(
                     '💰 Faixa de Renda (USD):',
-                    min_value=int(df['Income'].min()),
-                    max_value=int(df['Income'].max()),
-                    value=(int(df['Income'].quantile(0.25)), int(df['Income'].quantile(0.75)))
+                    min_value=renda_min,
+                    max_value=renda_max,
+                    value=(no_passo(cubo.quantile(0.25)), no_passo(cubo.quantile(0.75))),
+                    step=PASSO_RENDA
                 )
+        modo_dispersao = st.sidebar.radio(
+            '🖼️ Renderização da dispersão:',
+            options=plotting.MODOS_DISPERSAO,
+            help=f"No modo automático, acima de {plotting.LIMITE_PONTOS:,} clientes é exibida uma amostra estratificada."
+        )
 
-        # Processar dados
-        filtered_df = df[df['Income'].between(*income_range)]
-        correlacao, gastos_medios = calculate_analysis(filtered_df, coluna_gastos)
+        # Processar dados: agregados vêm do cubo; só o gráfico de dispersão usa as
+        # linhas. Estados vizinhos já visitados ou pré-calculados são apenas lidos.
+        versao = data_layer.open_store(data_path).version
+        intervalo = ''
+        if previa:
+            # Prévia rápida: tudo é estimado pela amostra, com intervalos de confiança
+            estimativa, gastos_medios, fig_dispersao, fig_barras = PREFETCHER.get(
+                cache_key('renda_gastos', versao, coluna_gastos=coluna_gastos, income_range=income_range,
+                          modo=modo_dispersao, previa=True),
+                lambda: build_preview(amostra, coluna_gastos, income_range, modo_dispersao)
+            )
+            correlacao, intervalo = estimativa.valor, sampling.interval_text(estimativa)
+            st.caption(f"⚡ Prévia com {len(amostra.dados):,} de {int(amostra.populacao.sum()):,} clientes "
+                       f"(amostra estratificada); barras de erro com IC de {sampling.NIVEL_CONFIANCA:.0%}.")
+        else:
+            correlacao, gastos_medios, fig_dispersao, fig_barras = PREFETCHER.get(
+                cache_key('renda_gastos', versao, coluna_gastos=coluna_gastos, income_range=income_range,
+                          modo=modo_dispersao),
+                lambda: build_view(data_path, cubo, coluna_gastos, income_range, modo_dispersao)
+            )
         
         # Gráficos
         with st.container():
-            st.plotly_chart(create_scatter_plot(filtered_df, coluna_gastos), use_container_width=True)
-            st.plotly_chart(create_bar_plot(gastos_medios, coluna_gastos), use_container_width=True)
+            with stage('render_dispersao'):
+                st.plotly_chart(fig_dispersao, use_container_width=True)
+            with stage('render_barras'):
+                st.plotly_chart(fig_barras, use_container_width=True)
         
         # Métricas e Relatório
         with st.container():
             st.markdown("### 📊 Métricas Principais")
-            display_metrics(correlacao, gastos_medios, coluna_gastos)
+            display_metrics(correlacao, gastos_medios, coluna_gastos, intervalo)
             
             st.markdown("### 📄 Análise Detalhada")
             st.markdown(
-                f'<div class="report-box">{generate_report(correlacao, gastos_medios, coluna_gastos)}</div>',
+                f'<div class="report-box">{generate_report(correlacao, gastos_medios, coluna_gastos, intervalo)}</div>',
                 unsafe_allow_html=True
             )
 
+        if not previa:
+            schedule_neighbours(data_path, cubo, versao, coluna_gastos, income_range, modo_dispersao)
+
+    render_debug_panel()
+
 if __name__ == "__main__":
+    ui.configure_page("Análise Renda vs Gastos - iFood", "🍷")
     main()
\ No newline at end of file
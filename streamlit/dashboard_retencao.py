@@ -0,0 +1,122 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from ifood import clv, ui
+from ifood.clv import Clv
+
+COLUNAS_TABELA = {
+    'Customer_ID': 'Cliente',
+    'retention_priority': 'Prioridade',
+    'predicted_clv': 'CLV Previsto (USD)',
+    'annual_spending': 'Gasto Anual (USD)',
+    'MntTotal': 'Gasto Total (USD)',
+    'Customer_Days': 'Dias como Cliente',
+    'Income': 'Renda (USD)',
+}
+
+def load_clv(file_path: str) -> Clv:
+    """
+    Retorna as colunas de CLV da versão atual do dataset (calculadas em paralelo e
+    gravadas no cache colunar), com tratamento de erros
+    """
+    try:
+        with st.spinner("Calculando CLV..."):
+            return clv.load_clv(file_path)
+    except Exception as e:
+        st.error(f"Erro ao calcular CLV: {str(e)}")
+        return None
+
+def create_clv_histogram(valores: np.ndarray, bins: int = 40) -> go.Figure:
+    """Cria histograma do CLV previsto (contagem feita com NumPy, sem copiar a base)"""
+    contagens, bordas = np.histogram(valores, bins=bins)
+    fig = px.bar(
+        x=(bordas[:-1] + bordas[1:]) / 2,
+        y=contagens,
+        color_discrete_sequence=['#B22222'],
+        title='Distribuição do CLV Previsto',
+        labels={'x': 'CLV Previsto (USD)', 'y': 'Clientes'}
+    )
+    fig.update_traces(width=float(bordas[1] - bordas[0]) if len(bordas) > 1 else None)
+    fig.update_layout(plot_bgcolor='white', height=400, bargap=0.05)
+    return fig
+
+def create_priority_plot(ranking: pd.DataFrame) -> go.Figure:
+    """Cria gráfico de barras com o CLV dos reclamantes mais prioritários"""
+    fig = px.bar(
+        ranking,
+        x=ranking['Customer_ID'].astype(str),
+        y='predicted_clv',
+        color='Customer_Days',
+        color_continuous_scale='Reds',
+        title='CLV dos Reclamantes por Ordem de Prioridade',
+        labels={'x': 'Cliente', 'predicted_clv': 'CLV Previsto (USD)', 'Customer_Days': 'Dias como Cliente'}
+    )
+    fig.update_xaxes(type='category')
+    fig.update_layout(plot_bgcolor='white', height=400)
+    return fig
+
+def display_metrics(valores: np.ndarray, reclamantes: int) -> None:
+    """Exibe métricas principais em cards estilizados"""
+    cols = st.columns(3)
+    metrics = [
+        ('👥 Clientes Elegíveis', f"{len(valores):,}", '#B22222'),
+        ('💰 CLV Médio', f"USD {valores.mean():,.2f}" if len(valores) else "-", '#CD5C5C'),
+        ('⚠️ Reclamantes a Reter', f"{reclamantes:,}", '#DC143C')
+    ]
+
+    for col, (title, value, color) in zip(cols, metrics):
+        with col:
+            st.markdown(
+                f'<div class="metric-card" style="border-color: {color}">'
+                f'<h3 style="color: {color}">{title}</h3><h2>{value}</h2></div>',
+                unsafe_allow_html=True
+            )
+
+def main():
+    """Função principal do dashboard"""
+    ui.apply_theme()
+    st.markdown('<h1 class="header-text">🛟 Valor do Cliente e Prioridade de Retenção</h1>', unsafe_allow_html=True)
+
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+
+    colunas = load_clv(data_path)
+    if colunas is None:
+        st.stop()
+
+    # Controles interativos
+    k = st.slider('🏅 Clientes em cada ranking:', min_value=5, max_value=200, value=20, step=5)
+
+    valores = np.asarray(colunas.predicted_clv)
+    valores = valores[~np.isnan(valores)]
+    reclamantes = int(np.count_nonzero(np.asarray(colunas.retention_priority)))
+
+    st.markdown("### 📊 Métricas de CLV")
+    display_metrics(valores, reclamantes)
+
+    ranking = clv.retention_ranking(data_path, k)
+    with st.container():
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(create_clv_histogram(valores), use_container_width=True)
+        with col2:
+            if ranking.empty:
+                st.info("Nenhum cliente elegível reclamou.")
+            else:
+                st.plotly_chart(create_priority_plot(ranking), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"### ⚠️ Prioridade de Retenção (top {k})")
+        st.dataframe(ranking[list(COLUNAS_TABELA)].rename(columns=COLUNAS_TABELA).round(2),
+                     use_container_width=True, hide_index=True)
+    with col2:
+        st.markdown(f"### 💎 Maior CLV Previsto (top {k})")
+        st.dataframe(clv.top_clv(data_path, k)[list(COLUNAS_TABELA)].rename(columns=COLUNAS_TABELA).round(2),
+                     use_container_width=True, hide_index=True)
+
+if __name__ == "__main__":
+    ui.configure_page("Valor do Cliente e Retenção - iFood", "🛟")
+    main()
@@ -0,0 +1,112 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from typing import List
+
+from ifood import data_layer, segments, ui
+from ifood.segments import SEGMENTOS, N_FAIXAS, SegmentIndex
+
+# Colunas exibidas no detalhamento dos clientes selecionados
+COLUNAS_DETALHE = ['Income', 'Age', 'MntTotal', 'NumStorePurchases', 'NumWebVisitsMonth',
+                   'Recency', 'AcceptedCmpOverall']
+MAX_LINHAS_DETALHE = 500
+
+def load_segments(file_path: str) -> SegmentIndex:
+    """
+    Retorna os segmentos materializados (e o índice por segmento x faixa) da versão
+    atual do dataset, com tratamento de erros
+    """
+    try:
+        with st.spinner("Materializando segmentos..."):
+            return segments.load_segments(file_path)
+    except Exception as e:
+        st.error(f"Erro ao carregar segmentos: {str(e)}")
+        return None
+
+def load_details(file_path: str, indice: SegmentIndex, selecionados: List[str], faixas: List[int]) -> pd.DataFrame:
+    """
+    Lê do cache colunar apenas os clientes de maior food_score da seleção (as primeiras
+    linhas de cada combinação no índice), ordenados por food_score
+    """
+    store = data_layer.open_store(file_path)
+    destaque = indice.top(MAX_LINHAS_DETALHE, selecionados, faixas)
+    detalhe = pd.DataFrame({'Customer_ID': store.customer_ids(destaque),
+                            'Segmento': np.array(SEGMENTOS)[indice.segmento[destaque]],
+                            'Faixa de Gasto': indice.faixa[destaque],
+                            'food_score': indice.food_score[destaque]})
+    for coluna in COLUNAS_DETALHE:
+        detalhe[coluna] = store.column(coluna)[destaque]
+    return detalhe
+
+def create_heatmap(indice: SegmentIndex, selecionados: List[str], faixas: List[int]) -> go.Figure:
+    """Cria mapa de calor com o número de clientes por segmento x faixa de gasto"""
+    contagens = pd.DataFrame(indice.counts(), index=SEGMENTOS, columns=range(1, N_FAIXAS + 1))
+    contagens = contagens.loc[selecionados, faixas]
+    fig = px.imshow(
+        contagens,
+        text_auto=True,
+        color_continuous_scale='Reds',
+        labels={'x': 'Faixa de Gasto (1 = maiores gastos)', 'y': 'Segmento', 'color': 'Clientes'},
+        title='Clientes por Segmento x Faixa de Gasto',
+        aspect='auto'
+    )
+    fig.update_xaxes(type='category')
+    fig.update_layout(plot_bgcolor='white', height=400)
+    return fig
+
+def display_metrics(indice: SegmentIndex, selecionados: List[str], faixas: List[int]) -> None:
+    """Exibe métricas principais da seleção em cards estilizados (totais pré-calculados por combinação)"""
+    n, gasto_medio, score_medio = indice.summary(selecionados, faixas)
+    cols = st.columns(3)
+    metrics = [
+        ('👥 Clientes Selecionados', f"{n:,} ({n / max(len(indice.segmento), 1):.1%})", '#B22222'),
+        ('💰 Gasto Médio', f"USD {gasto_medio:.2f}" if n else '-', '#CD5C5C'),
+        ('🍽️ Food Score Médio', f"{score_medio:.1f}" if n else '-', '#DC143C')
+    ]
+
+    for col, (title, value, color) in zip(cols, metrics):
+        with col:
+            st.markdown(
+                f'<div class="metric-card" style="border-color: {color}">'
+                f'<h3 style="color: {color}">{title}</h3><h2>{value}</h2></div>',
+                unsafe_allow_html=True
+            )
+
+def main():
+    """Função principal do dashboard"""
+    ui.apply_theme()
+    st.markdown('<h1 class="header-text">🧩 Segmentação de Clientes</h1>', unsafe_allow_html=True)
+
+    data_path = '../data/processed/ifood_df_atualizado.csv'
+    indice = load_segments(data_path)
+
+    if indice is not None:
+        # Controles interativos
+        with st.container():
+            col1, col2 = st.columns(2)
+            with col1:
+                selecionados = st.multiselect('🧩 Segmentos:', options=SEGMENTOS, default=SEGMENTOS)
+            with col2:
+                faixas = st.multiselect('💰 Faixas de Gasto (1 = maiores gastos):',
+                                        options=list(range(1, N_FAIXAS + 1)),
+                                        default=list(range(1, N_FAIXAS + 1)))
+
+        if not selecionados or not faixas:
+            st.info("Selecione ao menos um segmento e uma faixa de gasto.")
+            st.stop()
+
+        # Consulta pelo índice: métricas dos totais por combinação e, das linhas,
+        # só as primeiras de cada combinação selecionada
+        st.plotly_chart(create_heatmap(indice, selecionados, faixas), use_container_width=True)
+
+        st.markdown("### 📊 Métricas da Seleção")
+        display_metrics(indice, selecionados, faixas)
+
+        st.markdown(f"### 🔎 Clientes com Maior Food Score (até {MAX_LINHAS_DETALHE})")
+        st.dataframe(load_details(data_path, indice, selecionados, faixas), use_container_width=True, hide_index=True)
+
+if __name__ == "__main__":
+    ui.configure_page("Segmentação de Clientes - iFood", "🧩")
+    main()
@@ -0,0 +1,3 @@
+"""
+Módulos compartilhados pelos dashboards de análise de clientes do Ifood.
+"""
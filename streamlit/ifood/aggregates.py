@@ -0,0 +1,182 @@
+"""
+Definições dos cubos de agregados usados pelos dashboards.
+
+Cada cubo é descrito por funções que recebem um "leitor de colunas"
+(``nome -> np.ndarray``), o que permite construí-lo tanto sobre o cache colunar
+inteiro quanto sobre um DataFrame com poucas linhas (ex.: um delta de ingestão).
+Os cubos construídos são gravados em ``<cache>/agregados/<nome>.npz`` junto com a
+versão do dataset, e a ingestão incremental os atualiza no lugar.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ifood import data_layer
+from ifood.cube import PrefixCube
+
+ColumnGetter = Callable[[str], np.ndarray]
+
+PRODUTOS_RENDA = ['MntWines', 'MntFruits', 'MntMeatProducts']
+GASTOS_FAMILIA = ['MntTotal', 'MntSweetProducts', 'MntGoldProds']
+
+# Faixas de renda e etárias lidas dos cubos (``PrefixCube.band_totals``) pelos
+# dashboards e usadas nas análises de ``ifood.analyses``; faixas etárias fechadas à esquerda
+BINS_RENDA = [0, 30000, 60000, 90000, float('inf')]
+LABELS_RENDA = ['Baixa', 'Média', 'Alta', 'Muito Alta']
+BINS_IDADE = [0, 30, 40, 50, 60, float('inf')]
+LABELS_IDADE = ['≤30', '31-40', '41-50', '51-60', '>60']
+
+
+class CubeSpec(NamedTuple):
+    """Como extrair eixo, grupos, medidas e parâmetros de um cubo."""
+    axis: Callable[[ColumnGetter], np.ndarray]
+    measures: Callable[[ColumnGetter, dict], Dict[str, np.ndarray]]
+    groups: Optional[Callable[[ColumnGetter], np.ndarray]] = None
+    params: Optional[Callable[[ColumnGetter], dict]] = None
+
+
+def _medidas_renda(get: ColumnGetter, params: dict) -> Dict[str, np.ndarray]:
+    # Momentos centralizados em médias fixas (guardadas no cubo) para que deltas
+    # posteriores usem exatamente o mesmo deslocamento.
+    x = get('Income').astype(np.float64) - params['Income']
+    medidas = {'Income_c': x, 'Income_c2': x * x}
+    for produto in PRODUTOS_RENDA:
+        gastos = get(produto).astype(np.float64)
+        y = gastos - params[produto]
+        medidas[produto] = gastos
+        medidas[f'{produto}_c'] = y
+        medidas[f'{produto}_c2'] = y * y
+        medidas[f'Income_x_{produto}'] = x * y
+    return medidas
+
+
+def _params_renda(get: ColumnGetter) -> dict:
+    params = {'Income': float(np.nanmean(get('Income')))}
+    for produto in PRODUTOS_RENDA:
+        params[produto] = float(np.mean(get(produto)))
+    return params
+
+
+def _total_filhos(get: ColumnGetter) -> np.ndarray:
+    return get('Kidhome').astype(np.int16) + get('Teenhome')
+
+
+CUBOS: Dict[str, CubeSpec] = {
+    # dashboard_marketing: aceitação por idade x graduação
+    'idade_educacao': CubeSpec(
+        axis=lambda get: get('Age'),
+        groups=lambda get: get('education_Graduation'),
+        measures=lambda get, params: {'AcceptedCmpOverall': get('AcceptedCmpOverall')},
+    ),
+    # dashboard_renda_gastos: gastos e correlação por renda
+    'renda_produtos': CubeSpec(
+        axis=lambda get: get('Income'),
+        measures=_medidas_renda,
+        params=_params_renda,
+    ),
+    # dashboard_family_: gastos por número total de filhos
+    'filhos_gastos': CubeSpec(
+        axis=_total_filhos,
+        measures=lambda get, params: {c: get(c) for c in GASTOS_FAMILIA},
+    ),
+}
+
+
+def frame_getter(df: pd.DataFrame) -> ColumnGetter:
+    """Leitor de colunas sobre um DataFrame."""
+    return lambda nome: df[nome].to_numpy()
+
+
+def build_cube(nome: str, get: ColumnGetter, params: Optional[dict] = None) -> PrefixCube:
+    """
+    Constrói o cubo ``nome`` a partir de um leitor de colunas.
+
+    Parâmetros:
+      - nome (str): Chave em ``CUBOS``.
+      - get (callable): Leitor de colunas (ex.: ``store.column``).
+      - params (dict, opcional): Parâmetros já fixados (ex.: os de um cubo existente).
+
+    Retorna:
+      - PrefixCube: Cubo construído.
+    """
+    spec = CUBOS[nome]
+    if params is None:
+        params = spec.params(get) if spec.params else {}
+    return PrefixCube.build(
+        axis=spec.axis(get),
+        groups=spec.groups(get) if spec.groups else None,
+        measures=spec.measures(get, params),
+        params=params,
+    )
+
+
+def cube_path(store_dir: str, nome: str) -> str:
+    return os.path.join(store_dir, 'agregados', f'{nome}.npz')
+
+
+# Cubos em memória por (diretório do cache, nome), compartilhados pelas sessões do processo
+_CUBOS_CARREGADOS: Dict[Tuple[str, str], Tuple[str, PrefixCube]] = {}
+_LOCK = threading.Lock()
+
+
+def load_cube(csv_path: str, nome: str) -> PrefixCube:
+    """
+    Retorna o cubo ``nome`` da versão atual do dataset.
+
+    Procura primeiro na memória do processo, depois no arquivo gravado em disco;
+    só reconstrói a partir das colunas quando nenhum dos dois está atualizado.
+    """
+    store = data_layer.open_store(csv_path)
+    chave = (store.store_dir, nome)
+    with _LOCK:
+        em_memoria = _CUBOS_CARREGADOS.get(chave)
+        if em_memoria is not None and em_memoria[0] == store.version:
+            return em_memoria[1]
+
+        caminho = cube_path(store.store_dir, nome)
+        cubo = None
+        if os.path.exists(caminho):
+            cubo, versao = PrefixCube.load(caminho)
+            if versao != store.version:
+                cubo = None
+        if cubo is None:
+            cubo = build_cube(nome, store.column)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            cubo.save(caminho, store.version)
+
+        _CUBOS_CARREGADOS[chave] = (store.version, cubo)
+        return cubo
+
+
+def update_cubes(store_dir: str, versao_anterior: str, versao_nova: str,
+                 inseridos: pd.DataFrame, removidos: pd.DataFrame) -> Dict[str, bool]:
+    """
+    Atualiza no lugar os cubos gravados após uma ingestão incremental: soma as
+    linhas inseridas e subtrai os valores antigos das linhas substituídas.
+
+    Cubos gravados para outra versão do dataset são descartados (serão
+    reconstruídos na próxima leitura).
+
+    Retorna:
+      - dict: Nome do cubo -> ``True`` se foi atualizado, ``False`` se descartado.
+    """
+    resultado = {}
+    for nome in CUBOS:
+        caminho = cube_path(store_dir, nome)
+        if not os.path.exists(caminho):
+            continue
+        cubo, versao = PrefixCube.load(caminho)
+        if versao != versao_anterior:
+            os.remove(caminho)
+            resultado[nome] = False
+            continue
+        for linhas, sinal in ((inseridos, 1), (removidos, -1)):
+            if len(linhas):
+                cubo = cubo.merge(build_cube(nome, frame_getter(linhas), cubo.params), sign=sinal)
+        cubo.save(caminho, versao_nova)
+        resultado[nome] = True
+    return resultado
@@ -0,0 +1,452 @@
+"""
+Registro das análises do notebook ``notebooks/analysis.ipynb`` como funções reutilizáveis.
+
+Cada análise é registrada em ``ANALISES`` declarando:
+
+  - as colunas que usa (somente elas são lidas do cache colunar);
+  - opcionalmente uma chave de agrupamento de ``CHAVES`` (ex.: ``Categoria_Renda``)
+    e as agregações de que precisa sobre essa chave.
+
+As análises pedidas juntas a ``run_analyses`` compartilham uma única leitura das
+colunas, e as que usam a mesma chave são agregadas num único ``groupby`` com a
+união das agregações. Os resultados (dicionários sem gráficos nem texto) ficam no
+cache limitado ``result_cache.RESULTADOS`` por (cache, versão do dataset, análise,
+parâmetros, filtros) e são compartilhados pelas sessões.
+
+Uso:
+    from ifood import analyses
+    resultado = analyses.run_analysis('renda_gastos', coluna_gastos='MntMeatProducts',
+                                      filtros={'Age': (30, 60)})
+"""
+
+import argparse
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from ifood import data_layer, partitions
+from ifood.aggregates import BINS_IDADE, BINS_RENDA, LABELS_IDADE, LABELS_RENDA
+from ifood.result_cache import RESULTADOS, cache_key
+
+BINS_DECADA = list(range(20, 101, 10))
+LABELS_DECADA = [f'{i}-{i + 10}' for i in range(20, 100, 10)]
+LABELS_TEMPO = ['Novos', 'Intermediários', 'Antigos', 'Muito Antigos']
+LABELS_FAIXA_RENDA = ['Baixa Renda', 'Média-Baixa Renda', 'Média-Alta Renda', 'Alta Renda']
+
+CANAIS = {
+    'NumStorePurchases': 'Compras em Loja Física',
+    'NumWebPurchases': 'Compras Online',
+    'NumCatalogPurchases': 'Compras por Catálogo',
+}
+GASTOS_FAMILIA = ('MntTotal', 'MntSweetProducts', 'MntGoldProds')
+
+
+class Chave(NamedTuple):
+    """Chave de agrupamento compartilhável entre análises."""
+    colunas: Tuple[str, ...]
+    funcao: Callable[[pd.DataFrame], pd.Series]
+
+
+CHAVES: Dict[str, Chave] = {
+    'Categoria_Renda': Chave(
+        ('Income',), lambda df: pd.cut(df['Income'], bins=BINS_RENDA, labels=LABELS_RENDA)),
+    'Faixa_Etaria': Chave(
+        ('Age',), lambda df: pd.cut(df['Age'], bins=BINS_IDADE, labels=LABELS_IDADE, right=False)),
+    'Faixa_Etaria_Decada': Chave(
+        ('Age',), lambda df: pd.cut(df['Age'], bins=BINS_DECADA, labels=LABELS_DECADA, right=False)),
+    'Total_Filhos': Chave(
+        ('Kidhome', 'Teenhome'), lambda df: df['Kidhome'].astype(np.int16) + df['Teenhome']),
+    'Recency': Chave(('Recency',), lambda df: df['Recency']),
+    'Complain': Chave(('Complain',), lambda df: df['Complain']),
+    'Response': Chave(('Response',), lambda df: df['Response']),
+}
+
+
+class Analise(NamedTuple):
+    """
+    Uma análise registrada.
+
+    ``funcao(df, agrupado, **params)`` recebe as colunas declaradas (mais a coluna
+    da chave) e, se houver chave, o resultado do ``groupby`` com colunas
+    ``(coluna, agregação)``.
+    """
+    funcao: Callable[..., dict]
+    colunas: Callable[[dict], List[str]]
+    chave: Optional[str] = None
+    agregacoes: Optional[Callable[[dict], Dict[str, List[str]]]] = None
+    padroes: Optional[dict] = None
+    descricao: str = ''
+
+
+def _valores(serie: pd.Series) -> np.ndarray:
+    """Valores em float64 (os testes do scipy não devem herdar os tipos compactos)."""
+    return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _medias(agrupado: pd.DataFrame, colunas: Iterable[str]) -> pd.DataFrame:
+    return pd.DataFrame({c: agrupado[(c, 'mean')] for c in colunas})
+
+
+def _mann_whitney(a: np.ndarray, b: np.ndarray) -> Tuple[float, float]:
+    if len(a) == 0 or len(b) == 0:
+        return float('nan'), float('nan')
+    estatistica, p_valor = stats.mannwhitneyu(a, b, alternative='two-sided')
+    return float(estatistica), float(p_valor)
+
+
+def _quartis(serie: pd.Series, rotulos: List[str]) -> pd.Series:
+    """
+    ``pd.qcut`` em quartis que não falha em filtros com poucas linhas: quartis
+    repetidos são fundidos (``duplicates='drop'``) e recebem os primeiros rótulos;
+    sem linhas, o resultado é vazio.
+    """
+    codigos = pd.qcut(serie, q=4, labels=False, duplicates='drop')
+    codigos = codigos.fillna(-1).astype(np.int64).to_numpy()
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=rotulos), index=serie.index)
+
+
+def _normal(valores: np.ndarray) -> bool:
+    """Teste de normalidade de D'Agostino (exige ao menos 8 observações)."""
+    return len(valores) >= 8 and stats.normaltest(valores)[1] > 0.05
+
+
+# ---------------------------------------------------------------------------
+# Análises
+# ---------------------------------------------------------------------------
+
+def _renda_gastos(df: pd.DataFrame, agrupado: pd.DataFrame, coluna_gastos: str) -> dict:
+    gastos_medios = _medias(agrupado, [coluna_gastos]).reset_index()
+    return {
+        'correlacao': float(df['Income'].corr(df[coluna_gastos])),
+        'gastos_medios': gastos_medios,
+    }
+
+
+def _familia_compras(df: pd.DataFrame, agrupado: pd.DataFrame, colunas_gastos: Tuple[str, ...]) -> dict:
+    return {'gastos_medios': _medias(agrupado, colunas_gastos).reset_index()}
+
+
+def _recencia_engajamento(df: pd.DataFrame, agrupado: pd.DataFrame) -> dict:
+    # O notebook lista o acumulado cliente a cliente; por dia de recência o
+    # resultado é o mesmo nos pontos de mudança e tem no máximo 100 linhas.
+    visitas = pd.DataFrame({
+        'clientes': agrupado[('NumWebVisitsMonth', 'count')],
+        'visitas': agrupado[('NumWebVisitsMonth', 'sum')],
+    })
+    visitas['visitas_acumuladas'] = visitas['visitas'].cumsum()
+    return {
+        'correlacao': float(df['Recency'].corr(df['NumWebVisitsMonth'])),
+        'visitas_por_recencia': visitas.reset_index(),
+    }
+
+
+def _campanhas_demografia(df: pd.DataFrame, agrupado: pd.DataFrame) -> dict:
+    taxa_educacao = df.groupby('education_Graduation')['AcceptedCmpOverall'].mean()
+    return {
+        'taxa_aceitacao_idade': _medias(agrupado, ['AcceptedCmpOverall']).reset_index(),
+        'taxa_aceitacao_educacao': taxa_educacao.reset_index(),
+    }
+
+
+def _canais_compra(df: pd.DataFrame, agrupado: pd.DataFrame) -> dict:
+    medias = _medias(agrupado, CANAIS)
+    medias_gerais = df[list(CANAIS)].mean()
+    return {
+        'medias_por_renda': medias.reset_index(),
+        'canal_preferido': medias.dropna(how='all').idxmax(axis=1).map(CANAIS),
+        'correlacoes_renda': {canal: float(df['Income'].corr(df[canal])) for canal in CANAIS},
+        'medias_gerais': medias_gerais,
+        'canal_mais_usado': CANAIS[medias_gerais.idxmax()] if medias_gerais.notna().any() else None,
+    }
+
+
+def _reclamacoes_fidelidade(df: pd.DataFrame, agrupado: pd.DataFrame, nivel_significancia: float) -> dict:
+    estatisticas = agrupado[[('Customer_Days', a) for a in ('count', 'mean', 'std', 'median')]
+                            + [('MntTotal', a) for a in ('mean', 'std', 'median')]].round(2)
+    categoria_tempo = _quartis(df['Customer_Days'], LABELS_TEMPO)
+    taxa_reclamacao = df['Complain'].groupby(categoria_tempo, observed=True).mean()
+
+    reclamou = df['Complain'] == 1
+    testes = {}
+    for coluna, nome in (('Customer_Days', 'customer_days'), ('MntTotal', 'mnt_total')):
+        valores = _valores(df[coluna])
+        estatistica, p_valor = _mann_whitney(valores[reclamou.to_numpy()], valores[~reclamou.to_numpy()])
+        testes[nome] = {'estatistica': estatistica, 'p_valor': p_valor,
+                        'significativo': p_valor < nivel_significancia}
+    return {
+        'estatisticas': estatisticas,
+        'taxa_reclamacao': taxa_reclamacao,
+        'testes_estatisticos': testes,
+    }
+
+
+def _carne_estado_civil(df: pd.DataFrame, agrupado: None, nivel_significancia: float) -> dict:
+    estado_civil = ['marital_Single', 'marital_Married']
+    estatisticas = df.groupby(estado_civil)['MntMeatProducts'].agg(['count', 'mean', 'median', 'std']).round(2)
+    faixa_renda = _quartis(df['Income'], LABELS_FAIXA_RENDA).rename('Faixa_Renda')
+    medias_por_renda = (df.groupby([faixa_renda, df['marital_Single'], df['marital_Married']], observed=True)
+                        ['MntMeatProducts'].mean().round(2))
+
+    solteiros = (df['marital_Single'] == 1).to_numpy()
+    casados = (df['marital_Married'] == 1).to_numpy()
+    carne = _valores(df['MntMeatProducts'])
+    estatistica, p_valor = _mann_whitney(carne[solteiros], carne[casados])
+    return {
+        'estatisticas': estatisticas,
+        'medias_por_renda': medias_por_renda,
+        'teste_estatistico': {'estatistica': estatistica, 'p_valor': p_valor,
+                              'significativo': p_valor < nivel_significancia},
+        'correlacoes': {
+            'solteiros': float(df.loc[solteiros, 'Income'].corr(df.loc[solteiros, 'MntMeatProducts'])),
+            'casados': float(df.loc[casados, 'Income'].corr(df.loc[casados, 'MntMeatProducts'])),
+        },
+    }
+
+
+def _descontos_compras_online(df: pd.DataFrame, agrupado: None, coluna_descontos: str,
+                              coluna_online: str) -> dict:
+    if df[[coluna_descontos, coluna_online]].isnull().any().any():
+        raise ValueError("Existem valores ausentes nas colunas especificadas.")
+    if len(df) < 2:
+        return {'correlacao': float('nan'), 'p_valor': float('nan')}
+    correlacao, p_valor = stats.pearsonr(_valores(df[coluna_descontos]), _valores(df[coluna_online]))
+    return {'correlacao': float(correlacao), 'p_valor': float(p_valor)}
+
+
+def _impacto_ultima_campanha(df: pd.DataFrame, agrupado: pd.DataFrame) -> dict:
+    estatisticas = agrupado['MntRegularProds'][['count', 'mean', 'median', 'std']].round(2)
+
+    respondeu = (df['Response'] == 1).to_numpy()
+    gastos = _valores(df['MntRegularProds'])
+    sim, nao = gastos[respondeu], gastos[~respondeu]
+    if _normal(nao) and _normal(sim):
+        estatistica, p_valor = stats.ttest_ind(sim, nao)
+        teste = "Teste t de Student"
+    else:
+        estatistica, p_valor = _mann_whitney(sim, nao)
+        teste = "Teste Mann-Whitney U"
+
+    limite_alto_gasto = df['MntRegularProds'].quantile(0.75)
+    proporcao = (df['MntRegularProds'] > limite_alto_gasto).groupby(df['Response']).mean()
+    medias = estatisticas['mean']
+    diferenca = ((medias.get(1, np.nan) - medias.get(0, np.nan)) / medias.get(0, np.nan) * 100)
+    return {
+        'estatisticas': estatisticas,
+        'teste_estatistico': {'teste': teste, 'estatistica': float(estatistica), 'p_valor': float(p_valor)},
+        'proporcao_grandes_compradores': proporcao,
+        'diferenca_percentual': float(diferenca),
+    }
+
+
+def _ouro_idade(df: pd.DataFrame, agrupado: pd.DataFrame, nivel_significancia: float) -> dict:
+    if df[['Age', 'MntGoldProds']].isnull().any().any():
+        raise ValueError("Existem valores ausentes nas colunas especificadas.")
+    gastos_medios = _medias(agrupado, ['MntGoldProds']).reset_index()
+
+    # Só entram no teste as faixas com pelo menos 5 clientes
+    contagens = agrupado[('MntGoldProds', 'count')]
+    validas = set(contagens.index[contagens >= 5])
+    grupos = [_valores(g) for faixa, g in df.groupby('Faixa_Etaria_Decada', observed=True)['MntGoldProds']
+              if faixa in validas]
+    if len(grupos) < 2:
+        teste, estatistica, p_valor = None, float('nan'), float('nan')
+    elif _normal(_valores(df['MntGoldProds'])):
+        estatistica, p_valor = stats.f_oneway(*grupos)
+        teste = "ANOVA"
+    else:
+        estatistica, p_valor = stats.kruskal(*grupos)
+        teste = "Kruskal-Wallis"
+    return {
+        'gastos_medios': gastos_medios,
+        'teste_estatistico': {'teste': teste, 'estatistica': float(estatistica), 'p_valor': float(p_valor),
+                              'significativo': bool(p_valor < nivel_significancia)},
+    }
+
+
+ANALISES: Dict[str, Analise] = {
+    'renda_gastos': Analise(
+        _renda_gastos,
+        colunas=lambda p: ['Income', p['coluna_gastos']],
+        chave='Categoria_Renda',
+        agregacoes=lambda p: {p['coluna_gastos']: ['mean']},
+        padroes={'coluna_gastos': 'MntWines'},
+        descricao="Correlação entre renda e gastos e gasto médio por categoria de renda",
+    ),
+    'familia_compras': Analise(
+        _familia_compras,
+        colunas=lambda p: list(p['colunas_gastos']),
+        chave='Total_Filhos',
+        agregacoes=lambda p: {c: ['mean'] for c in p['colunas_gastos']},
+        padroes={'colunas_gastos': GASTOS_FAMILIA},
+        descricao="Gastos médios por número total de filhos",
+    ),
+    'recencia_engajamento': Analise(
+        _recencia_engajamento,
+        colunas=lambda p: ['Recency', 'NumWebVisitsMonth'],
+        chave='Recency',
+        agregacoes=lambda p: {'NumWebVisitsMonth': ['count', 'sum']},
+        descricao="Recência da última compra vs visitas ao site",
+    ),
+    'campanhas_demografia': Analise(
+        _campanhas_demografia,
+        colunas=lambda p: ['AcceptedCmpOverall', 'education_Graduation'],
+        chave='Faixa_Etaria',
+        agregacoes=lambda p: {'AcceptedCmpOverall': ['mean']},
+        descricao="Aceitação de campanhas por faixa etária e graduação",
+    ),
+    'canais_compra': Analise(
+        _canais_compra,
+        colunas=lambda p: ['Income'] + list(CANAIS),
+        chave='Categoria_Renda',
+        agregacoes=lambda p: {c: ['mean'] for c in CANAIS},
+        descricao="Canal de compra preferido por categoria de renda",
+    ),
+    'reclamacoes_fidelidade': Analise(
+        _reclamacoes_fidelidade,
+        colunas=lambda p: ['Customer_Days', 'MntTotal'],
+        chave='Complain',
+        agregacoes=lambda p: {'Customer_Days': ['count', 'mean', 'std', 'median'],
+                              'MntTotal': ['mean', 'std', 'median']},
+        padroes={'nivel_significancia': 0.05},
+        descricao="Reclamações vs tempo como cliente e valor gasto",
+    ),
+    'carne_estado_civil': Analise(
+        _carne_estado_civil,
+        colunas=lambda p: ['marital_Single', 'marital_Married', 'MntMeatProducts', 'Income'],
+        padroes={'nivel_significancia': 0.05},
+        descricao="Consumo de carne de solteiros vs casados, controlando pela renda",
+    ),
+    'descontos_compras_online': Analise(
+        _descontos_compras_online,
+        colunas=lambda p: [p['coluna_descontos'], p['coluna_online']],
+        padroes={'coluna_descontos': 'NumDealsPurchases', 'coluna_online': 'NumWebPurchases'},
+        descricao="Correlação entre compras com desconto e compras online",
+    ),
+    'impacto_ultima_campanha': Analise(
+        _impacto_ultima_campanha,
+        colunas=lambda p: ['MntRegularProds'],
+        chave='Response',
+        agregacoes=lambda p: {'MntRegularProds': ['count', 'mean', 'median', 'std']},
+        descricao="Gastos com produtos regulares de quem aceitou a última campanha",
+    ),
+    'ouro_idade': Analise(
+        _ouro_idade,
+        colunas=lambda p: ['Age', 'MntGoldProds'],
+        chave='Faixa_Etaria_Decada',
+        agregacoes=lambda p: {'MntGoldProds': ['mean', 'count']},
+        padroes={'nivel_significancia': 0.05},
+        descricao="Gastos em produtos de ouro por faixa etária",
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# Execução
+# ---------------------------------------------------------------------------
+
+def _normalizar_params(nome: str, params: Optional[dict]) -> dict:
+    if nome not in ANALISES:
+        raise ValueError(f"Análise desconhecida: '{nome}'. Disponíveis: {', '.join(ANALISES)}")
+    padroes = ANALISES[nome].padroes or {}
+    desconhecidos = set(params or {}) - set(padroes)
+    if desconhecidos:
+        raise ValueError(f"Parâmetros desconhecidos para '{nome}': {', '.join(sorted(desconhecidos))}")
+    # Listas viram tuplas para que os parâmetros possam compor a chave do cache
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in {**padroes, **(params or {})}.items()}
+
+
+def _normalizar_filtros(filtros: Optional[Dict[str, Tuple[float, float]]]) -> tuple:
+    return tuple(sorted((c, float(lo), float(hi)) for c, (lo, hi) in (filtros or {}).items()))
+
+
+def _executar(store: data_layer.ColumnStore, pedidos: Dict[str, dict], filtros: tuple) -> Dict[str, dict]:
+    """Roda as análises pedidas com uma leitura de colunas e um ``groupby`` por chave."""
+    colunas, aggs_por_chave = [], {}
+    for nome, params in pedidos.items():
+        analise = ANALISES[nome]
+        colunas += analise.colunas(params)
+        if analise.chave:
+            colunas += CHAVES[analise.chave].colunas
+            aggs = aggs_por_chave.setdefault(analise.chave, {})
+            for coluna, funcoes in analise.agregacoes(params).items():
+                aggs.setdefault(coluna, [])
+                aggs[coluna] += [f for f in funcoes if f not in aggs[coluna]]
+
+    # Filtros empurrados ao cache: grupos de linhas (ou partições, para filtros de
+    # gasto total e renda) fora das faixas não são lidos
+    faixas = {c: (minimo, maximo) for c, minimo, maximo in filtros}
+    df = partitions.reader_for(store, faixas).query(list(dict.fromkeys(colunas)), faixas)
+    agrupados = {}
+    for chave, aggs in aggs_por_chave.items():
+        df[chave] = CHAVES[chave].funcao(df)
+        agrupados[chave] = df.groupby(chave, observed=False).agg(aggs)
+
+    return {nome: ANALISES[nome].funcao(df, agrupados.get(ANALISES[nome].chave), **params)
+            for nome, params in pedidos.items()}
+
+
+def run_analyses(nomes: Optional[Iterable[str]] = None,
+                 csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                 filtros: Optional[Dict[str, Tuple[float, float]]] = None,
+                 params: Optional[Dict[str, dict]] = None) -> Dict[str, dict]:
+    """
+    Executa várias análises sobre a versão atual do dataset.
+
+    Parâmetros:
+      - nomes (list, opcional): Análises de ``ANALISES``; por padrão todas.
+      - csv_path (str): CSV processado.
+      - filtros (dict, opcional): ``coluna -> (mínimo, máximo)``, limites inclusivos.
+      - params (dict, opcional): ``análise -> parâmetros`` (ver ``Analise.padroes``).
+
+    Retorna:
+      - dict: ``análise -> resultado``.
+    """
+    store = data_layer.open_store(csv_path)
+    filtros_norm = _normalizar_filtros(filtros)
+    pedidos = {nome: _normalizar_params(nome, (params or {}).get(nome)) for nome in (nomes or ANALISES)}
+    chaves = {nome: cache_key('analises', store.version, cache=store.store_dir, analise=nome,
+                              params=p, filtros=filtros_norm)
+              for nome, p in pedidos.items()}
+
+    # O cálculo das que faltam roda fora de qualquer trava: sessões simultâneas
+    # pedindo a mesma análise no máximo a calculam em dobro
+    faltou = object()
+    resultados = {nome: RESULTADOS.get(chaves[nome], faltou) for nome in pedidos}
+    pendentes = {nome: p for nome, p in pedidos.items() if resultados[nome] is faltou}
+    if pendentes:
+        for nome, resultado in _executar(store, pendentes, filtros_norm).items():
+            RESULTADOS.put(chaves[nome], resultado)
+            resultados[nome] = resultado
+    return resultados
+
+
+def run_analysis(nome: str, csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                 filtros: Optional[Dict[str, Tuple[float, float]]] = None, **params) -> dict:
+    """Executa uma análise; ``params`` sobrescreve os parâmetros padrão dela."""
+    return run_analyses([nome], csv_path, filtros, {nome: params})[nome]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa as análises do notebook sobre o dataset processado.")
+    parser.add_argument('analises', nargs='*', metavar='ANALISE',
+                        help=f"Análises a executar (padrão: todas): {', '.join(ANALISES)}")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    parser.add_argument('--filtro', nargs=3, action='append', metavar=('COLUNA', 'MIN', 'MAX'),
+                        default=[], help="Filtro inclusivo de linhas (pode repetir)")
+    args = parser.parse_args()
+
+    filtros = {coluna: (float(minimo), float(maximo)) for coluna, minimo, maximo in args.filtro}
+    with pd.option_context('display.width', 120, 'display.max_columns', 20):
+        for nome, resultado in run_analyses(args.analises or None, args.csv, filtros).items():
+            print(f"\n=== {nome}: {ANALISES[nome].descricao} ===")
+            for campo, valor in resultado.items():
+                if isinstance(valor, (pd.DataFrame, pd.Series)):
+                    print(f"{campo}:\n{valor.to_string()}")
+                else:
+                    print(f"{campo}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
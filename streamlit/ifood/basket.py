@@ -0,0 +1,241 @@
+"""
+Coocorrência de produtos (cesta de compras) para análises de venda cruzada.
+
+Generaliza ``sql/advanced_queries/cesta_produtos.sql``: cada cliente "compra" um
+produto quando o gasto na categoria ``Mnt*`` passa do limiar configurado. As
+compras formam uma matriz de bits clientes x produtos, da qual saem as contagens
+de todos os pares (multiplicação de matrizes ``Xᵀ X``) e de todas as triplas
+(``AND`` bit a bit das linhas empacotadas com ``np.packbits`` + contagem de bits).
+A base é percorrida uma vez, em lotes, direto do cache colunar.
+
+Os limiares são arredondados para múltiplos de ``PASSO_LIMIAR``, para que cada
+clique no seletor não gere um conjunto novo. As contagens de cada conjunto de
+limiares são gravadas em ``<cache>/cesta/<versão>_<assinatura>.npz`` e
+reaproveitadas enquanto o dataset não mudar; os arquivos de versões anteriores
+são apagados e, na versão atual, ficam só os ``MAX_ARQUIVOS`` mais recentes. Em
+memória, as contagens vão para o cache limitado de ``ifood.result_cache``.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from ifood import data_layer
+from ifood.result_cache import RESULTADOS, cache_key
+
+PRODUTOS = ['MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds']
+
+# Limiares de gasto para considerar que o cliente compra a categoria; os três
+# primeiros são os da consulta SQL original
+LIMIARES_PADRAO: Dict[str, float] = {
+    'MntWines': 500,
+    'MntMeatProducts': 300,
+    'MntSweetProducts': 100,
+    'MntFruits': 50,
+    'MntFishProducts': 50,
+    'MntGoldProds': 50,
+}
+
+# Grade dos limiares e arquivos de contagens mantidos por versão do dataset
+PASSO_LIMIAR = 25
+MAX_ARQUIVOS = 32
+
+TAMANHO_LOTE = 1_000_000
+
+# Contagem de bits de cada byte, para NumPy sem ``np.bitwise_count`` (anterior à 2.0)
+_BITS_POR_BYTE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _contar_bits(bytes_: np.ndarray) -> int:
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(bytes_).sum(dtype=np.int64))
+    return int(_BITS_POR_BYTE[bytes_].sum(dtype=np.int64))
+
+
+class Coocorrencia(NamedTuple):
+    """
+    Contagens de coocorrência de uma base.
+
+    Atributos:
+      - produtos (list): Produtos na ordem das linhas/colunas de ``pares``.
+      - limiares (dict): Limiar usado para cada produto.
+      - clientes (int): Número de clientes da base.
+      - pares (np.ndarray): Matriz ``(p, p)``; a diagonal é o número de compradores
+        de cada produto e ``pares[i, j]`` o de compradores de ``i`` e ``j``.
+      - triplas (np.ndarray): Índices ``(k, 3)`` das triplas de produtos.
+      - contagens_triplas (np.ndarray): Compradores de cada tripla.
+    """
+    produtos: List[str]
+    limiares: Dict[str, float]
+    clientes: int
+    pares: np.ndarray
+    triplas: np.ndarray
+    contagens_triplas: np.ndarray
+
+
+def count_cooccurrence(store: data_layer.ColumnStore, limiares: Optional[Dict[str, float]] = None,
+                       produtos: Optional[List[str]] = None) -> Coocorrencia:
+    """
+    Conta compradores de cada produto, par e tripla em uma passada pela base.
+
+    Parâmetros:
+      - store (ColumnStore): Cache colunar do dataset.
+      - limiares (dict, opcional): Gasto mínimo (exclusivo) por produto; por padrão ``LIMIARES_PADRAO``.
+      - produtos (list, opcional): Produtos analisados; por padrão ``PRODUTOS``.
+
+    Retorna:
+      - Coocorrencia: Contagens acumuladas de todos os lotes.
+    """
+    produtos = list(produtos or PRODUTOS)
+    limiares = {p: float((limiares or LIMIARES_PADRAO)[p]) for p in produtos}
+    triplas = np.array(list(itertools.combinations(range(len(produtos)), 3)), dtype=np.int64).reshape(-1, 3)
+
+    pares = np.zeros((len(produtos), len(produtos)), dtype=np.int64)
+    contagens_triplas = np.zeros(len(triplas), dtype=np.int64)
+    for inicio in range(0, len(store), TAMANHO_LOTE):
+        fim = min(inicio + TAMANHO_LOTE, len(store))
+        compras = np.column_stack([store.column(p)[inicio:fim] > limiares[p] for p in produtos])
+
+        # Pares: Xᵀ X em float32 (exato até 2^24 linhas por lote)
+        x = compras.astype(np.float32)
+        pares += np.rint(x.T @ x).astype(np.int64)
+
+        # Triplas: AND das linhas de bits empacotadas de cada produto
+        bits = np.packbits(compras.T, axis=1)
+        for t, (i, j, k) in enumerate(triplas):
+            contagens_triplas[t] += _contar_bits(bits[i] & bits[j] & bits[k])
+
+    return Coocorrencia(produtos, limiares, len(store), pares, triplas, contagens_triplas)
+
+
+def product_label(produto: str) -> str:
+    """Nome curto do produto (ex.: ``MntMeatProducts`` -> ``Meat``)."""
+    return produto.replace('Mnt', '').replace('Products', '').replace('Prods', '')
+
+
+def pairs_table(co: Coocorrencia, min_clientes: int = 0) -> pd.DataFrame:
+    """
+    Métricas de cada par de produtos.
+
+    Retorna:
+      - pd.DataFrame: ``produto_a``, ``produto_b``, ``clientes``, ``suporte``,
+        ``confianca_a_b`` (P(b|a)), ``confianca_b_a``, ``lift`` e ``phi`` (correlação
+        entre as duas compras), ordenado por ``lift``.
+    """
+    n = co.clientes
+    individuais = np.diag(co.pares).astype(np.float64)
+    i, j = np.triu_indices(len(co.produtos), k=1)
+    ambos = co.pares[i, j].astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tabela = pd.DataFrame({
+            'produto_a': [product_label(co.produtos[a]) for a in i],
+            'produto_b': [product_label(co.produtos[b]) for b in j],
+            'clientes': ambos.astype(np.int64),
+            'suporte': ambos / max(n, 1),
+            'confianca_a_b': ambos / individuais[i],
+            'confianca_b_a': ambos / individuais[j],
+            'lift': n * ambos / (individuais[i] * individuais[j]),
+            'phi': (n * ambos - individuais[i] * individuais[j])
+                   / np.sqrt(individuais[i] * (n - individuais[i]) * individuais[j] * (n - individuais[j])),
+        })
+    tabela = tabela[tabela['clientes'] > min_clientes]
+    return tabela.sort_values('lift', ascending=False).reset_index(drop=True)
+
+
+def triples_table(co: Coocorrencia, min_clientes: int = 0) -> pd.DataFrame:
+    """
+    Métricas de cada tripla de produtos.
+
+    Retorna:
+      - pd.DataFrame: ``combinacao``, ``clientes``, ``suporte``, ``lift`` (em relação
+        à independência dos três produtos) e ``confianca`` (P(terceiro | par mais
+        frequente)), ordenado por ``lift``.
+    """
+    n = co.clientes
+    individuais = np.diag(co.pares).astype(np.float64)
+    t = co.triplas
+    todos = co.contagens_triplas.astype(np.float64)
+    melhor_par = np.max(np.column_stack([co.pares[t[:, 0], t[:, 1]], co.pares[t[:, 0], t[:, 2]],
+                                         co.pares[t[:, 1], t[:, 2]]]), axis=1).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tabela = pd.DataFrame({
+            'combinacao': [', '.join(product_label(co.produtos[p]) for p in linha) for linha in t],
+            'clientes': todos.astype(np.int64),
+            'suporte': todos / max(n, 1),
+            'lift': n * n * todos / (individuais[t[:, 0]] * individuais[t[:, 1]] * individuais[t[:, 2]]),
+            'confianca': todos / melhor_par,
+        })
+    tabela = tabela[tabela['clientes'] > min_clientes]
+    return tabela.sort_values('lift', ascending=False).reset_index(drop=True)
+
+
+def snap_thresholds(limiares: Dict[str, float]) -> Dict[str, float]:
+    """Arredonda cada limiar para o múltiplo de ``PASSO_LIMIAR`` mais próximo."""
+    return {p: float(max(round(v / PASSO_LIMIAR), 0) * PASSO_LIMIAR) for p, v in limiares.items()}
+
+
+def _assinatura(versao: str, produtos: List[str], limiares: Dict[str, float]) -> str:
+    conteudo = json.dumps({'versao': versao, 'produtos': produtos, 'limiares': limiares}, sort_keys=True)
+    return hashlib.sha256(conteudo.encode()).hexdigest()[:16]
+
+
+def _limpar_arquivos(diretorio: str, prefixo: str) -> None:
+    """Apaga as contagens de outras versões e as mais antigas além de ``MAX_ARQUIVOS``."""
+    atuais = []
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        try:
+            if not nome.startswith(prefixo):
+                os.remove(caminho)
+            elif nome.endswith('.npz') and '.tmp' not in nome:
+                atuais.append((os.path.getmtime(caminho), caminho))
+        except OSError:
+            continue
+    for _, caminho in sorted(atuais, reverse=True)[MAX_ARQUIVOS:]:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def load_cooccurrence(csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                      limiares: Optional[Dict[str, float]] = None,
+                      produtos: Optional[List[str]] = None) -> Coocorrencia:
+    """
+    Contagens de coocorrência da versão atual do dataset para os limiares pedidos
+    (arredondados por ``snap_thresholds``), lidas do cache de resultados, do
+    arquivo gravado ou recalculadas.
+    """
+    store = data_layer.open_store(csv_path)
+    produtos = list(produtos or PRODUTOS)
+    limiares = snap_thresholds({p: float((limiares or LIMIARES_PADRAO)[p]) for p in produtos})
+    chave = cache_key('cesta', store.version, cache=store.store_dir, produtos=produtos, limiares=limiares)
+    co = RESULTADOS.get(chave)
+    if co is not None:
+        return co
+
+    # A passada pela base roda fora de qualquer trava: sessões com outros limiares não esperam
+    diretorio = os.path.join(store.store_dir, 'cesta')
+    prefixo = f'{store.version[:16]}_'
+    caminho = os.path.join(diretorio, f'{prefixo}{_assinatura(store.version, produtos, limiares)}.npz')
+    try:
+        with np.load(caminho) as dados:
+            co = Coocorrencia(produtos, limiares, int(dados['clientes']), dados['pares'],
+                              dados['triplas'], dados['contagens_triplas'])
+    except (OSError, KeyError, ValueError):
+        co = count_cooccurrence(store, limiares, produtos)
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(temporario, clientes=co.clientes, pares=co.pares, triplas=co.triplas,
+                 contagens_triplas=co.contagens_triplas)
+        os.replace(temporario, caminho)
+        _limpar_arquivos(diretorio, prefixo)
+
+    RESULTADOS.put(chave, co)
+    return co
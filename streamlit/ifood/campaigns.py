@@ -0,0 +1,281 @@
+"""
+Eficácia das cinco campanhas por perfil demográfico (``sql/table_creation_scripts/eficacia.sql``).
+
+As consultas originais desempilham ``AcceptedCmp1`` a ``AcceptedCmp5`` com
+``UNION ALL``/``unnest`` (uma cópia da base por campanha). Aqui as cinco colunas
+viram um único código de 5 bits por cliente (bit ``k`` = aceitou a campanha
+``k + 1``) e uma só passada de ``np.bincount`` conta os clientes de cada
+estado civil x educação x faixa etária x padrão de aceitação, somando também
+``Z_Revenue`` por padrão e ``Z_CostContact`` por célula. As conversões, a receita
+e a sobreposição entre campanhas saem dessa matriz densa (poucos milhares de
+posições) multiplicada pela matriz de bits, sem voltar às linhas.
+
+A matriz da versão atual do dataset é gravada em ``<cache>/campanhas.npz``; a
+ingestão incremental soma as linhas inseridas e subtrai as substituídas.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.campaigns [--por campanha estado_civil]
+"""
+
+import argparse
+import os
+import threading
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ifood import data_layer
+from ifood.aggregates import ColumnGetter, frame_getter
+
+CAMPANHAS = {f'AcceptedCmp{k}': f'Campanha {k}' for k in range(1, 6)}
+ESTADOS_CIVIS = {
+    'marital_Married': 'Casado',
+    'marital_Together': 'União Estável',
+    'marital_Single': 'Solteiro',
+    'marital_Divorced': 'Divorciado',
+    'marital_Widow': 'Viúvo',
+}
+EDUCACOES = {
+    'education_Basic': 'Básico',
+    'education_2n Cycle': '2º Ciclo',
+    'education_Graduation': 'Graduação',
+    'education_Master': 'Mestrado',
+    'education_PhD': 'Doutorado',
+}
+# Clientes sem nenhuma coluna do grupo marcada
+OUTRO = 'Outro'
+LIMITES_IDADE = [30, 40, 50, 60]
+FAIXAS_IDADE = ['<30', '30-39', '40-49', '50-59', '60+']
+
+# Eixos da matriz, na ordem de ``summarize``
+DIMENSOES = {
+    'campanha': list(CAMPANHAS.values()),
+    'estado_civil': list(ESTADOS_CIVIS.values()) + [OUTRO],
+    'educacao': list(EDUCACOES.values()) + [OUTRO],
+    'faixa_idade': FAIXAS_IDADE,
+}
+
+N_PADROES = 2 ** len(CAMPANHAS)
+# BITS[p, k] = 1 se o padrão de aceitação ``p`` inclui a campanha ``k``
+BITS = ((np.arange(N_PADROES)[:, None] >> np.arange(len(CAMPANHAS))) & 1).astype(np.int64)
+
+TAMANHO_LOTE = 1_000_000
+
+
+class MatrizCampanhas(NamedTuple):
+    """Contagens e somas por estado civil x educação x faixa etária (x padrão de aceitação)."""
+    padroes: np.ndarray   # (estados civis, educações, faixas, N_PADROES): clientes
+    receita: np.ndarray   # mesma forma: soma de Z_Revenue
+    custo: np.ndarray     # (estados civis, educações, faixas): soma de Z_CostContact
+
+    def merge(self, outra: 'MatrizCampanhas', sign: int = 1) -> 'MatrizCampanhas':
+        return MatrizCampanhas(*(a + sign * b for a, b in zip(self, outra)))
+
+
+def _categoria(get: ColumnGetter, colunas: Sequence[str]) -> np.ndarray:
+    """Posição da coluna marcada de um grupo one-hot (``len(colunas)`` se nenhuma)."""
+    codigo = np.full(len(get(colunas[0])), len(colunas), dtype=np.int64)
+    for i, coluna in reversed(list(enumerate(colunas))):
+        codigo[get(coluna) == 1] = i
+    return codigo
+
+
+def acceptance_bits(get: ColumnGetter) -> np.ndarray:
+    """Código de 5 bits por cliente: bit ``k`` = aceitou a campanha ``k + 1``."""
+    bits = np.zeros(len(get('AcceptedCmp1')), dtype=np.int64)
+    for k, coluna in enumerate(CAMPANHAS):
+        bits |= (get(coluna).astype(np.int64) != 0) << k
+    return bits
+
+
+def compute_matrix(get: ColumnGetter) -> MatrizCampanhas:
+    """
+    Conta, numa única passada vetorizada, os clientes de cada estado civil x
+    educação x faixa etária x padrão de aceitação.
+
+    Parâmetros:
+      - get (callable): Leitor de colunas (``nome -> np.ndarray``), do cache colunar
+        ou de um DataFrame (ex.: um delta de ingestão).
+
+    Retorna:
+      - MatrizCampanhas: Matriz densa; ver ``summarize`` e ``overlap``.
+    """
+    forma = tuple(len(DIMENSOES[d]) for d in ('estado_civil', 'educacao', 'faixa_idade'))
+    celula = _categoria(get, list(ESTADOS_CIVIS))
+    celula = celula * forma[1] + _categoria(get, list(EDUCACOES))
+    celula = celula * forma[2] + np.searchsorted(LIMITES_IDADE, get('Age'), side='right')
+    chave = celula * N_PADROES + acceptance_bits(get)
+
+    n_celulas = int(np.prod(forma))
+    padroes = np.bincount(chave, minlength=n_celulas * N_PADROES)
+    receita = np.bincount(chave, weights=get('Z_Revenue'), minlength=n_celulas * N_PADROES)
+    custo = np.bincount(celula, weights=get('Z_CostContact'), minlength=n_celulas)
+    return MatrizCampanhas(padroes.reshape(forma + (N_PADROES,)).astype(np.int64),
+                           receita.reshape(forma + (N_PADROES,)), custo.reshape(forma))
+
+
+def build_matrix(store: data_layer.ColumnStore, tamanho_lote: int = TAMANHO_LOTE) -> MatrizCampanhas:
+    """``compute_matrix`` sobre o cache colunar, lote a lote (memória proporcional ao lote)."""
+    matriz = compute_matrix(lambda c: store.column(c)[:tamanho_lote])
+    for inicio in range(tamanho_lote, len(store), tamanho_lote):
+        fim = min(inicio + tamanho_lote, len(store))
+        matriz = matriz.merge(compute_matrix(lambda c: store.column(c)[inicio:fim]))
+    return matriz
+
+
+def _selecao(filtros: Optional[Dict[str, Sequence[str]]]) -> Dict[str, np.ndarray]:
+    """Índices selecionados em cada eixo (todos quando a dimensão não é filtrada)."""
+    filtros = filtros or {}
+    desconhecidas = set(filtros) - set(DIMENSOES)
+    if desconhecidas:
+        raise ValueError(f"Dimensões desconhecidas: {sorted(desconhecidas)}")
+    return {dim: np.array([i for i, rotulo in enumerate(rotulos) if dim not in filtros or rotulo in filtros[dim]],
+                          dtype=np.int64)
+            for dim, rotulos in DIMENSOES.items()}
+
+
+def summarize(matriz: MatrizCampanhas, por: Sequence[str] = ('campanha',),
+              filtros: Optional[Dict[str, Sequence[str]]] = None) -> pd.DataFrame:
+    """
+    Taxa de aceitação, custo por conversão e retorno agregados pelas dimensões ``por``.
+
+    Parâmetros:
+      - matriz (MatrizCampanhas): Matriz de ``load_matrix``.
+      - por (list): Dimensões mantidas no resultado (chaves de ``DIMENSOES``).
+      - filtros (dict, opcional): Dimensão -> rótulos incluídos, ex.:
+        ``{'estado_civil': ['Casado'], 'faixa_idade': ['30-39', '40-49']}``.
+
+    Retorna:
+      - pd.DataFrame: Uma linha por combinação das dimensões ``por``, com
+        ``clientes``, ``conversoes``, ``acceptance_rate`` (%), ``custo``,
+        ``cost_per_conversion``, ``receita`` e ``roi``.
+    """
+    eixos = list(DIMENSOES)
+    desconhecidas = [d for d in por if d not in DIMENSOES]
+    if desconhecidas:
+        raise ValueError(f"Dimensões desconhecidas: {desconhecidas}")
+    selecao = _selecao(filtros)
+    indices = np.ix_(*(selecao[d] for d in eixos[1:]))
+
+    # Conversões e receita por campanha: padrões x matriz de bits
+    conversoes = np.einsum('meap,pc->cmea', matriz.padroes[indices], BITS)[selecao['campanha']]
+    receita = np.einsum('meap,pc->cmea', matriz.receita[indices], BITS)[selecao['campanha']]
+    # Todos os clientes da célula são contatados em todas as campanhas
+    clientes = np.broadcast_to(matriz.padroes[indices].sum(axis=-1), conversoes.shape)
+    custo = np.broadcast_to(matriz.custo[indices], conversoes.shape)
+
+    somar = tuple(i for i, d in enumerate(eixos) if d not in por)
+    medidas = {nome: valores.sum(axis=somar) for nome, valores in
+               (('clientes', clientes), ('conversoes', conversoes), ('custo', custo), ('receita', receita))}
+
+    mantidas = [d for d in eixos if d in por]
+    grade = np.meshgrid(*(np.array(DIMENSOES[d])[selecao[d]] for d in mantidas), indexing='ij')
+    tabela = pd.DataFrame({d: g.ravel() for d, g in zip(mantidas, grade)})
+    for nome, valores in medidas.items():
+        tabela[nome] = np.ravel(valores)
+    tabela['clientes'] = tabela['clientes'].astype(np.int64)
+    tabela['conversoes'] = tabela['conversoes'].astype(np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tabela['acceptance_rate'] = 100 * tabela['conversoes'] / tabela['clientes']
+        tabela['cost_per_conversion'] = tabela['custo'] / tabela['conversoes'].replace(0, np.nan)
+        tabela['roi'] = (tabela['receita'] - tabela['custo']) / tabela['custo'].replace(0, np.nan)
+    return tabela[[d for d in por if d in mantidas] + [c for c in tabela.columns if c not in mantidas]]
+
+
+def overlap(matriz: MatrizCampanhas, filtros: Optional[Dict[str, Sequence[str]]] = None) -> pd.DataFrame:
+    """
+    Clientes que aceitaram cada par de campanhas (a diagonal é o total de cada uma),
+    calculado sobre os padrões de aceitação: ``BITSᵀ · diag(contagens) · BITS``.
+    """
+    selecao = _selecao(filtros)
+    contagens = matriz.padroes[np.ix_(selecao['estado_civil'], selecao['educacao'], selecao['faixa_idade'])]
+    contagens = contagens.reshape(-1, N_PADROES).sum(axis=0)
+    pares = BITS.T @ (contagens[:, None] * BITS)
+    rotulos = DIMENSOES['campanha']
+    return pd.DataFrame(pares, index=rotulos, columns=rotulos)
+
+
+def matrix_path(store_dir: str) -> str:
+    return os.path.join(store_dir, 'campanhas.npz')
+
+
+def _gravar(caminho: str, matriz: MatrizCampanhas, versao: str) -> None:
+    temporario = f"{caminho}.{os.getpid()}.tmp.npz"
+    np.savez(temporario, versao=np.array(versao), **matriz._asdict())
+    os.replace(temporario, caminho)
+
+
+def _ler(caminho: str) -> Tuple[MatrizCampanhas, str]:
+    with np.load(caminho) as dados:
+        return MatrizCampanhas(*(dados[campo] for campo in MatrizCampanhas._fields)), str(dados['versao'])
+
+
+# Matrizes em memória por diretório do cache: (versão, matriz)
+_MATRIZES: Dict[str, Tuple[str, MatrizCampanhas]] = {}
+_LOCK = threading.Lock()
+
+
+def load_matrix(csv_path: str = data_layer.CAMINHO_CSV_PADRAO) -> MatrizCampanhas:
+    """
+    Matriz de campanhas da versão atual do dataset: da memória do processo, do
+    arquivo gravado ou, se nenhum estiver atualizado, recalculada e gravada.
+    """
+    store = data_layer.open_store(csv_path)
+    with _LOCK:
+        em_memoria = _MATRIZES.get(store.store_dir)
+        if em_memoria is not None and em_memoria[0] == store.version:
+            return em_memoria[1]
+
+        caminho = matrix_path(store.store_dir)
+        matriz = None
+        if os.path.exists(caminho):
+            matriz, versao = _ler(caminho)
+            if versao != store.version:
+                matriz = None
+        if matriz is None:
+            matriz = build_matrix(store)
+            _gravar(caminho, matriz, store.version)
+
+        _MATRIZES[store.store_dir] = (store.version, matriz)
+        return matriz
+
+
+def update_matrix(store_dir: str, versao_anterior: str, versao_nova: str,
+                  inseridos: pd.DataFrame, removidos: pd.DataFrame) -> Optional[bool]:
+    """
+    Atualiza no lugar a matriz gravada após uma ingestão incremental, como
+    ``aggregates.update_cubes``: soma as linhas inseridas e subtrai os valores
+    antigos das substituídas.
+
+    Retorna:
+      - bool ou None: ``True`` se atualizada, ``False`` se descartada (gravada para
+        outra versão), ``None`` se não havia matriz gravada.
+    """
+    caminho = matrix_path(store_dir)
+    if not os.path.exists(caminho):
+        return None
+    matriz, versao = _ler(caminho)
+    if versao != versao_anterior:
+        os.remove(caminho)
+        return False
+    for linhas, sinal in ((inseridos, 1), (removidos, -1)):
+        if len(linhas):
+            matriz = matriz.merge(compute_matrix(frame_getter(linhas)), sign=sinal)
+    _gravar(caminho, matriz, versao_nova)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eficácia das campanhas por perfil demográfico.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    parser.add_argument('--por', nargs='+', choices=list(DIMENSOES), default=['campanha'],
+                        help="Dimensões do resultado")
+    args = parser.parse_args()
+
+    tabela = summarize(load_matrix(args.csv), args.por)
+    print(tabela.round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,524 @@
+"""
+Funções de tratamento de dados do notebook ``notebooks/data_cleaning.ipynb``,
+empacotadas para uso fora do Jupyter (ingestão incremental, scripts e dashboards).
+
+Além das funções do notebook, que trabalham com o DataFrame inteiro em memória,
+o módulo oferece um modo em blocos (``processar_em_blocos``) para arquivos maiores
+que a RAM: o arquivo bruto é lido em blocos de tamanho fixo, as estatísticas de
+verificação são acumuladas de forma combinável (``EstatisticasParciais``) e a saída
+tipada é gravada bloco a bloco.
+
+Uso do modo em blocos (a partir do diretório ``streamlit/``):
+    python -m ifood.cleaning ../data/raw/ifood_df.csv ../data/processed/ifood_df_atualizado.csv
+"""
+
+import argparse
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Tipos aplicados pelo notebook de tratamento antes de salvar o CSV processado
+COLUNAS_TIPOS = {
+    'Kidhome': 'int8',
+    'Teenhome': 'int8',
+    'Recency': 'int8',
+    'NumDealsPurchases': 'int8',
+    'NumWebPurchases': 'int8',
+    'NumCatalogPurchases': 'int8',
+    'NumStorePurchases': 'int8',
+    'NumWebVisitsMonth': 'int8',
+    'AcceptedCmp3': 'int8',
+    'AcceptedCmp4': 'int8',
+    'AcceptedCmp5': 'int8',
+    'AcceptedCmp1': 'int8',
+    'AcceptedCmp2': 'int8',
+    'Complain': 'int8',
+    'Response': 'int8',
+    'marital_Divorced': 'int8',
+    'marital_Married': 'int8',
+    'marital_Single': 'int8',
+    'marital_Together': 'int8',
+    'marital_Widow': 'int8',
+    'education_2n Cycle': 'int8',
+    'education_Basic': 'int8',
+    'education_Graduation': 'int8',
+    'education_Master': 'int8',
+    'education_PhD': 'int8',
+    'Z_CostContact': 'int8',
+    'Z_Revenue': 'int8',
+    'AcceptedCmpOverall': 'int8',
+    'Customer_Days': 'int32',
+    'Age': 'int16',
+}
+
+# Colunas que devem conter apenas valores numéricos
+COLUNAS_A_VERIFICAR = [
+    'Income', 'Kidhome', 'Teenhome',
+    'Recency', 'MntWines', 'MntFruits',
+    'MntMeatProducts', 'MntFishProducts',
+    'MntSweetProducts', 'MntGoldProds', 'NumDealsPurchases',
+    'NumWebPurchases', 'NumCatalogPurchases', 'NumStorePurchases',
+    'NumWebVisitsMonth', 'AcceptedCmp3', 'AcceptedCmp4',
+    'AcceptedCmp5', 'AcceptedCmp1', 'AcceptedCmp2',
+    'Complain', 'Z_CostContact', 'Z_Revenue',
+    'Response', 'Age', 'Customer_Days', 'marital_Divorced',
+    'marital_Married', 'marital_Single', 'marital_Together',
+    'marital_Widow', 'education_2n Cycle', 'education_Basic',
+    'education_Graduation', 'education_Master', 'education_PhD',
+    'MntTotal', 'MntRegularProds', 'AcceptedCmpOverall'
+]
+
+
+def carregar_dados(caminho_arquivo, coluna_data=None):
+    """
+    Carrega um arquivo CSV com dados.
+
+    Parâmetros:
+    - caminho_arquivo (str): Caminho do arquivo CSV.
+    - coluna_data (str, opcional): Nome da coluna de datas para converter para datetime.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com os dados carregados.
+    """
+    # Carrega o CSV
+    dados = pd.read_csv(caminho_arquivo)
+
+    # Converte a coluna de datas para datetime com timezone, se especificada
+    if coluna_data:
+        dados[coluna_data] = pd.to_datetime(dados[coluna_data], utc=True)
+
+    return dados
+
+
+def verificar_tamanho_base(df):
+    """
+    Verifica o tamanho da base de dados em termos de número de linhas e colunas.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado.
+
+    Retorna:
+    - dict: Dicionário com o número de linhas e colunas.
+    """
+    tamanho = {
+        'Número de Linhas': df.shape[0],
+        'Número de Colunas': df.shape[1]
+    }
+
+    return tamanho
+
+
+def verificar_valores_ausentes(df):
+    """
+    Verifica a quantidade e o percentual de valores ausentes em cada coluna de um DataFrame.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com a quantidade e o percentual de valores ausentes por coluna.
+    """
+    # Calcular a quantidade de valores ausentes
+    valores_ausentes = df.isnull().sum()
+
+    # Calcular o percentual de valores ausentes
+    percentual_ausentes = (valores_ausentes / df.shape[0]) * 100
+
+    # Criar um DataFrame com os resultados
+    tabela_ausentes = pd.DataFrame({
+        'Quantidade de Valores Ausentes': valores_ausentes,
+        'Percentual de Valores Ausentes (%)': percentual_ausentes
+    })
+
+    # Ordenar o DataFrame pelo percentual de valores ausentes em ordem decrescente
+    tabela_ausentes = tabela_ausentes[tabela_ausentes['Quantidade de Valores Ausentes'] > 0]
+    tabela_ausentes = tabela_ausentes.sort_values(by='Percentual de Valores Ausentes (%)', ascending=False)
+
+    return tabela_ausentes
+
+
+def detectar_valores_duplicados(df):
+    """
+    Detecta e exibe valores duplicados de um DataFrame.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com informações sobre os valores duplicados
+    """
+    # Verifica duplicatas
+    duplicatas = df[df.duplicated(keep=False)]
+
+    if duplicatas.empty:
+        print("✅ Nenhum valor duplicado foi encontrado.")
+        return pd.DataFrame()
+    else:
+        print(f"⚠️ Foram encontradas {duplicatas.shape[0]} linhas duplicadas.")
+
+        # Contar duplicatas por coluna
+        duplicatas_contagem = duplicatas.apply(lambda x: x.duplicated(keep=False)).sum()
+
+        # Criar DataFrame com informações sobre duplicatas
+        tabela_duplicatas = pd.DataFrame({
+            'Coluna': duplicatas_contagem.index,
+            'Quantidade de Duplicatas': duplicatas_contagem.values
+        })
+
+        # Filtrar apenas colunas com duplicatas
+        tabela_duplicatas = tabela_duplicatas[tabela_duplicatas['Quantidade de Duplicatas'] > 0]
+
+        return tabela_duplicatas
+
+
+def verificar_tipo_dados(df):
+    """
+    Verifica o tipo dos dados/colunas de um DataFrame.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com os nomes das colunas e seus respectivos tipos de dados.
+    """
+    # Obter os tipos de dados das colunas
+    tipos_dados = df.dtypes
+
+    # Criar um DataFrame com os resultados
+    tabela_tipos = pd.DataFrame({
+        'Coluna': tipos_dados.index,
+        'Tipo de Dado': tipos_dados.values
+    })
+
+    return tabela_tipos
+
+
+def valores_max_min(df):
+    """
+    Percorre todas as colunas numéricas (int ou float) de um DataFrame e retorna uma tabela com os valores máximos e mínimos de cada coluna.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser analisado.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com os valores máximos e mínimos de cada coluna numérica.
+    """
+    # Selecionar apenas colunas numéricas
+    colunas_numericas = df.select_dtypes(include=['int64', 'float64']).columns
+
+    # Criar listas para armazenar os resultados
+    colunas = []
+    valores_min = []
+    valores_max = []
+
+    # Percorrer cada coluna numérica e calcular os valores máximo e mínimo
+    for coluna in colunas_numericas:
+        colunas.append(coluna)
+        valores_min.append(df[coluna].min())
+        valores_max.append(df[coluna].max())
+
+    # Criar o DataFrame final com todos os resultados de uma vez
+    tabela_max_min = pd.DataFrame({
+        'Coluna': colunas,
+        'Valor Mínimo': valores_min,
+        'Valor Máximo': valores_max
+    })
+
+    return tabela_max_min
+
+
+def modificar_tipo_colunas(df, colunas_tipos, verbose=True):
+    """
+    Modifica o tipo de dado de colunas específicas em um DataFrame.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame original.
+    - colunas_tipos (dict): Dicionário onde as chaves são os nomes das colunas e os valores são os tipos de dados desejados.
+    - verbose (bool): Exibe uma mensagem para cada coluna convertida.
+
+    Retorna:
+    - pandas.DataFrame: DataFrame com os tipos de dados modificados.
+    """
+    # Verifica se as colunas informadas existem no DataFrame
+    colunas_invalidas = [col for col in colunas_tipos.keys() if col not in df.columns]
+    if colunas_invalidas:
+        raise ValueError(f"Colunas inválidas: {colunas_invalidas}")
+
+    # Modifica o tipo de dado das colunas especificadas
+    for coluna, tipo in colunas_tipos.items():
+        try:
+            df[coluna] = df[coluna].astype(tipo)
+            if verbose:
+                print(f"✅ Coluna '{coluna}' convertida para '{tipo}' com sucesso.")
+        except Exception as e:
+            print(f"⚠️ Erro ao converter a coluna '{coluna}' para '{tipo}': {e}")
+
+    return df
+
+
+def verificar_colunas_numericas(df, colunas):
+    """
+    Verifica se as colunas especificadas contêm apenas valores numéricos.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser verificado.
+    - colunas (list): Lista de nomes das colunas a serem verificadas.
+
+    Retorna:
+    - dict: Dicionário com o nome da coluna e um booleano indicando se contém apenas números.
+    - pandas.DataFrame: DataFrame com as inconsistências encontradas.
+    """
+    resultado = {}
+    inconsistencias = []
+
+    for coluna in colunas:
+        if coluna in df.columns:
+            # Verifica se todos os valores na coluna são numéricos
+            col_numerica = pd.to_numeric(df[coluna], errors='coerce')
+            resultado[coluna] = col_numerica.notnull().all()
+            if not resultado[coluna]:
+                # Adiciona as inconsistências à lista
+                posicoes_inconsistentes = col_numerica[col_numerica.isnull()].index.tolist()
+                for posicao in posicoes_inconsistentes:
+                    inconsistencias.append({'Coluna': coluna, 'Posição': posicao, 'Valor': df.at[posicao, coluna]})
+        else:
+            resultado[coluna] = False
+            print(f"⚠️ Coluna '{coluna}' não encontrada no DataFrame.")
+
+    # Cria um DataFrame com as inconsistências
+    df_inconsistencias = pd.DataFrame(inconsistencias)
+
+    return resultado, df_inconsistencias
+
+
+def salvar_dados(df, caminho_arquivo_saida):
+    """
+    Salva o DataFrame em um arquivo CSV.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame a ser salvo.
+    - caminho_arquivo_saida (str): Caminho do arquivo CSV de saída.
+    """
+    df.to_csv(caminho_arquivo_saida, index=False)
+    print(f"✅ Dados salvos com sucesso em '{caminho_arquivo_saida}'")
+
+
+class EstatisticasParciais:
+    """
+    Estatísticas de verificação acumuladas bloco a bloco.
+
+    Os contadores (nulos, valores não numéricos, mínimos e máximos) ocupam memória
+    proporcional ao número de colunas. A detecção de duplicatas guarda apenas um
+    hash de 64 bits por linha distinta (8 bytes/linha), nunca as linhas em si.
+    Duas instâncias podem ser combinadas com ``combinar``.
+
+    Os hashes ficam em séries ordenadas e disjuntas: cada bloco acrescenta uma
+    série com seus hashes inéditos, e duas séries são fundidas quando a anterior
+    não é maior que a nova. Restam O(log n) séries, e cada hash é regravado
+    O(log n) vezes ao longo do arquivo, em vez de reordenar todos os hashes já
+    vistos a cada bloco.
+    """
+
+    def __init__(self):
+        self.linhas = 0
+        self.nulos: Dict[str, int] = {}
+        self.nao_numericos: Dict[str, int] = {}
+        self.minimos: Dict[str, float] = {}
+        self.maximos: Dict[str, float] = {}
+        self.duplicadas = 0
+        self._series: List[np.ndarray] = []
+
+    @property
+    def hashes(self) -> np.ndarray:
+        """Hashes ordenados de todas as linhas distintas vistas (funde as séries)."""
+        if len(self._series) != 1:
+            self._series = [np.sort(np.concatenate(self._series), kind='stable') if self._series
+                            else np.empty(0, dtype=np.uint64)]
+        return self._series[0]
+
+    def _contem(self, hashes: np.ndarray) -> np.ndarray:
+        """Máscara dos ``hashes`` já vistos (busca binária em cada série)."""
+        vistos = np.zeros(len(hashes), dtype=bool)
+        for serie in self._series:
+            if len(serie):
+                posicoes = np.minimum(np.searchsorted(serie, hashes), len(serie) - 1)
+                vistos |= serie[posicoes] == hashes
+        return vistos
+
+    def _acrescentar(self, novos: np.ndarray) -> None:
+        """Acrescenta uma série ordenada de hashes inéditos, fundindo as séries menores."""
+        if not len(novos):
+            return
+        self._series.append(novos)
+        while len(self._series) > 1 and len(self._series[-2]) <= len(self._series[-1]):
+            ultima = self._series.pop()
+            # Séries ordenadas concatenadas: o sort estável (timsort) só as intercala
+            self._series[-1] = np.sort(np.concatenate([self._series[-1], ultima]), kind='stable')
+
+    @staticmethod
+    def _hash_linhas(bloco: pd.DataFrame) -> np.ndarray:
+        # Colunas numéricas são normalizadas para float64: o mesmo valor pode ser
+        # inferido como int64 em um bloco e float64 em outro (quando há nulos).
+        numericas = bloco.select_dtypes('number').columns
+        normalizado = bloco.astype({c: 'float64' for c in numericas})
+        return pd.util.hash_pandas_object(normalizado, index=False).to_numpy()
+
+    def atualizar(self, bloco: pd.DataFrame, colunas_numericas: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Acumula as estatísticas de um bloco.
+
+        Parâmetros:
+        - bloco (pandas.DataFrame): Bloco lido do arquivo bruto.
+        - colunas_numericas (list, opcional): Colunas que devem conter apenas números.
+
+        Retorna:
+        - numpy.ndarray: Máscara das linhas do bloco que repetem uma linha já vista.
+        """
+        self.linhas += len(bloco)
+
+        for coluna, quantidade in bloco.isnull().sum().items():
+            self.nulos[coluna] = self.nulos.get(coluna, 0) + int(quantidade)
+
+        numericas = bloco.select_dtypes('number')
+        for coluna, valor in numericas.min().items():
+            if not pd.isna(valor):
+                self.minimos[coluna] = min(self.minimos.get(coluna, valor), valor)
+        for coluna, valor in numericas.max().items():
+            if not pd.isna(valor):
+                self.maximos[coluna] = max(self.maximos.get(coluna, valor), valor)
+
+        for coluna in colunas_numericas or []:
+            if coluna in bloco.columns:
+                convertida = pd.to_numeric(bloco[coluna], errors='coerce')
+                invalidos = int((convertida.isnull() & bloco[coluna].notnull()).sum())
+                self.nao_numericos[coluna] = self.nao_numericos.get(coluna, 0) + invalidos
+
+        hashes = self._hash_linhas(bloco)
+        unicos, primeiras = np.unique(hashes, return_index=True)
+        repetidas = np.ones(len(hashes), dtype=bool)
+        repetidas[primeiras] = False
+        repetidas |= self._contem(hashes)
+        self.duplicadas += int(repetidas.sum())
+        self._acrescentar(unicos[~self._contem(unicos)])
+        return repetidas
+
+    def combinar(self, outra: 'EstatisticasParciais') -> 'EstatisticasParciais':
+        """Combina as estatísticas de dois conjuntos de blocos disjuntos."""
+        total = EstatisticasParciais()
+        total.linhas = self.linhas + outra.linhas
+        for destino, a, b in ((total.nulos, self.nulos, outra.nulos),
+                              (total.nao_numericos, self.nao_numericos, outra.nao_numericos)):
+            for coluna in a.keys() | b.keys():
+                destino[coluna] = a.get(coluna, 0) + b.get(coluna, 0)
+        for coluna in self.minimos.keys() | outra.minimos.keys():
+            total.minimos[coluna] = min(v for v in (self.minimos.get(coluna), outra.minimos.get(coluna)) if v is not None)
+        for coluna in self.maximos.keys() | outra.maximos.keys():
+            total.maximos[coluna] = max(v for v in (self.maximos.get(coluna), outra.maximos.get(coluna)) if v is not None)
+        comuns = len(np.intersect1d(self.hashes, outra.hashes, assume_unique=True))
+        total.duplicadas = self.duplicadas + outra.duplicadas + comuns
+        total._series = [np.union1d(self.hashes, outra.hashes)]
+        return total
+
+    def tabela_ausentes(self) -> pd.DataFrame:
+        """Mesma tabela de ``verificar_valores_ausentes``, sobre todos os blocos."""
+        valores_ausentes = pd.Series(self.nulos, dtype='int64')
+        tabela_ausentes = pd.DataFrame({
+            'Quantidade de Valores Ausentes': valores_ausentes,
+            'Percentual de Valores Ausentes (%)': valores_ausentes / max(self.linhas, 1) * 100
+        })
+        tabela_ausentes = tabela_ausentes[tabela_ausentes['Quantidade de Valores Ausentes'] > 0]
+        return tabela_ausentes.sort_values(by='Percentual de Valores Ausentes (%)', ascending=False)
+
+    def tabela_max_min(self) -> pd.DataFrame:
+        """Mesma tabela de ``valores_max_min``, sobre todos os blocos."""
+        colunas = list(self.minimos)
+        return pd.DataFrame({
+            'Coluna': colunas,
+            'Valor Mínimo': [self.minimos[c] for c in colunas],
+            'Valor Máximo': [self.maximos[c] for c in colunas]
+        })
+
+    def tabela_nao_numericos(self) -> pd.DataFrame:
+        """Quantidade de valores não numéricos por coluna verificada."""
+        return pd.DataFrame({
+            'Coluna': list(self.nao_numericos),
+            'Valores Não Numéricos': list(self.nao_numericos.values())
+        })
+
+
+def processar_em_blocos(caminho_entrada, caminho_saida, colunas_tipos=None,
+                        tamanho_bloco=100_000, remover_duplicatas=False,
+                        colunas_numericas=None):
+    """
+    Executa o tratamento do notebook em blocos de tamanho fixo, para arquivos
+    maiores que a memória disponível.
+
+    Cada bloco é verificado (nulos, valores não numéricos, mínimo/máximo e
+    duplicatas por hash), convertido para os tipos de ``colunas_tipos`` e anexado
+    ao arquivo de saída. Se alguma coluna de um bloco não puder ser convertida, o
+    processamento é interrompido com ``ValueError`` (sem gravar a saída), para
+    que o arquivo tratado não misture tipos entre blocos. O pico de memória depende de ``tamanho_bloco``, não do
+    tamanho do arquivo (exceto pelos 8 bytes por linha distinta usados na
+    detecção de duplicatas).
+
+    Parâmetros:
+    - caminho_entrada (str): Caminho do CSV bruto.
+    - caminho_saida (str): Caminho do CSV tratado.
+    - colunas_tipos (dict, opcional): Tipos de destino; por padrão ``COLUNAS_TIPOS``.
+    - tamanho_bloco (int): Número de linhas por bloco.
+    - remover_duplicatas (bool): Descarta as linhas que repetem uma linha já vista.
+    - colunas_numericas (list, opcional): Colunas verificadas como numéricas; por padrão ``COLUNAS_A_VERIFICAR``.
+
+    Retorna:
+    - EstatisticasParciais: Estatísticas acumuladas de todos os blocos.
+    """
+    colunas_tipos = COLUNAS_TIPOS if colunas_tipos is None else colunas_tipos
+    colunas_numericas = COLUNAS_A_VERIFICAR if colunas_numericas is None else colunas_numericas
+    estatisticas = EstatisticasParciais()
+
+    temporario = f"{caminho_saida}.{os.getpid()}.tmp"
+    try:
+        for i, bloco in enumerate(pd.read_csv(caminho_entrada, chunksize=tamanho_bloco)):
+            repetidas = estatisticas.atualizar(bloco, colunas_numericas)
+            if remover_duplicatas:
+                bloco = bloco[~repetidas]
+
+            tipos_bloco = {c: t for c, t in colunas_tipos.items() if c in bloco.columns}
+            bloco = modificar_tipo_colunas(bloco.copy(), tipos_bloco, verbose=False)
+            nao_convertidas = [c for c, t in tipos_bloco.items()
+                               if bloco[c].dtype != pd.api.types.pandas_dtype(t)]
+            if nao_convertidas:
+                raise ValueError(f"Bloco {i} (linhas a partir de {i * tamanho_bloco}): "
+                                 f"não foi possível converter as colunas {nao_convertidas}")
+            bloco.to_csv(temporario, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        os.replace(temporario, caminho_saida)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    return estatisticas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tratamento do dataset bruto em blocos de tamanho fixo.")
+    parser.add_argument('entrada', help="CSV bruto")
+    parser.add_argument('saida', help="CSV tratado")
+    parser.add_argument('--tamanho-bloco', type=int, default=100_000, help="Linhas por bloco")
+    parser.add_argument('--remover-duplicatas', action='store_true', help="Descarta linhas repetidas")
+    args = parser.parse_args()
+
+    estatisticas = processar_em_blocos(args.entrada, args.saida, tamanho_bloco=args.tamanho_bloco,
+                                       remover_duplicatas=args.remover_duplicatas)
+    print(f"Linhas processadas: {estatisticas.linhas}")
+    print(f"Linhas duplicadas: {estatisticas.duplicadas}")
+    print("\nValores ausentes:")
+    print(estatisticas.tabela_ausentes())
+    print("\nValores máximos/mínimos:")
+    print(estatisticas.tabela_max_min())
+    print(f"\n✅ Dados salvos com sucesso em '{args.saida}'")
+
+
+if __name__ == "__main__":
+    main()
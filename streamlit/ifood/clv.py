@@ -0,0 +1,285 @@
+"""
+Valor vitalício do cliente (CLV) e prioridade de retenção.
+
+Versão em Python de ``sql/table_creation_scripts/customer_lifetime.sql``. Para os
+clientes com mais de um ano de casa (``Customer_Days > 365``):
+
+  - ``annual_spending = MntTotal / anos``;
+  - ``predicted_clv = MntTotal * 0.35 / (1 - 0.85 ** anos)`` (margem de 35% e
+    desconto de 15% ao ano);
+  - ``retention_priority``: para quem reclamou, ``RANK() OVER (ORDER BY
+    Customer_Days DESC)`` entre todos os clientes elegíveis.
+
+A base é dividida em intervalos de linhas processados em paralelo por um pool de
+processos; cada processo mapeia o cache colunar e grava sua fatia direto nos
+arquivos de saída. O posto de cada cliente vem do histograma de
+``Customer_Days`` dos elegíveis (somado entre os processos), sem ordenar a base,
+e os rankings exibidos usam seleção parcial (``np.argpartition``) dos k primeiros.
+
+Os resultados ficam no próprio cache colunar, em ``<cache>/clv/*.npy``, junto com a
+versão do dataset, e são abertos com ``np.memmap``.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.clv [--processos 8] [--top 20]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ifood import data_layer
+
+MARGEM = 0.35
+FATOR_DESCONTO = 0.85
+DIAS_ANO = 365.25
+DIAS_MINIMOS = 365
+
+TAMANHO_LOTE = 1_000_000
+# Abaixo disto não compensa abrir processos
+MIN_LINHAS_PARALELO = 1_000_000
+
+COLUNAS_DETALHE = ['MntTotal', 'Customer_Days', 'Income', 'Complain']
+
+
+class Clv(NamedTuple):
+    """Colunas de CLV (uma posição por cliente; ``NaN``/0 fora dos elegíveis)."""
+    annual_spending: np.ndarray
+    predicted_clv: np.ndarray
+    retention_priority: np.ndarray   # 0 = sem prioridade (não reclamou ou não é elegível)
+
+
+ARQUIVOS = {
+    'annual_spending': np.float32,
+    'predicted_clv': np.float32,
+    'retention_priority': np.int64,
+}
+
+
+def _valores_intervalo(store_dir: str, saida: str, inicio: int, fim: int) -> np.ndarray:
+    """
+    Calcula gasto anual e CLV das linhas ``[inicio, fim)`` gravando-os em ``saida``.
+    Executada também nos processos auxiliares: cada um mapeia o cache por conta própria.
+
+    Retorna:
+      - np.ndarray: Histograma de ``Customer_Days - DIAS_MINIMOS - 1`` dos elegíveis.
+    """
+    store = data_layer.ColumnStore(store_dir)
+    anual = np.load(os.path.join(saida, 'annual_spending.npy'), mmap_mode='r+')
+    clv = np.load(os.path.join(saida, 'predicted_clv.npy'), mmap_mode='r+')
+    histograma = np.zeros(0, dtype=np.int64)
+    for a in range(inicio, fim, TAMANHO_LOTE):
+        b = min(a + TAMANHO_LOTE, fim)
+        dias = store.column('Customer_Days')[a:b]
+        gasto = store.column('MntTotal')[a:b].astype(np.float64)
+        elegivel = dias > DIAS_MINIMOS
+        anos = dias / DIAS_ANO
+        with np.errstate(divide='ignore', invalid='ignore'):
+            anual[a:b] = np.where(elegivel, gasto / anos, np.nan)
+            clv[a:b] = np.where(elegivel, gasto * MARGEM / (1 - FATOR_DESCONTO ** anos), np.nan)
+        histograma = _somar(histograma, np.bincount(dias[elegivel] - DIAS_MINIMOS - 1))
+    anual.flush()
+    clv.flush()
+    return histograma
+
+
+def _prioridade_intervalo(store_dir: str, saida: str, inicio: int, fim: int, maiores: np.ndarray) -> None:
+    """Grava o posto de retenção dos reclamantes elegíveis das linhas ``[inicio, fim)``."""
+    store = data_layer.ColumnStore(store_dir)
+    prioridade = np.load(os.path.join(saida, 'retention_priority.npy'), mmap_mode='r+')
+    for a in range(inicio, fim, TAMANHO_LOTE):
+        b = min(a + TAMANHO_LOTE, fim)
+        dias = store.column('Customer_Days')[a:b]
+        selecionados = (store.column('Complain')[a:b] == 1) & (dias > DIAS_MINIMOS)
+        posto = np.zeros(b - a, dtype=np.int64)
+        posto[selecionados] = 1 + maiores[dias[selecionados] - DIAS_MINIMOS - 1]
+        prioridade[a:b] = posto
+    prioridade.flush()
+
+
+def _somar(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if len(b) > len(a):
+        a, b = b, a
+    a = a.astype(np.int64, copy=True)
+    a[:len(b)] += b
+    return a
+
+
+def compute_clv(store: data_layer.ColumnStore, saida: str, processos: Optional[int] = None) -> int:
+    """
+    Calcula as colunas de CLV da base inteira em ``saida``.
+
+    Parâmetros:
+      - store (ColumnStore): Cache colunar do dataset.
+      - saida (str): Diretório onde os ``.npy`` de ``ARQUIVOS`` são criados.
+      - processos (int, opcional): Processos do pool; por padrão um por núcleo.
+
+    Retorna:
+      - int: Número de clientes elegíveis.
+    """
+    n = len(store)
+    os.makedirs(saida, exist_ok=True)
+    for nome, dtype in ARQUIVOS.items():
+        caminho = os.path.join(saida, f'{nome}.npy')
+        if n == 0:
+            np.save(caminho, np.zeros(0, dtype=dtype))
+        else:
+            np.lib.format.open_memmap(caminho, mode='w+', dtype=dtype, shape=(n,)).flush()
+    if n == 0:
+        return 0
+
+    processos = processos or os.cpu_count() or 1
+    if n < MIN_LINHAS_PARALELO:
+        processos = 1
+    limites = np.linspace(0, n, processos + 1).astype(int)
+    argumentos = [[store.store_dir] * processos, [saida] * processos, limites[:-1], limites[1:]]
+
+    def contar_maiores(histogramas) -> Tuple[np.ndarray, int]:
+        histograma = np.zeros(0, dtype=np.int64)
+        for parcial in histogramas:
+            histograma = _somar(histograma, parcial)
+        # maiores[k]: elegíveis com mais dias que DIAS_MINIMOS + 1 + k
+        return int(histograma.sum()) - np.cumsum(histograma), int(histograma.sum())
+
+    if processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            maiores, elegiveis = contar_maiores(executor.map(_valores_intervalo, *argumentos))
+            list(executor.map(_prioridade_intervalo, *argumentos, [maiores] * processos))
+    else:
+        maiores, elegiveis = contar_maiores([_valores_intervalo(store.store_dir, saida, 0, n)])
+        _prioridade_intervalo(store.store_dir, saida, 0, n, maiores)
+    return elegiveis
+
+
+def clv_dir(store_dir: str) -> str:
+    """Diretório das colunas de CLV de um cache colunar."""
+    return os.path.join(store_dir, 'clv')
+
+
+def _ler_meta(diretorio: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _abrir(diretorio: str) -> Clv:
+    return Clv(*(np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r') for nome in ARQUIVOS))
+
+
+def refresh_clv(store: data_layer.ColumnStore, processos: Optional[int] = None) -> str:
+    """
+    Recalcula as colunas de CLV da versão atual e as publica em ``clv_dir``
+    (troca atômica do diretório). Retorna o diretório publicado.
+    """
+    destino = clv_dir(store.store_dir)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    elegiveis = compute_clv(store, temporario, processos)
+    with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'versao': store.version, 'linhas': len(store), 'elegiveis': elegiveis,
+                   'margem': MARGEM, 'fator_desconto': FATOR_DESCONTO, 'dias_minimos': DIAS_MINIMOS}, f)
+
+    antigo = f"{destino}.{os.getpid()}.old"
+    if os.path.isdir(destino):
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return destino
+
+
+# Colunas abertas por diretório do cache: (versão, Clv), compartilhadas pelas sessões
+_CLVS: Dict[str, Tuple[str, Clv]] = {}
+_LOCK = threading.Lock()
+
+
+def load_clv(csv_path: str = data_layer.CAMINHO_CSV_PADRAO, processos: Optional[int] = None) -> Clv:
+    """
+    Colunas de CLV da versão atual do dataset, abertas da memória do processo, do
+    diretório gravado ou recalculadas.
+    """
+    store = data_layer.open_store(csv_path)
+    with _LOCK:
+        em_memoria = _CLVS.get(store.store_dir)
+        if em_memoria is not None and em_memoria[0] == store.version:
+            return em_memoria[1]
+
+        meta = _ler_meta(clv_dir(store.store_dir))
+        if meta is None or meta.get('versao') != store.version:
+            refresh_clv(store, processos)
+        clv = _abrir(clv_dir(store.store_dir))
+        _CLVS[store.store_dir] = (store.version, clv)
+        return clv
+
+
+def top_k(valores: np.ndarray, k: int, candidatos: np.ndarray, maiores: bool = True) -> np.ndarray:
+    """
+    Índices dos ``k`` maiores (ou menores) ``valores`` entre os ``candidatos``, em
+    ordem, com seleção parcial em O(n) e ordenação só dos ``k`` escolhidos.
+    """
+    k = min(k, len(candidatos))
+    if k == 0:
+        return candidatos[:0]
+    chave = -valores[candidatos].astype(np.float64) if maiores else valores[candidatos].astype(np.float64)
+    if k < len(candidatos):
+        escolhidos = np.argpartition(chave, k - 1)[:k]
+    else:
+        escolhidos = np.arange(len(candidatos))
+    # Empates desempatados pela posição do cliente
+    escolhidos = escolhidos[np.lexsort((candidatos[escolhidos], chave[escolhidos]))]
+    return candidatos[escolhidos]
+
+
+def _detalhes(store: data_layer.ColumnStore, clv: Clv, linhas: np.ndarray) -> pd.DataFrame:
+    tabela = pd.DataFrame({'Customer_ID': store.customer_ids(linhas)})
+    for nome in ARQUIVOS:
+        tabela[nome] = getattr(clv, nome)[linhas]
+    for coluna in COLUNAS_DETALHE:
+        tabela[coluna] = store.column(coluna)[linhas]
+    return tabela
+
+
+def retention_ranking(csv_path: str = data_layer.CAMINHO_CSV_PADRAO, k: int = 50) -> pd.DataFrame:
+    """Os ``k`` reclamantes com maior prioridade de retenção (menor posto)."""
+    store = data_layer.open_store(csv_path)
+    clv = load_clv(csv_path)
+    candidatos = np.flatnonzero(np.asarray(clv.retention_priority) > 0)
+    return _detalhes(store, clv, top_k(clv.retention_priority, k, candidatos, maiores=False))
+
+
+def top_clv(csv_path: str = data_layer.CAMINHO_CSV_PADRAO, k: int = 50) -> pd.DataFrame:
+    """Os ``k`` clientes elegíveis com maior CLV previsto."""
+    store = data_layer.open_store(csv_path)
+    clv = load_clv(csv_path)
+    candidatos = np.flatnonzero(~np.isnan(clv.predicted_clv))
+    return _detalhes(store, clv, top_k(clv.predicted_clv, k, candidatos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcula CLV e prioridade de retenção no cache colunar.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    parser.add_argument('--processos', type=int, help="Processos do pool (padrão: um por núcleo)")
+    parser.add_argument('--top', type=int, default=20, help="Clientes exibidos em cada ranking")
+    args = parser.parse_args()
+
+    store = data_layer.open_store(args.csv)
+    destino = refresh_clv(store, args.processos)
+    print(f"✅ CLV de {_ler_meta(destino)['elegiveis']:,} clientes elegíveis gravado em '{destino}'")
+
+    colunas: List[str] = ['Customer_ID', 'retention_priority', 'predicted_clv', 'annual_spending', 'Customer_Days']
+    with pd.option_context('display.width', 120):
+        print(f"\nPrioridade de retenção (top {args.top}):")
+        print(retention_ranking(args.csv, args.top)[colunas].round(2).to_string(index=False))
+        print(f"\nMaior CLV previsto (top {args.top}):")
+        print(top_clv(args.csv, args.top)[colunas].round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
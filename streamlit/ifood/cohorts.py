@@ -0,0 +1,285 @@
+"""
+Análise de coortes por canal de compra (``sql/advanced_queries/cohorte.sql``) em streaming.
+
+A consulta original agrupa os clientes pelo ano de cadastro e pelo canal
+principal, calcula a média móvel de ``MntTotal`` sobre as 31 linhas anteriores
+(``ROWS BETWEEN 30 PRECEDING AND CURRENT ROW``) de cada coorte na ordem de
+``Customer_Days`` e a correlação entre visitas ao site e compras online.
+
+O dataset não tem a data de cadastro: o ano da coorte vem de
+``data_referencia - Customer_Days`` (a data em que ``Customer_Days`` foi
+calculado é configurável). Como o ano é função monótona de ``Customer_Days``,
+percorrer a base ordenada por dias também percorre as coortes uma após a outra.
+A ordenação não materializa a base: cada lote é um intervalo de dias escolhido
+pelo histograma de ``Customer_Days``, uma passada distribui os índices das linhas
+entre os lotes (ordenação por contagem) e as colunas de cada lote são lidas do
+cache colunar; entre lotes só ficam guardados os últimos ``janela`` gastos da
+coorte corrente. As médias
+móveis e as somas da correlação são acumuladas por coorte x canal.
+
+O resultado de cada (versão do dataset, data de referência, janela) é gravado em
+``<cache>/coortes/<versão>_<assinatura>.npz`` (os arquivos de versões anteriores
+são apagados) e mantido em memória no cache limitado de ``ifood.result_cache``.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.cohorts [--data-referencia 2020-01-01] [--janela 30]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from typing import Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from ifood import data_layer
+from ifood.result_cache import RESULTADOS, cache_key
+
+# Data em que Customer_Days foi calculado (o ano da coorte é o desta data menos os dias)
+DATA_REFERENCIA_PADRAO = '2020-01-01'
+# Linhas anteriores na média móvel (ROWS BETWEEN 30 PRECEDING AND CURRENT ROW)
+JANELA_PADRAO = 30
+# HAVING COUNT(*) > 30
+MINIMO_CLIENTES = 30
+CANAIS = ['Digital', 'Catálogo', 'Loja Física']
+
+TAMANHO_LOTE = 1_000_000
+
+
+class Coortes(NamedTuple):
+    """Acumulados por coorte x canal e a curva da média móvel por dia de cadastro."""
+    anos: np.ndarray          # ano de cada linha da grade
+    clientes: np.ndarray      # (anos, canais)
+    soma_movel: np.ndarray    # soma das médias móveis das linhas de cada célula
+    momentos: np.ndarray      # (6, anos, canais): n, Σx, Σy, Σx², Σy², Σxy (x = visitas, y = compras web)
+    curva_dias: np.ndarray    # Customer_Days distintos, em ordem crescente
+    curva_media: np.ndarray   # média móvel na última linha de cada dia
+
+
+def enrollment_year(dias: np.ndarray, data_referencia: str = DATA_REFERENCIA_PADRAO) -> np.ndarray:
+    """Ano de cadastro de cada cliente: ano de ``data_referencia - dias``."""
+    datas = np.datetime64(data_referencia, 'D') - dias.astype('timedelta64[D]')
+    return datas.astype('datetime64[Y]').astype(np.int64) + 1970
+
+
+def primary_channel(web: np.ndarray, loja: np.ndarray, catalogo: np.ndarray) -> np.ndarray:
+    """Índice em ``CANAIS`` do canal principal, com o ``CASE`` da consulta original."""
+    return np.where(web > loja, 0, np.where(catalogo > 3, 1, 2)).astype(np.int8)
+
+
+def _lotes_por_dias(dias: np.ndarray, tamanho_lote: int) -> Iterator[np.ndarray]:
+    """
+    Índices das linhas em ordem crescente de ``dias`` (empates na ordem das linhas),
+    lote a lote. Cada lote é um intervalo de dias com cerca de ``tamanho_lote``
+    linhas. Além do lote, a memória usada é só o índice das linhas (4 ou 8 bytes
+    por linha), montado numa passada pela coluna.
+    """
+    n = len(dias)
+    if n == 0:
+        return
+    minimo = min(int(dias[i:i + tamanho_lote].min()) for i in range(0, n, tamanho_lote))
+    histograma = np.zeros(0, dtype=np.int64)
+    for i in range(0, n, tamanho_lote):
+        contagem = np.bincount(dias[i:i + tamanho_lote] - minimo)
+        if len(contagem) > len(histograma):
+            histograma = np.pad(histograma, (0, len(contagem) - len(histograma)))
+        histograma[:len(contagem)] += contagem
+
+    # Limites dos intervalos de dias: cada um fecha quando o acumulado passa de um lote
+    acumulado = np.cumsum(histograma)
+    cortes = np.searchsorted(acumulado, np.arange(tamanho_lote, acumulado[-1], tamanho_lote), side='left') + 1
+    limites = np.unique(np.concatenate([[0], cortes, [len(histograma)]]))
+    tamanhos = np.add.reduceat(histograma, limites[:-1])
+    limites += minimo
+
+    # Ordenação por contagem: o histograma dá o início de cada lote no índice, e
+    # cada bloco de linhas é distribuído (na ordem das linhas) entre os lotes
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    indices = np.empty(n, dtype=np.int32 if n < 2 ** 31 else np.int64)
+    proximo = inicios.copy()
+    for i in range(0, n, tamanho_lote):
+        lote = np.searchsorted(limites, dias[i:i + tamanho_lote], side='right') - 1
+        ordem = np.argsort(lote, kind='stable')
+        contagem = np.bincount(lote, minlength=len(tamanhos))
+        lote = lote[ordem]
+        destino = proximo[lote] + np.arange(len(ordem)) - (np.cumsum(contagem) - contagem)[lote]
+        indices[destino] = ordem + i
+        proximo += contagem
+
+    for inicio, tamanho in zip(inicios, tamanhos):
+        linhas = indices[inicio:inicio + tamanho]
+        yield linhas[np.argsort(dias[linhas], kind='stable')]
+
+
+def compute_cohorts(store: data_layer.ColumnStore, data_referencia: str = DATA_REFERENCIA_PADRAO,
+                    janela: int = JANELA_PADRAO, tamanho_lote: int = TAMANHO_LOTE) -> Coortes:
+    """
+    Percorre a base em ordem de ``Customer_Days`` acumulando as médias móveis de
+    ``MntTotal`` (particionadas por coorte) e os momentos da correlação por
+    coorte x canal.
+
+    Parâmetros:
+      - store (ColumnStore): Cache colunar do dataset.
+      - data_referencia (str): Data (AAAA-MM-DD) em que ``Customer_Days`` foi calculado.
+      - janela (int): Linhas anteriores incluídas na média móvel.
+      - tamanho_lote (int): Linhas aproximadas por lote.
+
+    Retorna:
+      - Coortes: Acumulados brutos; ver ``cohort_table`` e ``rolling_curve``.
+    """
+    dias = store.column('Customer_Days')
+    n_canais = len(CANAIS)
+    if len(dias) == 0:
+        vazio = np.zeros((0, n_canais))
+        return Coortes(np.zeros(0, dtype=np.int64), vazio, vazio, np.zeros((6, 0, n_canais)),
+                       np.zeros(0, dtype=np.int64), np.zeros(0))
+
+    # Grade de anos possível (dias maiores = cadastro mais antigo)
+    ano_min = int(enrollment_year(np.array([dias.max()]), data_referencia)[0])
+    ano_max = int(enrollment_year(np.array([dias.min()]), data_referencia)[0])
+    anos = np.arange(ano_min, ano_max + 1)
+    n_celulas = len(anos) * n_canais
+    clientes = np.zeros(n_celulas)
+    soma_movel = np.zeros(n_celulas)
+    momentos = np.zeros((6, n_celulas))
+
+    # Estado entre lotes: últimos ``janela`` gastos da coorte corrente
+    cauda = np.zeros(0)
+    ano_cauda = None
+    curva_dias, curva_media = [], []
+
+    for linhas in _lotes_por_dias(dias, tamanho_lote):
+        dias_lote = dias[linhas]
+        ano = enrollment_year(dias_lote, data_referencia)
+        canal = primary_channel(store.column('NumWebPurchases')[linhas],
+                                store.column('NumStorePurchases')[linhas],
+                                store.column('NumCatalogPurchases')[linhas])
+        gasto = store.column('MntTotal')[linhas].astype(np.float64)
+
+        prefixo = cauda if ano_cauda is not None and ano_cauda == ano[0] else np.zeros(0)
+        valores = np.concatenate([prefixo, gasto])
+        anos_ext = np.concatenate([np.full(len(prefixo), ano[0]), ano])
+
+        # Média móvel: cada linha cobre até ``janela`` linhas anteriores da mesma coorte
+        posicoes = np.arange(len(valores))
+        nova_coorte = np.r_[True, anos_ext[1:] != anos_ext[:-1]]
+        inicio_coorte = np.maximum.accumulate(np.where(nova_coorte, posicoes, 0))
+        esquerda = np.maximum(posicoes - janela, inicio_coorte)
+        somas = np.concatenate([[0.0], np.cumsum(valores)])
+        movel = ((somas[posicoes + 1] - somas[esquerda]) / (posicoes + 1 - esquerda))[len(prefixo):]
+
+        cauda = valores[max(inicio_coorte[-1], len(valores) - janela):]
+        ano_cauda = ano[-1]
+
+        celula = (ano - ano_min) * n_canais + canal
+        clientes += np.bincount(celula, minlength=n_celulas)
+        soma_movel += np.bincount(celula, weights=movel, minlength=n_celulas)
+        x = store.column('NumWebVisitsMonth')[linhas].astype(np.float64)
+        y = store.column('NumWebPurchases')[linhas].astype(np.float64)
+        for i, termo in enumerate((np.ones_like(x), x, y, x * x, y * y, x * y)):
+            momentos[i] += np.bincount(celula, weights=termo, minlength=n_celulas)
+
+        ultimo_do_dia = np.r_[dias_lote[1:] != dias_lote[:-1], True]
+        curva_dias.append(dias_lote[ultimo_do_dia])
+        curva_media.append(movel[ultimo_do_dia])
+
+    # Um dia dividido entre dois lotes aparece duas vezes: vale o último
+    curva_dias, curva_media = np.concatenate(curva_dias).astype(np.int64), np.concatenate(curva_media)
+    ultimo = np.r_[curva_dias[1:] != curva_dias[:-1], True]
+
+    forma = (len(anos), n_canais)
+    return Coortes(anos, clientes.reshape(forma), soma_movel.reshape(forma),
+                   momentos.reshape((6,) + forma), curva_dias[ultimo], curva_media[ultimo])
+
+
+def cohort_table(co: Coortes, minimo_clientes: int = MINIMO_CLIENTES) -> pd.DataFrame:
+    """
+    Uma linha por coorte x canal com mais de ``minimo_clientes`` clientes: média
+    das médias móveis de gasto e correlação visitas ao site x compras online.
+    """
+    n, sx, sy, sxx, syy, sxy = co.momentos
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = n * sxy - sx * sy
+        correlacao = cov / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+        media_movel = co.soma_movel / co.clientes
+    ano, canal = np.meshgrid(co.anos, np.arange(len(CANAIS)), indexing='ij')
+    tabela = pd.DataFrame({
+        'cohort_year': ano.ravel(),
+        'primary_channel': np.array(CANAIS)[canal.ravel()],
+        'clientes': co.clientes.ravel().astype(np.int64),
+        'avg_rolling_spend': media_movel.ravel(),
+        'web_engagement_corr': correlacao.ravel(),
+    })
+    return tabela[tabela['clientes'] > minimo_clientes].reset_index(drop=True)
+
+
+def rolling_curve(co: Coortes, data_referencia: str = DATA_REFERENCIA_PADRAO) -> pd.DataFrame:
+    """Média móvel de gasto no último cliente de cada dia de cadastro."""
+    curva = pd.DataFrame({'Customer_Days': co.curva_dias, 'rolling_spend': co.curva_media})
+    curva['cohort_year'] = enrollment_year(co.curva_dias, data_referencia)
+    return curva
+
+
+def _assinatura(versao: str, data_referencia: str, janela: int) -> str:
+    conteudo = json.dumps({'versao': versao, 'data_referencia': data_referencia, 'janela': janela}, sort_keys=True)
+    return hashlib.sha256(conteudo.encode()).hexdigest()[:16]
+
+
+def load_cohorts(csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                 data_referencia: str = DATA_REFERENCIA_PADRAO,
+                 janela: int = JANELA_PADRAO) -> Coortes:
+    """
+    Acumulados de coorte da versão atual do dataset, lidos do cache de resultados,
+    do arquivo gravado ou recalculados.
+    """
+    store = data_layer.open_store(csv_path)
+    data_referencia = str(np.datetime64(data_referencia, 'D'))
+    chave = cache_key('coortes', store.version, cache=store.store_dir,
+                      data_referencia=data_referencia, janela=int(janela))
+    co = RESULTADOS.get(chave)
+    if co is not None:
+        return co
+
+    diretorio = os.path.join(store.store_dir, 'coortes')
+    prefixo = f'{store.version[:16]}_'
+    caminho = os.path.join(diretorio, f'{prefixo}{_assinatura(store.version, data_referencia, int(janela))}.npz')
+    try:
+        with np.load(caminho) as dados:
+            co = Coortes(*(dados[campo] for campo in Coortes._fields))
+    except (OSError, KeyError, ValueError):
+        co = compute_cohorts(store, data_referencia, int(janela))
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(temporario, **co._asdict())
+        os.replace(temporario, caminho)
+        # Resultados de versões anteriores do dataset não serão mais lidos
+        for nome in os.listdir(diretorio):
+            if not nome.startswith(prefixo):
+                try:
+                    os.remove(os.path.join(diretorio, nome))
+                except OSError:
+                    pass
+
+    RESULTADOS.put(chave, co)
+    return co
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coortes por ano de cadastro e canal principal.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    parser.add_argument('--data-referencia', default=DATA_REFERENCIA_PADRAO,
+                        help="Data em que Customer_Days foi calculado (AAAA-MM-DD)")
+    parser.add_argument('--janela', type=int, default=JANELA_PADRAO, help="Linhas anteriores na média móvel")
+    parser.add_argument('--minimo-clientes', type=int, default=MINIMO_CLIENTES,
+                        help="Exibe só coortes x canais com mais clientes que isto")
+    args = parser.parse_args()
+
+    co = load_cohorts(args.csv, args.data_referencia, args.janela)
+    print(cohort_table(co, args.minimo_clientes).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+Matriz de correlação de qualquer faixa de idade x renda a partir de estatísticas suficientes.
+
+``calculate_analysis`` recalculava ``df[['Income', coluna]].corr()`` sobre as linhas
+filtradas a cada rerun: um único par e custo proporcional ao número de linhas.
+Aqui, para cada célula de uma grade idade x renda, são guardados a contagem, as
+somas e as somas de produtos (co-momentos) de todas as ``VARIAVEIS``, acumulados
+nos dois eixos (somas prefixadas 2-D). A matriz de correlação completa de uma
+faixa sai de quatro leituras da grade, em tempo independente do número de linhas.
+
+Eixos:
+  - idade: cada valor único de ``Age`` (faixas inclusivas exatas);
+  - renda: intervalos ``[origem + k * passo, origem + (k + 1) * passo)`` a partir da
+    menor renda, só os ocupados. As linhas com renda exatamente sobre uma borda
+    também são somadas à parte, para que faixas com limites na grade (os valores
+    do slider) sejam inclusivas e exatas; outros limites são arredondados para a
+    borda mais próxima.
+
+Clientes sem renda ficam fora da grade, em somas só por idade: entram nas faixas
+sem filtro de renda, exceto nos pares com ``Income`` (como no ``corr`` do pandas,
+que descarta ausentes par a par).
+
+As variáveis são centralizadas em médias fixas (guardadas na grade), como nos
+cubos de ``ifood.aggregates``, o que mantém a precisão das somas de quadrados e
+permite somar ou subtrair deltas de ingestão com o mesmo deslocamento. A grade da
+versão atual do dataset é gravada em ``<cache>/agregados/comomentos.npz``.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.correlations [--idade 30 60] [--renda 30000 90000]
+"""
+
+import argparse
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ifood import data_layer
+from ifood.aggregates import ColumnGetter, frame_getter
+
+VARIAVEIS = [
+    'MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts', 'MntGoldProds',
+    'MntTotal', 'MntRegularProds',
+    'NumDealsPurchases', 'NumWebPurchases', 'NumCatalogPurchases', 'NumStorePurchases',
+    'Income', 'Age', 'Recency',
+]
+# Largura dos intervalos de renda: o passo do slider de renda dos dashboards
+PASSO_RENDA = 1000
+
+TAMANHO_LOTE = 1_000_000
+
+# Pares (i <= j) cujos produtos são somados; a estatística ``s`` de uma célula é
+# [contagem, Σx_0..Σx_p-1, Σx_i·x_j para cada par]
+_PARES = np.triu_indices(len(VARIAVEIS))
+N_ESTATISTICAS = 1 + len(VARIAVEIS) + len(_PARES[0])
+_RENDA = VARIAVEIS.index('Income')
+
+
+def _estatisticas(x: np.ndarray, celula: np.ndarray, n_celulas: int) -> np.ndarray:
+    """Soma das estatísticas de cada célula, formato ``(n_celulas, N_ESTATISTICAS)``."""
+    saida = np.zeros((n_celulas, N_ESTATISTICAS))
+    saida[:, 0] = np.bincount(celula, minlength=n_celulas)
+    for i in range(x.shape[1]):
+        saida[:, 1 + i] = np.bincount(celula, weights=x[:, i], minlength=n_celulas)
+    for k, (i, j) in enumerate(zip(*_PARES)):
+        saida[:, 1 + x.shape[1] + k] = np.bincount(celula, weights=x[:, i] * x[:, j], minlength=n_celulas)
+    return saida
+
+
+def _acumular(celulas: np.ndarray, eixos: Tuple[int, ...]) -> np.ndarray:
+    """Somas prefixadas nos ``eixos``, com uma linha de zeros no início de cada um."""
+    for eixo in eixos:
+        forma = list(celulas.shape)
+        forma[eixo] = 1
+        celulas = np.concatenate([np.zeros(forma), np.cumsum(celulas, axis=eixo)], axis=eixo)
+    return celulas
+
+
+def _celulas(prefixo: np.ndarray, eixos: Tuple[int, ...]) -> np.ndarray:
+    """Inverso de ``_acumular``."""
+    for eixo in eixos:
+        prefixo = np.diff(prefixo, axis=eixo)
+    return prefixo
+
+
+class CoMomentGrid:
+    """
+    Co-momentos acumulados numa grade idade x renda.
+
+    Atributos:
+      - idades (np.ndarray): Valores únicos de ``Age``.
+      - faixas (np.ndarray): Índices ``k`` dos intervalos de renda ocupados.
+      - origem, passo (float): Borda do intervalo ``k`` = ``origem + k * passo``.
+      - medias (np.ndarray): Média de centralização de cada variável.
+      - somas (np.ndarray): Estatísticas acumuladas, ``(len(faixas) + 1, len(idades) + 1, N_ESTATISTICAS)``.
+      - bordas (np.ndarray): Estatísticas das linhas com renda exatamente na borda
+        inferior de cada intervalo, acumuladas na idade: ``(len(faixas), len(idades) + 1, N_ESTATISTICAS)``.
+      - sem_renda (np.ndarray): Estatísticas das linhas sem renda, acumuladas na
+        idade: ``(len(idades) + 1, N_ESTATISTICAS)``.
+    """
+
+    def __init__(self, idades: np.ndarray, faixas: np.ndarray, origem: float, passo: float,
+                 medias: np.ndarray, somas: np.ndarray, bordas: np.ndarray, sem_renda: np.ndarray):
+        self.idades = idades
+        self.faixas = faixas
+        self.origem = float(origem)
+        self.passo = float(passo)
+        self.medias = medias
+        self.somas = somas
+        self.bordas = bordas
+        self.sem_renda = sem_renda
+
+    @classmethod
+    def from_cells(cls, idades: np.ndarray, faixas: np.ndarray, origem: float, passo: float,
+                   medias: np.ndarray, somas: np.ndarray, bordas: np.ndarray,
+                   sem_renda: np.ndarray) -> 'CoMomentGrid':
+        """Cria a grade a partir das estatísticas por célula (não acumuladas)."""
+        return cls(idades, faixas, origem, passo, medias, _acumular(somas, (0, 1)),
+                   _acumular(bordas, (1,)), _acumular(sem_renda, (0,)))
+
+    @classmethod
+    def build(cls, get: ColumnGetter, n: int, origem: Optional[float] = None,
+              medias: Optional[np.ndarray] = None, passo: float = PASSO_RENDA,
+              tamanho_lote: int = TAMANHO_LOTE) -> 'CoMomentGrid':
+        """
+        Constrói a grade lendo as colunas lote a lote (``np.bincount`` por estatística).
+
+        Parâmetros:
+          - get (callable): Leitor de colunas (``nome -> np.ndarray``).
+          - n (int): Número de linhas.
+          - origem (float, opcional): Borda inicial da renda; por padrão a menor renda.
+          - medias (np.ndarray, opcional): Médias de centralização; por padrão as das linhas.
+          - passo (float): Largura dos intervalos de renda.
+          - tamanho_lote (int): Linhas por lote.
+
+        Retorna:
+          - CoMomentGrid: Grade com as estatísticas acumuladas.
+        """
+        lotes = [(a, min(a + tamanho_lote, n)) for a in range(0, n, tamanho_lote)] or [(0, 0)]
+        coluna = lambda nome, a, b: np.asarray(get(nome)[a:b], dtype=np.float64)  # noqa: E731
+
+        # Primeira passada: eixos e médias
+        renda = [coluna('Income', a, b) for a, b in lotes]
+        if origem is None:
+            com_renda = [r[~np.isnan(r)] for r in renda if np.any(~np.isnan(r))]
+            origem = min(float(r.min()) for r in com_renda) if com_renda else 0.0
+        faixa = [np.floor((r - origem) / passo) for r in renda]
+        faixas = np.unique(np.concatenate([f[~np.isnan(f)] for f in faixa])).astype(np.int64)
+        idades = np.unique(np.concatenate([get('Age')[a:b] for a, b in lotes]))
+        if medias is None:
+            somas = np.zeros(len(VARIAVEIS))
+            contagens = np.zeros(len(VARIAVEIS))
+            for a, b in lotes:
+                for i, nome in enumerate(VARIAVEIS):
+                    valores = coluna(nome, a, b)
+                    somas[i] += np.nansum(valores)
+                    contagens[i] += np.count_nonzero(~np.isnan(valores))
+            medias = np.divide(somas, contagens, out=np.zeros_like(somas), where=contagens > 0)
+
+        forma = (len(faixas), len(idades))
+        celulas = np.zeros((forma[0] * forma[1], N_ESTATISTICAS))
+        bordas = np.zeros((forma[0] * forma[1], N_ESTATISTICAS))
+        sem_renda = np.zeros((forma[1], N_ESTATISTICAS))
+        for (a, b), r, f in zip(lotes, renda, faixa):
+            x = np.column_stack([coluna(nome, a, b) for nome in VARIAVEIS]) - medias
+            idade = np.searchsorted(idades, get('Age')[a:b])
+            ausente = np.isnan(r)
+            if ausente.any():
+                # Sem renda: contribuem para os demais pares, não para os de Income
+                x_sem = x[ausente]
+                x_sem[:, _RENDA] = 0.0
+                sem_renda += _estatisticas(x_sem, idade[ausente], forma[1])
+            presente = ~ausente
+            celula = np.searchsorted(faixas, f[presente].astype(np.int64)) * forma[1] + idade[presente]
+            celulas += _estatisticas(x[presente], celula, len(celulas))
+            na_borda = (r[presente] - origem) == f[presente] * passo
+            bordas += _estatisticas(x[presente][na_borda], celula[na_borda], len(bordas))
+
+        return cls.from_cells(idades, faixas, origem, passo, medias,
+                              celulas.reshape(forma + (-1,)), bordas.reshape(forma + (-1,)), sem_renda)
+
+    def merge(self, other: 'CoMomentGrid', sign: int = 1) -> 'CoMomentGrid':
+        """
+        Soma (``sign=1``) ou subtrai (``sign=-1``) outra grade com a mesma origem,
+        passo e médias; o custo é proporcional ao número de células, não de linhas.
+        """
+        if (other.origem, other.passo) != (self.origem, self.passo) or not np.array_equal(other.medias, self.medias):
+            raise ValueError("As grades precisam ter a mesma origem, passo e médias para serem combinadas.")
+        idades = np.union1d(self.idades, other.idades)
+        faixas = np.union1d(self.faixas, other.faixas)
+        celulas = np.zeros((len(faixas), len(idades), N_ESTATISTICAS))
+        bordas = np.zeros_like(celulas)
+        sem_renda = np.zeros((len(idades), N_ESTATISTICAS))
+        for grade, sinal in ((self, 1), (other, sign)):
+            posicao_f = np.searchsorted(faixas, grade.faixas)
+            posicao_i = np.searchsorted(idades, grade.idades)
+            celulas[np.ix_(posicao_f, posicao_i)] += sinal * _celulas(grade.somas, (0, 1))
+            bordas[np.ix_(posicao_f, posicao_i)] += sinal * _celulas(grade.bordas, (1,))
+            sem_renda[posicao_i] += sinal * _celulas(grade.sem_renda, (0,))
+
+        # Remove faixas e idades que ficaram sem nenhuma linha
+        faixa_ocupada = celulas[:, :, 0].sum(axis=1) > 0
+        idade_ocupada = (celulas[:, :, 0].sum(axis=0) + sem_renda[:, 0]) > 0
+        return CoMomentGrid.from_cells(idades[idade_ocupada], faixas[faixa_ocupada], self.origem, self.passo,
+                                       self.medias, celulas[faixa_ocupada][:, idade_ocupada],
+                                       bordas[faixa_ocupada][:, idade_ocupada], sem_renda[idade_ocupada])
+
+    def save(self, path: str, version: str) -> None:
+        """Grava a grade em ``path`` (.npz), associada à versão do dataset."""
+        temporario = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporario, idades=self.idades, faixas=self.faixas, medias=self.medias, somas=self.somas,
+                 bordas=self.bordas, sem_renda=self.sem_renda,
+                 meta=np.array(json.dumps({'variaveis': VARIAVEIS, 'origem': self.origem, 'passo': self.passo,
+                                           'version': version})))
+        os.replace(temporario, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple[Optional['CoMomentGrid'], str]:
+        """
+        Lê uma grade gravada por ``save``; retorna a grade (``None`` se gravada com
+        outra lista de variáveis) e a versão do dataset.
+        """
+        with np.load(path) as dados:
+            meta = json.loads(str(dados['meta']))
+            if meta['variaveis'] != VARIAVEIS:
+                return None, meta['version']
+            grade = cls(dados['idades'], dados['faixas'], meta['origem'], meta['passo'], dados['medias'],
+                        dados['somas'], dados['bordas'], dados['sem_renda'])
+        return grade, meta['version']
+
+    def income_edge(self, valor: float) -> int:
+        """Índice da borda de renda mais próxima de ``valor``."""
+        return int(np.round((valor - self.origem) / self.passo))
+
+    def totals(self, age_range: Optional[Tuple[float, float]] = None,
+               income_range: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estatísticas somadas das linhas na faixa, em tempo independente do número de linhas.
+
+        Parâmetros:
+          - age_range (tuple, opcional): ``(mínimo, máximo)`` inclusivos de ``Age``.
+          - income_range (tuple, opcional): ``(mínimo, máximo)`` inclusivos de ``Income``,
+            arredondados para as bordas da grade; sem faixa entram também os clientes sem renda.
+
+        Retorna:
+          - tuple: (estatísticas de todas as linhas, estatísticas só das linhas com renda).
+        """
+        a0, a1 = 0, len(self.idades)
+        if age_range is not None:
+            a0 = int(np.searchsorted(self.idades, age_range[0], side='left'))
+            a1 = max(int(np.searchsorted(self.idades, age_range[1], side='right')), a0)
+
+        f0, f1, borda = 0, len(self.faixas), None
+        if income_range is not None:
+            k0, k1 = self.income_edge(income_range[0]), self.income_edge(income_range[1])
+            if k1 < k0:
+                k1 = k0 - 1
+            f0 = int(np.searchsorted(self.faixas, k0))
+            f1 = max(int(np.searchsorted(self.faixas, k1)), f0)
+            # Limite superior inclusivo: linhas exatamente na borda k1
+            if f1 < len(self.faixas) and self.faixas[f1] == k1 and k1 >= k0:
+                borda = f1
+
+        s = self.somas
+        com_renda = s[f1, a1] - s[f0, a1] - s[f1, a0] + s[f0, a0]
+        if borda is not None:
+            com_renda = com_renda + self.bordas[borda, a1] - self.bordas[borda, a0]
+        todas = com_renda
+        if income_range is None:
+            todas = com_renda + self.sem_renda[a1] - self.sem_renda[a0]
+        return todas, com_renda
+
+
+def _correlacao(estatisticas: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Matriz de correlação de Pearson e número de linhas a partir de uma estatística somada."""
+    n = estatisticas[0]
+    p = len(VARIAVEIS)
+    somas = estatisticas[1:1 + p]
+    produtos = np.zeros((p, p))
+    produtos[_PARES] = estatisticas[1 + p:]
+    produtos = np.triu(produtos) + np.triu(produtos, 1).T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = produtos - np.outer(somas, somas) / n
+        variancia = np.diag(cov).copy()
+        # Variável constante na faixa: a subtração deixa só erro de arredondamento
+        variancia[variancia <= 1e-9 * np.diag(produtos)] = 0.0
+        desvio = np.sqrt(np.clip(variancia, 0, None))
+        correlacao = cov / np.outer(desvio, desvio)
+    if n < 2:
+        correlacao[:] = np.nan
+    correlacao[np.outer(desvio, desvio) <= 0] = np.nan
+    return np.clip(correlacao, -1.0, 1.0), float(n)
+
+
+def correlation_matrix(grade: CoMomentGrid, age_range: Optional[Tuple[float, float]] = None,
+                       income_range: Optional[Tuple[float, float]] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Matriz de correlação de ``VARIAVEIS`` nas linhas da faixa (equivalente a
+    ``df[VARIAVEIS].corr()`` sobre as linhas filtradas).
+
+    Retorna:
+      - tuple: (matriz ``VARIAVEIS`` x ``VARIAVEIS``, número de clientes na faixa).
+    """
+    todas, com_renda = grade.totals(age_range, income_range)
+    matriz, n = _correlacao(todas)
+    if not np.array_equal(todas, com_renda):
+        # Pares com Income só usam as linhas com renda (descarte par a par)
+        matriz_renda, _ = _correlacao(com_renda)
+        matriz[_RENDA, :] = matriz_renda[_RENDA, :]
+        matriz[:, _RENDA] = matriz_renda[:, _RENDA]
+    return pd.DataFrame(matriz, index=VARIAVEIS, columns=VARIAVEIS), int(round(n))
+
+
+def strongest_pairs(matriz: pd.DataFrame, k: int = 10) -> pd.DataFrame:
+    """Os ``k`` pares de variáveis distintas com maior correlação em módulo."""
+    i, j = np.triu_indices(len(matriz), 1)
+    valores = matriz.to_numpy()[i, j]
+    pares = pd.DataFrame({'variavel_1': matriz.index[i], 'variavel_2': matriz.columns[j], 'correlacao': valores})
+    pares = pares.dropna(subset=['correlacao'])
+    return pares.reindex(pares['correlacao'].abs().sort_values(ascending=False).index).head(k).reset_index(drop=True)
+
+
+def grid_path(store_dir: str) -> str:
+    return os.path.join(store_dir, 'agregados', 'comomentos.npz')
+
+
+# Grades em memória por diretório do cache: (versão, grade)
+_GRADES: Dict[str, Tuple[str, CoMomentGrid]] = {}
+_LOCK = threading.Lock()
+
+
+def load_grid(csv_path: str = data_layer.CAMINHO_CSV_PADRAO) -> CoMomentGrid:
+    """
+    Grade de co-momentos da versão atual do dataset: da memória do processo, do
+    arquivo gravado ou, se nenhum estiver atualizado, recalculada e gravada.
+    """
+    store = data_layer.open_store(csv_path)
+    with _LOCK:
+        em_memoria = _GRADES.get(store.store_dir)
+        if em_memoria is not None and em_memoria[0] == store.version:
+            return em_memoria[1]
+
+        caminho = grid_path(store.store_dir)
+        grade = None
+        if os.path.exists(caminho):
+            grade, versao = CoMomentGrid.load(caminho)
+            if versao != store.version:
+                grade = None
+        if grade is None:
+            grade = CoMomentGrid.build(store.column, len(store))
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            grade.save(caminho, store.version)
+
+        _GRADES[store.store_dir] = (store.version, grade)
+        return grade
+
+
+def update_grid(store_dir: str, versao_anterior: str, versao_nova: str,
+                inseridos: pd.DataFrame, removidos: pd.DataFrame) -> Optional[bool]:
+    """
+    Atualiza no lugar a grade gravada após uma ingestão incremental, como
+    ``aggregates.update_cubes``: soma as linhas inseridas e subtrai os valores
+    antigos das substituídas (com a mesma origem e as mesmas médias).
+
+    Retorna:
+      - bool ou None: ``True`` se atualizada, ``False`` se descartada (gravada para
+        outra versão), ``None`` se não havia grade gravada.
+    """
+    caminho = grid_path(store_dir)
+    if not os.path.exists(caminho):
+        return None
+    grade, versao = CoMomentGrid.load(caminho)
+    if grade is None or versao != versao_anterior:
+        os.remove(caminho)
+        return False
+    for linhas, sinal in ((inseridos, 1), (removidos, -1)):
+        if len(linhas):
+            delta = CoMomentGrid.build(frame_getter(linhas), len(linhas), grade.origem, grade.medias, grade.passo)
+            grade = grade.merge(delta, sign=sinal)
+    grade.save(caminho, versao_nova)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matriz de correlação por faixa de idade e renda.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    parser.add_argument('--idade', nargs=2, type=float, metavar=('MIN', 'MAX'), help="Faixa de idade")
+    parser.add_argument('--renda', nargs=2, type=float, metavar=('MIN', 'MAX'), help="Faixa de renda")
+    parser.add_argument('--pares', type=int, default=10, help="Pares mais correlacionados exibidos")
+    args = parser.parse_args()
+
+    matriz, n = correlation_matrix(load_grid(args.csv), args.idade, args.renda)
+    print(f"{n:,} clientes na faixa\n")
+    print(strongest_pairs(matriz, args.pares).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Cubo de agregados pré-calculados para os filtros por faixa dos dashboards.
+
+O cubo guarda somas e contagens por valor único de uma dimensão ordenada (o eixo
+do slider, ex.: ``Age`` ou ``Income``) e, opcionalmente, por uma dimensão
+categórica. As somas são acumuladas ao longo do eixo, de modo que qualquer faixa
+``[lo, hi]`` é respondida com duas buscas binárias e uma subtração, sem percorrer
+as linhas do dataset.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class PrefixCube:
+    """
+    Somas prefixadas de medidas ao longo de um eixo ordenado.
+
+    Atributos:
+      - keys (np.ndarray): Valores únicos e ordenados do eixo.
+      - labels (np.ndarray): Valores únicos da dimensão categórica (ou ``[0]``).
+      - measures (list): Nomes das medidas somadas.
+      - counts (np.ndarray): Contagens acumuladas, formato ``(len(keys) + 1, len(labels))``.
+      - sums (np.ndarray): Somas acumuladas, formato ``(len(keys) + 1, len(labels), len(measures))``.
+      - params (dict): Parâmetros usados no cálculo das medidas (ex.: médias de centralização).
+    """
+
+    def __init__(self, keys: np.ndarray, labels: np.ndarray, measures: List[str],
+                 counts: np.ndarray, sums: np.ndarray, params: Optional[dict] = None):
+        self.keys = keys
+        self.labels = labels
+        self.measures = list(measures)
+        self.counts = counts
+        self.sums = sums
+        self.params = dict(params or {})
+        self._posicao = {m: i for i, m in enumerate(self.measures)}
+
+    @classmethod
+    def build(cls, axis: np.ndarray, measures: Dict[str, np.ndarray],
+              groups: Optional[np.ndarray] = None, params: Optional[dict] = None) -> 'PrefixCube':
+        """
+        Constrói o cubo em uma única passada vetorizada (``np.bincount``).
+
+        Parâmetros:
+          - axis (np.ndarray): Valores do eixo ordenado; linhas com NaN são ignoradas.
+          - measures (dict): Nome da medida -> array com o valor de cada linha.
+          - groups (np.ndarray, opcional): Dimensão categórica de cada linha.
+          - params (dict, opcional): Parâmetros das medidas, guardados junto ao cubo.
+
+        Retorna:
+          - PrefixCube: Cubo com as somas acumuladas.
+        """
+        axis = np.asarray(axis)
+        validos = ~np.isnan(axis) if axis.dtype.kind == 'f' else None
+        if validos is not None and not validos.all():
+            axis = axis[validos]
+            measures = {m: np.asarray(v)[validos] for m, v in measures.items()}
+            groups = None if groups is None else np.asarray(groups)[validos]
+
+        keys, idx_eixo = np.unique(axis, return_inverse=True)
+        if groups is None:
+            labels, idx_grupo = np.zeros(1, dtype=np.int8), 0
+        else:
+            labels, idx_grupo = np.unique(groups, return_inverse=True)
+
+        n_celulas = len(keys) * len(labels)
+        celula = idx_eixo * len(labels) + idx_grupo
+        counts = np.bincount(celula, minlength=n_celulas).reshape(len(keys), len(labels))
+        sums = np.zeros((len(keys), len(labels), len(measures)))
+        for i, valores in enumerate(measures.values()):
+            pesos = np.asarray(valores, dtype=np.float64)
+            sums[:, :, i] = np.bincount(celula, weights=pesos, minlength=n_celulas).reshape(len(keys), len(labels))
+
+        return cls.from_cells(keys, labels, list(measures), counts, sums, params)
+
+    @classmethod
+    def from_cells(cls, keys: np.ndarray, labels: np.ndarray, measures: List[str],
+                   counts: np.ndarray, sums: np.ndarray, params: Optional[dict] = None) -> 'PrefixCube':
+        """Cria o cubo a partir das contagens e somas por célula (não acumuladas)."""
+        zeros_c = np.zeros((1,) + counts.shape[1:], dtype=np.int64)
+        zeros_s = np.zeros((1,) + sums.shape[1:])
+        return cls(keys, labels, measures,
+                   np.concatenate([zeros_c, np.cumsum(counts, axis=0, dtype=np.int64)]),
+                   np.concatenate([zeros_s, np.cumsum(sums, axis=0)]),
+                   params)
+
+    def merge(self, other: 'PrefixCube', sign: int = 1) -> 'PrefixCube':
+        """
+        Soma (``sign=1``) ou subtrai (``sign=-1``) as células de outro cubo com as
+        mesmas medidas. O custo é proporcional ao número de células, não de linhas.
+
+        Retorna:
+          - PrefixCube: Novo cubo; chaves que ficam sem nenhuma linha são removidas.
+        """
+        if other.measures != self.measures:
+            raise ValueError("Os cubos precisam ter as mesmas medidas para serem combinados.")
+        keys = np.union1d(self.keys, other.keys)
+        labels = np.union1d(self.labels, other.labels)
+        counts = np.zeros((len(keys), len(labels)), dtype=np.int64)
+        sums = np.zeros((len(keys), len(labels), len(self.measures)))
+        for cubo, sinal in ((self, 1), (other, sign)):
+            celulas = np.ix_(np.searchsorted(keys, cubo.keys), np.searchsorted(labels, cubo.labels))
+            counts[celulas] += sinal * cubo.cell_counts()
+            sums[celulas] += sinal * cubo.cell_sums()
+
+        ocupadas = counts.sum(axis=1) > 0
+        return PrefixCube.from_cells(keys[ocupadas], labels, self.measures,
+                                     counts[ocupadas], sums[ocupadas], self.params)
+
+    def save(self, path: str, version: str) -> None:
+        """Grava o cubo em ``path`` (.npz), associado à versão do dataset."""
+        temporario = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporario, keys=self.keys, labels=self.labels, counts=self.counts, sums=self.sums,
+                 meta=np.array(json.dumps({'measures': self.measures, 'params': self.params,
+                                           'version': version})))
+        os.replace(temporario, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple['PrefixCube', str]:
+        """Lê um cubo gravado por ``save``; retorna o cubo e a versão do dataset."""
+        with np.load(path) as dados:
+            meta = json.loads(str(dados['meta']))
+            cubo = cls(dados['keys'], dados['labels'], meta['measures'],
+                       dados['counts'], dados['sums'], meta['params'])
+        return cubo, meta['version']
+
+    def cell_counts(self) -> np.ndarray:
+        """Contagens por célula (não acumuladas)."""
+        return np.diff(self.counts, axis=0)
+
+    def cell_sums(self) -> np.ndarray:
+        """Somas por célula (não acumuladas)."""
+        return np.diff(self.sums, axis=0)
+
+    def _bounds(self, lo, hi, closed_left: bool = True, closed_right: bool = True) -> Tuple[int, int]:
+        inicio = np.searchsorted(self.keys, lo, side='left' if closed_left else 'right')
+        fim = np.searchsorted(self.keys, hi, side='right' if closed_right else 'left')
+        return int(inicio), max(int(fim), int(inicio))
+
+    def totals(self, lo=-np.inf, hi=np.inf, closed_left: bool = True,
+               closed_right: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Contagens e somas de cada grupo para as linhas com eixo na faixa ``lo``-``hi``.
+
+        Retorna:
+          - tuple: (contagens por grupo, somas por grupo x medida).
+        """
+        inicio, fim = self._bounds(lo, hi, closed_left, closed_right)
+        return self.counts[fim] - self.counts[inicio], self.sums[fim] - self.sums[inicio]
+
+    def band_totals(self, edges: Sequence[float], lo=-np.inf, hi=np.inf,
+                    right: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Contagens e somas por faixa (mesma semântica de ``pd.cut(bins=edges, right=right)``)
+        restritas às linhas com eixo em ``[lo, hi]``.
+
+        Retorna:
+          - tuple: (contagens ``(faixas, grupos)``, somas ``(faixas, grupos, medidas)``).
+        """
+        n_faixas = len(edges) - 1
+        counts = np.zeros((n_faixas,) + self.counts.shape[1:], dtype=np.int64)
+        sums = np.zeros((n_faixas,) + self.sums.shape[1:])
+        for i in range(n_faixas):
+            a, b = edges[i], edges[i + 1]
+            if right:
+                # Faixa (a, b]
+                esq, fechado_esq = (a, False) if a >= lo else (lo, True)
+                dir_, fechado_dir = min(b, hi), True
+            else:
+                # Faixa [a, b)
+                esq, fechado_esq = max(a, lo), True
+                dir_, fechado_dir = (b, False) if b <= hi else (hi, True)
+            counts[i], sums[i] = self.totals(esq, dir_, fechado_esq, fechado_dir)
+        return counts, sums
+
+    def measure(self, sums: np.ndarray, nome: str) -> np.ndarray:
+        """Seleciona uma medida no último eixo de um resultado de ``totals``."""
+        return sums[..., self._posicao[nome]]
+
+    def quantile(self, q: float) -> float:
+        """
+        Quantil do eixo sobre todas as linhas, com interpolação linear
+        (equivalente a ``pd.Series.quantile``).
+        """
+        acumulado = self.counts.sum(axis=1)
+        n = int(acumulado[-1])
+        if n == 0:
+            return float('nan')
+        posicao = q * (n - 1)
+        baixo, alto = int(np.floor(posicao)), int(np.ceil(posicao))
+        v_baixo = self.keys[np.searchsorted(acumulado, baixo, side='right') - 1]
+        v_alto = self.keys[np.searchsorted(acumulado, alto, side='right') - 1]
+        return float(v_baixo + (v_alto - v_baixo) * (posicao - baixo))
+
+
+def means(counts: np.ndarray, sums: np.ndarray) -> np.ndarray:
+    """Médias ``sums / counts`` com NaN nas células sem linhas."""
+    counts = np.asarray(counts, dtype=np.float64)
+    if np.ndim(sums) > counts.ndim:
+        counts = counts[..., None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
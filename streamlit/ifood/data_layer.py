@@ -0,0 +1,661 @@
+"""
+Camada de dados compartilhada pelos dashboards.
+
+O CSV processado é convertido uma única vez em um cache colunar (um arquivo binário
+contíguo por coluna, com os tipos compactos definidos em ``SCHEMA``). As leituras
+seguintes usam apenas o cache, que é reconstruído automaticamente quando o arquivo de
+origem muda (tamanho, data de modificação e hash SHA-256).
+
+As colunas são abertas com ``np.memmap`` em modo somente leitura: todas as sessões
+e todos os processos do servidor mapeiam as mesmas páginas físicas do cache do
+sistema operacional, sem cópias por sessão.
+
+Novos clientes podem ser anexados ao cache sem reprocessar o CSV
+(``append_rows``); cada alteração gera uma nova ``versao`` no manifesto. Os
+arquivos nunca são alterados dentro das linhas que uma versão já publicada
+descreve: anexos só escrevem depois delas, e colunas com linhas sobrescritas são
+gravadas numa cópia nova, referenciada pelo manifesto seguinte.
+
+O manifesto guarda, para cada grupo de linhas, o mínimo, o máximo e a presença de
+nulos de cada coluna. ``query`` recebe o estado dos widgets como predicados e a
+lista de colunas necessárias: grupos cujas estatísticas excluem os predicados
+não são lidos, e só as colunas pedidas (e as dos predicados) são tocadas.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CAMINHO_CSV_PADRAO = '../data/processed/ifood_df_atualizado.csv'
+
+# Versão do layout em disco; alterar este número força a reconstrução dos caches
+FORMATO_CACHE = 4
+
+# Número máximo de linhas lidas do CSV (e anexadas às colunas) por grupo de linhas;
+# é também a granularidade das estatísticas usadas para pular grupos em ``query``
+LINHAS_POR_GRUPO = 131_072
+
+# Tipos compactos de cada coluna do dataset processado
+SCHEMA: Dict[str, str] = {
+    'Income': 'float32',
+    'Kidhome': 'int8',
+    'Teenhome': 'int8',
+    'Recency': 'int8',
+    'MntWines': 'int32',
+    'MntFruits': 'int16',
+    'MntMeatProducts': 'int32',
+    'MntFishProducts': 'int16',
+    'MntSweetProducts': 'int16',
+    'MntGoldProds': 'int16',
+    'NumDealsPurchases': 'int8',
+    'NumWebPurchases': 'int8',
+    'NumCatalogPurchases': 'int8',
+    'NumStorePurchases': 'int8',
+    'NumWebVisitsMonth': 'int8',
+    'AcceptedCmp3': 'int8',
+    'AcceptedCmp4': 'int8',
+    'AcceptedCmp5': 'int8',
+    'AcceptedCmp1': 'int8',
+    'AcceptedCmp2': 'int8',
+    'Complain': 'int8',
+    'Z_CostContact': 'int8',
+    'Z_Revenue': 'int8',
+    'Response': 'int8',
+    'Age': 'int16',
+    'Customer_Days': 'int32',
+    'marital_Divorced': 'int8',
+    'marital_Married': 'int8',
+    'marital_Single': 'int8',
+    'marital_Together': 'int8',
+    'marital_Widow': 'int8',
+    'education_2n Cycle': 'int8',
+    'education_Basic': 'int8',
+    'education_Graduation': 'int8',
+    'education_Master': 'int8',
+    'education_PhD': 'int8',
+    'MntTotal': 'int32',
+    'MntRegularProds': 'int32',
+    'AcceptedCmpOverall': 'int8',
+}
+
+
+def cache_dir_for(csv_path: str) -> str:
+    """Retorna o diretório do cache colunar associado a um CSV."""
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.cache', base)
+
+
+def _sha256(path: str, tamanho_bloco: int = 1 << 20) -> str:
+    """Calcula o hash SHA-256 de um arquivo lendo-o em blocos."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _read_manifest(store_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(store_dir, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(store_dir: str, manifest: dict) -> None:
+    caminho = os.path.join(store_dir, 'manifest.json')
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def _is_fresh(store_dir: str, csv_path: str) -> bool:
+    """
+    Verifica se o cache ainda corresponde ao CSV de origem.
+
+    Tamanho e data de modificação iguais bastam; se a data mudou mas o conteúdo
+    (hash) é o mesmo, o manifesto é apenas atualizado com a nova data.
+    """
+    manifest = _read_manifest(store_dir)
+    if manifest is None or manifest.get('formato') != FORMATO_CACHE:
+        return False
+
+    origem = manifest['origem']
+    stat = os.stat(csv_path)
+    if stat.st_size != origem['tamanho']:
+        return False
+    if stat.st_mtime_ns == origem['mtime_ns']:
+        return True
+
+    if _sha256(csv_path) != origem['sha256']:
+        return False
+    origem['mtime_ns'] = stat.st_mtime_ns
+    _write_manifest(store_dir, manifest)
+    return True
+
+
+def _column_array(serie: pd.Series, dtype: Optional[str]) -> np.ndarray:
+    """Converte uma coluna do CSV para um array NumPy de tamanho fixo por elemento."""
+    if dtype is not None:
+        return serie.to_numpy(dtype=dtype)
+    if not pd.api.types.is_numeric_dtype(serie):
+        raise ValueError(f"Coluna não numérica não suportada pelo cache colunar: '{serie.name}'")
+    return serie.to_numpy()
+
+
+def column_stats(arrays: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """``coluna -> [mínimo, máximo, tem_nulos]`` de um grupo; mínimo e máximo são ``None`` se tudo for nulo."""
+    estatisticas = {}
+    for coluna, arr in arrays.items():
+        nulos = bool(arr.dtype.kind == 'f' and np.isnan(arr).any())
+        validos = arr[~np.isnan(arr)] if nulos else arr
+        if len(validos):
+            estatisticas[coluna] = [validos.min().item(), validos.max().item(), nulos]
+        else:
+            estatisticas[coluna] = [None, None, nulos]
+    return estatisticas
+
+
+def merge_stats(estatisticas: Dict[str, list], novas: Dict[str, list]) -> None:
+    """Amplia no lugar as estatísticas de um grupo para cobrir também ``novas``."""
+    for coluna, (minimo, maximo, nulos) in novas.items():
+        atual = estatisticas.get(coluna)
+        if atual is None or atual[0] is None:
+            estatisticas[coluna] = [minimo, maximo, nulos or bool(atual and atual[2])]
+        elif minimo is not None:
+            estatisticas[coluna] = [min(atual[0], minimo), max(atual[1], maximo), atual[2] or nulos]
+        else:
+            atual[2] = atual[2] or nulos
+
+
+def write_store(store_dir: str, blocos: Iterable[Dict[str, np.ndarray]],
+                tipos: Optional[Dict[str, str]] = None, **campos) -> dict:
+    """
+    Grava blocos de colunas no formato do cache colunar: um arquivo binário por
+    coluna, um grupo de linhas (com suas estatísticas) por bloco e o manifesto.
+
+    Parâmetros:
+      - store_dir (str): Diretório a criar.
+      - blocos (iterable): Dicionários ``coluna -> array``, todos com as mesmas colunas.
+      - tipos (dict, opcional): ``coluna -> dtype``; por padrão os tipos do primeiro
+        bloco. Obrigatório para gravar um cache sem linhas.
+      - **campos: Demais campos do manifesto (``versao``, ``origem``...).
+
+    Retorna:
+      - dict: Manifesto gravado.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    tipos = dict(tipos or {})
+    colunas: List[str] = list(tipos)
+    grupos = []
+    inicio = 0
+    for bloco in blocos:
+        if not colunas:
+            colunas = list(bloco)
+        arrays = {}
+        for j, coluna in enumerate(colunas):
+            tipos.setdefault(coluna, bloco[coluna].dtype.str)
+            arrays[coluna] = np.ascontiguousarray(bloco[coluna], dtype=tipos[coluna])
+            with open(os.path.join(store_dir, f"c{j:03d}.bin"), 'ab') as f:
+                f.write(arrays[coluna].tobytes())
+        linhas = len(arrays[colunas[0]]) if colunas else 0
+        grupos.append({'inicio': inicio, 'linhas': linhas, 'estatisticas': column_stats(arrays)})
+        inicio += linhas
+    for j in range(len(colunas)):
+        open(os.path.join(store_dir, f"c{j:03d}.bin"), 'ab').close()
+
+    manifest = {
+        'formato': FORMATO_CACHE,
+        **campos,
+        'colunas': [{'nome': c, 'arquivo': f"c{j:03d}.bin", 'dtype': tipos[c]}
+                    for j, c in enumerate(colunas)],
+        'grupos': grupos,
+        'linhas': inicio,
+        'incrementos': [],
+    }
+    _write_manifest(store_dir, manifest)
+    return manifest
+
+
+def build_store(csv_path: str, store_dir: Optional[str] = None) -> str:
+    """
+    Converte o CSV em um cache colunar, lendo o arquivo em blocos de
+    ``LINHAS_POR_GRUPO`` linhas que são anexados a um arquivo binário por coluna.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado.
+      - store_dir (str, opcional): Diretório do cache; por padrão ``cache_dir_for(csv_path)``.
+
+    Retorna:
+      - str: Diretório do cache construído.
+    """
+    store_dir = store_dir or cache_dir_for(csv_path)
+    stat = os.stat(csv_path)
+    sha256 = _sha256(csv_path)
+
+    temporario = f"{store_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+
+    leitor = pd.read_csv(csv_path, dtype=SCHEMA, chunksize=LINHAS_POR_GRUPO)
+    blocos = ({c: _column_array(bloco[c], SCHEMA.get(c)) for c in bloco.columns} for bloco in leitor)
+    write_store(temporario, blocos, versao=sha256, origem={
+        'caminho': os.path.abspath(csv_path),
+        'tamanho': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256,
+    })
+
+    # Troca o cache antigo pelo novo; se outro processo já publicou um cache
+    # válido nesse meio tempo, o nosso é descartado.
+    antigo = f"{store_dir}.{os.getpid()}.old"
+    if os.path.isdir(store_dir):
+        if _is_fresh(store_dir, csv_path):
+            shutil.rmtree(temporario, ignore_errors=True)
+            return store_dir
+        os.replace(store_dir, antigo)
+    os.replace(temporario, store_dir)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return store_dir
+
+
+def ensure_store(csv_path: str = CAMINHO_CSV_PADRAO, store_dir: Optional[str] = None) -> str:
+    """Retorna o diretório do cache colunar, reconstruindo-o se estiver desatualizado."""
+    store_dir = store_dir or cache_dir_for(csv_path)
+    if not _is_fresh(store_dir, csv_path):
+        build_store(csv_path, store_dir)
+    return store_dir
+
+
+class Predicado(NamedTuple):
+    """Filtro de uma coluna: faixa inclusiva ``[minimo, maximo]`` ou, se ``valores``, pertinência."""
+    coluna: str
+    minimo: Optional[float]
+    maximo: Optional[float]
+    valores: Optional[Tuple[float, ...]] = None
+
+
+def predicates(filtros: Optional[Dict[str, Any]]) -> List[Predicado]:
+    """
+    Converte o estado dos widgets em predicados.
+
+    ``filtros`` mapeia coluna para uma tupla ``(mínimo, máximo)`` (limites inclusivos;
+    ``None`` deixa o lado aberto), para uma lista de valores aceitos ou para um valor
+    único (igualdade), como em ``{'Age': (30, 60), 'education_Graduation': [1]}``.
+    """
+    resultado = []
+    for coluna, filtro in (filtros or {}).items():
+        if isinstance(filtro, tuple):
+            minimo, maximo = filtro
+            resultado.append(Predicado(coluna, minimo, maximo))
+        else:
+            valores = tuple(sorted(set(filtro))) if isinstance(filtro, (list, set, frozenset)) else (filtro,)
+            resultado.append(Predicado(coluna, valores[0] if valores else None,
+                                       valores[-1] if valores else None, valores))
+    return resultado
+
+
+def may_match(estatistica: Optional[list], p: Predicado) -> bool:
+    """Se algum valor de um grupo com essas estatísticas pode satisfazer ``p``."""
+    minimo, maximo = estatistica[0], estatistica[1]
+    if minimo is None:
+        return False
+    if p.valores is not None:
+        return any(minimo <= v <= maximo for v in p.valores)
+    return (p.minimo is None or maximo >= p.minimo) and (p.maximo is None or minimo <= p.maximo)
+
+
+def all_match(estatistica: Optional[list], p: Predicado) -> bool:
+    """Se todas as linhas de um grupo com essas estatísticas satisfazem ``p``."""
+    minimo, maximo, nulos = estatistica
+    if minimo is None or nulos:
+        return False
+    if p.valores is not None:
+        return minimo == maximo and minimo in p.valores
+    return (p.minimo is None or minimo >= p.minimo) and (p.maximo is None or maximo <= p.maximo)
+
+
+def evaluate(valores: np.ndarray, p: Predicado) -> np.ndarray:
+    """Máscara das posições de ``valores`` que satisfazem ``p``."""
+    if p.valores is not None:
+        return np.isin(valores, p.valores)
+    selecao = np.ones(len(valores), dtype=bool) if p.minimo is None else valores >= p.minimo
+    if p.maximo is not None:
+        selecao &= valores <= p.maximo
+    return selecao
+
+
+class Plano(NamedTuple):
+    """Grupos de linhas lidos por uma consulta e o volume de dados tocado."""
+    grupos: List[int]
+    linhas: int
+    bytes_lidos: int
+    bytes_total: int
+
+
+class ColumnStore:
+    """
+    Visão somente leitura, mapeada em memória, de um cache colunar.
+
+    As colunas são ``np.memmap`` abertos sob demanda; filtros como
+    ``store.column('Income')`` + ``between`` rodam diretamente sobre as páginas
+    mapeadas e apenas as linhas selecionadas são materializadas.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.manifest = _read_manifest(store_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f"Cache colunar não encontrado em '{store_dir}'")
+        self._colunas = {c['nome']: c for c in self.manifest['colunas']}
+        self._mapas: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._colunas)
+
+    @property
+    def version(self) -> str:
+        """Identificador do conteúdo do cache; muda a cada reconstrução ou ingestão."""
+        return self.manifest['versao']
+
+    def __len__(self) -> int:
+        return self.manifest['linhas']
+
+    def column(self, nome: str) -> np.ndarray:
+        """Retorna a coluna como array somente leitura mapeado em memória."""
+        if nome not in self._colunas:
+            raise KeyError(f"Coluna inexistente no dataset: '{nome}'")
+        arr = self._mapas.get(nome)
+        if arr is None:
+            with self._lock:
+                arr = self._mapas.get(nome)
+                if arr is None:
+                    info = self._colunas[nome]
+                    dtype = np.dtype(info['dtype'])
+                    if len(self) == 0:
+                        arr = np.empty(0, dtype=dtype)
+                    else:
+                        arr = np.memmap(os.path.join(self.store_dir, info['arquivo']),
+                                        dtype=dtype, mode='r', shape=(len(self),))
+                    self._mapas[nome] = arr
+        return arr
+
+    def customer_ids(self, linhas: np.ndarray) -> np.ndarray:
+        """
+        Identificadores dos clientes nas ``linhas``: a coluna ``Customer_ID`` quando
+        o dataset a tem (ingestões com chave de cliente); senão a posição da linha.
+        """
+        if 'Customer_ID' in self._colunas:
+            return self.column('Customer_ID')[linhas]
+        return np.asarray(linhas)
+
+    def frame(self, columns: Optional[Iterable[str]] = None,
+              mask: Optional[np.ndarray] = None, dropna: bool = False) -> pd.DataFrame:
+        """
+        Monta um DataFrame com as colunas pedidas.
+
+        Sem ``mask`` (e sem linhas nulas a remover) o DataFrame apenas referencia os
+        arrays mapeados, sem cópia. Com ``mask`` somente as linhas selecionadas são
+        copiadas.
+
+        Parâmetros:
+          - columns (list, opcional): Colunas a incluir; por padrão todas.
+          - mask (np.ndarray, opcional): Máscara booleana de linhas.
+          - dropna (bool): Remove as linhas com valores nulos nas colunas pedidas.
+
+        Retorna:
+          - pd.DataFrame: DataFrame com os tipos compactos de ``SCHEMA``.
+        """
+        selecionadas = list(columns) if columns is not None else self.columns
+        arrays = {c: self.column(c) for c in selecionadas}
+
+        if dropna:
+            for arr in arrays.values():
+                if arr.dtype.kind == 'f':
+                    validos = ~np.isnan(arr)
+                    if not validos.all():
+                        mask = validos if mask is None else mask & validos
+
+        if mask is not None:
+            arrays = {c: arr[mask] for c, arr in arrays.items()}
+        return pd.DataFrame(arrays, columns=selecionadas, copy=False)
+
+    def plan(self, columns: Optional[Iterable[str]] = None,
+             filtros: Optional[Dict[str, Any]] = None) -> Plano:
+        """
+        Grupos de linhas que ``query`` precisa ler: os demais têm mínimo/máximo
+        incompatíveis com algum predicado. Os bytes contam só as colunas pedidas e
+        as dos predicados.
+        """
+        predicados = predicates(filtros)
+        selecionadas = list(columns) if columns is not None else self.columns
+        for coluna in selecionadas + [p.coluna for p in predicados]:
+            if coluna not in self._colunas:
+                raise KeyError(f"Coluna inexistente no dataset: '{coluna}'")
+
+        largura = sum(np.dtype(self._colunas[c]['dtype']).itemsize
+                      for c in set(selecionadas) | {p.coluna for p in predicados})
+        grupos = [i for i, g in enumerate(self.manifest['grupos'])
+                  if g['linhas'] and all(may_match(g['estatisticas'][p.coluna], p) for p in predicados)]
+        linhas = sum(self.manifest['grupos'][i]['linhas'] for i in grupos)
+        return Plano(grupos, linhas, linhas * largura, len(self) * largura)
+
+    def query(self, columns: Optional[Iterable[str]] = None, filtros: Optional[Dict[str, Any]] = None,
+              dropna: bool = False) -> pd.DataFrame:
+        """
+        Lê só as linhas que atendem a ``filtros`` e só as colunas pedidas.
+
+        Os predicados são avaliados grupo a grupo: grupos excluídos pelas
+        estatísticas não são lidos, e predicados que todas as linhas de um grupo
+        atendem não são reavaliados. Sem filtros equivale a ``frame``.
+
+        Parâmetros:
+          - columns (list, opcional): Colunas a incluir; por padrão todas.
+          - filtros (dict, opcional): Estado dos widgets, no formato de ``predicates``.
+          - dropna (bool): Remove as linhas com valores nulos nas colunas pedidas.
+
+        Retorna:
+          - pd.DataFrame: Linhas selecionadas, com os tipos compactos de ``SCHEMA``.
+        """
+        selecionadas = list(columns) if columns is not None else self.columns
+        predicados = predicates(filtros)
+        if not predicados:
+            return self.frame(selecionadas, dropna=dropna)
+
+        # Máscara global preenchida só nos grupos lidos; as colunas pedidas são
+        # depois coletadas de uma vez, tocando apenas as páginas das linhas escolhidas
+        mascara = np.zeros(len(self), dtype=bool)
+        for i in self.plan(selecionadas, filtros).grupos:
+            grupo = self.manifest['grupos'][i]
+            inicio, fim = grupo['inicio'], grupo['inicio'] + grupo['linhas']
+            estatisticas = grupo['estatisticas']
+            selecao = None
+            for p in predicados:
+                if not all_match(estatisticas[p.coluna], p):
+                    parcial = evaluate(self.column(p.coluna)[inicio:fim], p)
+                    selecao = parcial if selecao is None else selecao & parcial
+            if dropna:
+                for c in selecionadas:
+                    if estatisticas[c][2]:
+                        validos = ~np.isnan(self.column(c)[inicio:fim])
+                        selecao = validos if selecao is None else selecao & validos
+            mascara[inicio:fim] = True if selecao is None else selecao
+
+        linhas = np.flatnonzero(mascara)
+        return pd.DataFrame({c: self.column(c)[linhas] for c in selecionadas}, columns=selecionadas, copy=False)
+
+
+# Um ColumnStore por diretório de cache, compartilhado por todas as sessões do processo
+_STORES: Dict[str, ColumnStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(csv_path: str = CAMINHO_CSV_PADRAO) -> ColumnStore:
+    """
+    Retorna o ``ColumnStore`` do CSV, reconstruindo o cache se estiver desatualizado.
+
+    A instância é reaproveitada entre sessões enquanto o cache não mudar; a
+    verificação de validade custa apenas um ``os.stat`` por chamada.
+    """
+    with _STORES_LOCK:
+        store_dir = ensure_store(csv_path)
+        store = _STORES.get(store_dir)
+        manifest = _read_manifest(store_dir)
+        if store is None or store.version != manifest['versao']:
+            store = ColumnStore(store_dir)
+            _STORES[store_dir] = store
+        return store
+
+
+def _copiar_coluna(store_dir: str, info: dict, n: int, linhas: np.ndarray,
+                   valores: np.ndarray, destino: str) -> None:
+    """Grava ``destino`` com as ``n`` linhas da coluna e ``valores`` nas posições ``linhas``."""
+    caminho = os.path.join(store_dir, destino)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    shutil.copyfile(os.path.join(store_dir, info['arquivo']), temporario)
+    os.truncate(temporario, n * np.dtype(info['dtype']).itemsize)
+    mapa = np.memmap(temporario, dtype=np.dtype(info['dtype']), mode='r+', shape=(n,))
+    mapa[linhas] = valores
+    mapa.flush()
+    del mapa
+    os.replace(temporario, caminho)
+
+
+def append_rows(csv_path: str, novos: pd.DataFrame,
+                chave: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, str, str]:
+    """
+    Anexa linhas ao cache colunar sem reprocessar o CSV de origem.
+
+    Com ``chave``, as linhas cuja chave já existe no cache são substituídas
+    (clientes alterados) e apenas as demais são anexadas (clientes novos).
+    As linhas precisam estar validadas e com os tipos de ``SCHEMA``.
+
+    Os arquivos mapeados por leitores da versão anterior não mudam: as colunas
+    com linhas substituídas são copiadas para um arquivo novo (o antigo é
+    removido na ingestão seguinte), e os anexos vão depois das ``linhas`` do
+    manifesto, com o arquivo antes truncado nesse tamanho para descartar bytes de
+    uma ingestão interrompida antes de gravar o manifesto.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado (origem do cache).
+      - novos (pd.DataFrame): Linhas novas ou alteradas.
+      - chave (str, opcional): Coluna que identifica o cliente.
+
+    Retorna:
+      - tuple: (linhas gravadas, valores antigos das linhas sobrescritas,
+        versão anterior, versão nova).
+    """
+    with _STORES_LOCK:
+        store_dir = ensure_store(csv_path)
+        manifest = _read_manifest(store_dir)
+        colunas = manifest['colunas']
+        nomes = [c['nome'] for c in colunas]
+        ausentes = [c for c in nomes if c not in novos.columns]
+        if ausentes:
+            raise ValueError(f"Colunas ausentes nas linhas a anexar: {ausentes}")
+        novos = novos[nomes].reset_index(drop=True)
+        n = manifest['linhas']
+        incremento = len(manifest['incrementos']) + 1
+
+        # Arquivos substituídos na ingestão anterior: sessões daquela versão já
+        # passaram um intervalo inteiro entre ingestões para abrir a atual
+        for arquivo in manifest.pop('obsoletos', []):
+            if os.path.exists(os.path.join(store_dir, arquivo)):
+                os.remove(os.path.join(store_dir, arquivo))
+        obsoletos = []
+
+        antigos = pd.DataFrame({c: pd.Series(dtype=info['dtype']) for c, info in zip(nomes, colunas)})
+        existentes = np.zeros(len(novos), dtype=bool)
+        if chave is not None and n > 0:
+            store = ColumnStore(store_dir)
+            chaves = store.column(chave)
+            ordem = np.argsort(chaves, kind='stable')
+            posicoes = np.searchsorted(chaves[ordem], novos[chave].to_numpy())
+            posicoes = np.minimum(posicoes, n - 1)
+            existentes = chaves[ordem][posicoes] == novos[chave].to_numpy()
+            linhas = ordem[posicoes[existentes]]
+            if len(linhas):
+                antigos = pd.DataFrame({c: store.column(c)[linhas] for c in nomes})
+                for info in colunas:
+                    valores = novos.loc[existentes, info['nome']].to_numpy(dtype=info['dtype'])
+                    if np.array_equal(antigos[info['nome']].to_numpy(), valores, equal_nan=True):
+                        continue
+                    destino = f"{info['arquivo'].split('.')[0]}.{incremento}.bin"
+                    _copiar_coluna(store_dir, info, n, linhas, valores, destino)
+                    obsoletos.append(info['arquivo'])
+                    info['arquivo'] = destino
+                # Os grupos das linhas sobrescritas passam a cobrir também os valores novos
+                inicios = np.array([g['inicio'] for g in manifest['grupos']])
+                indices = np.searchsorted(inicios, linhas, side='right') - 1
+                sobrescritos = novos[existentes]
+                for g in np.unique(indices):
+                    no_grupo = sobrescritos[indices == g]
+                    merge_stats(manifest['grupos'][g]['estatisticas'],
+                             column_stats({info['nome']: no_grupo[info['nome']].to_numpy(dtype=info['dtype'])
+                                            for info in colunas}))
+
+        anexados = novos[~existentes]
+        for info in colunas:
+            with open(os.path.join(store_dir, info['arquivo']), 'r+b') as f:
+                f.truncate(n * np.dtype(info['dtype']).itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(anexados[info['nome']].to_numpy(), dtype=info['dtype']).tobytes())
+
+        versao_anterior = manifest['versao']
+        conteudo = pd.util.hash_pandas_object(novos, index=False).to_numpy().tobytes()
+        manifest['versao'] = hashlib.sha256(versao_anterior.encode() + conteudo).hexdigest()
+        for inicio in range(0, len(anexados), LINHAS_POR_GRUPO):
+            bloco = anexados.iloc[inicio:inicio + LINHAS_POR_GRUPO]
+            manifest['grupos'].append({
+                'inicio': n + inicio, 'linhas': len(bloco),
+                'estatisticas': column_stats({info['nome']: bloco[info['nome']].to_numpy(dtype=info['dtype'])
+                                               for info in colunas}),
+            })
+        manifest['linhas'] = n + len(anexados)
+        manifest['incrementos'].append({'anexadas': len(anexados), 'atualizadas': int(existentes.sum()),
+                                        'versao': manifest['versao']})
+        if obsoletos:
+            manifest['obsoletos'] = obsoletos
+        _write_manifest(store_dir, manifest)
+        return novos, antigos, versao_anterior, manifest['versao']
+
+
+def load_frame(csv_path: str = CAMINHO_CSV_PADRAO,
+               columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Carrega o dataset processado a partir do cache colunar.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado (origem do cache).
+      - columns (list, opcional): Colunas a carregar; por padrão todas.
+
+    Retorna:
+      - pd.DataFrame: DataFrame apoiado nos arrays mapeados em memória.
+    """
+    return open_store(csv_path).frame(columns)
+
+
+def query(csv_path: str = CAMINHO_CSV_PADRAO, columns: Optional[Iterable[str]] = None,
+          filtros: Optional[Dict[str, Any]] = None, dropna: bool = False) -> pd.DataFrame:
+    """
+    Carrega só as linhas que atendem a ``filtros`` e só as colunas pedidas,
+    pulando os grupos de linhas que as estatísticas do manifesto excluem.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado (origem do cache).
+      - columns (list, opcional): Colunas a carregar; por padrão todas.
+      - filtros (dict, opcional): ``coluna -> (mínimo, máximo)``, lista de valores ou valor único.
+      - dropna (bool): Remove as linhas com valores nulos nas colunas pedidas.
+
+    Retorna:
+      - pd.DataFrame: Linhas selecionadas.
+    """
+    return open_store(csv_path).query(columns, filtros, dropna)
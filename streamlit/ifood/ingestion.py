@@ -0,0 +1,150 @@
+"""
+Ingestão incremental de clientes novos ou alterados.
+
+Em vez de reprocessar todo o histórico (``carregar_dados`` → ... → ``salvar_dados``),
+apenas o arquivo delta passa pelas etapas de validação e conversão de tipos do
+notebook de tratamento. As linhas são então anexadas ao cache colunar, e os cubos
+de agregados, a grade de co-momentos, a matriz de campanhas, as amostras da
+prévia rápida, as partições por gasto x renda e o banco SQLite dos scripts de
+``sql/`` gravados são atualizados no lugar.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.ingestion caminho/do/delta.csv [--chave Customer_ID]
+"""
+
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ifood import aggregates, campaigns, correlations, data_layer, partitions, sampling, sql_engine
+from ifood.cleaning import (
+    COLUNAS_A_VERIFICAR,
+    carregar_dados,
+    detectar_valores_duplicados,
+    modificar_tipo_colunas,
+    verificar_colunas_numericas,
+    verificar_valores_ausentes,
+)
+
+
+def _verificar_limites(df: pd.DataFrame, colunas_tipos: Dict[str, str]) -> List[str]:
+    """Lista as colunas inteiras com valores fora do intervalo do tipo de destino."""
+    fora = []
+    for coluna, tipo in colunas_tipos.items():
+        dtype = np.dtype(tipo)
+        if dtype.kind in 'iu':
+            limites = np.iinfo(dtype)
+            valores = pd.to_numeric(df[coluna])
+            if valores.min() < limites.min or valores.max() > limites.max:
+                fora.append(coluna)
+    return fora
+
+
+def validar_delta(delta: pd.DataFrame, colunas: List[str],
+                  chave: Optional[str] = None) -> pd.DataFrame:
+    """
+    Valida e converte os tipos de um delta antes da ingestão.
+
+    Parâmetros:
+      - delta (pd.DataFrame): Linhas novas ou alteradas.
+      - colunas (list): Colunas esperadas (as do cache colunar).
+      - chave (str, opcional): Coluna que identifica o cliente; se houver mais de
+        uma linha para a mesma chave, vale a última.
+
+    Retorna:
+      - pd.DataFrame: Delta validado, sem duplicatas e com os tipos de ``SCHEMA``.
+    """
+    ausentes = [c for c in colunas if c not in delta.columns]
+    if ausentes:
+        raise ValueError(f"Colunas ausentes no delta: {ausentes}")
+    delta = delta[colunas]
+
+    resultado, inconsistencias = verificar_colunas_numericas(
+        delta, [c for c in COLUNAS_A_VERIFICAR if c in delta.columns])
+    if not inconsistencias.empty:
+        raise ValueError(f"Valores não numéricos no delta:\n{inconsistencias.head(20)}")
+
+    colunas_tipos = {c: data_layer.SCHEMA[c] for c in colunas if c in data_layer.SCHEMA}
+    tabela_ausentes = verificar_valores_ausentes(delta)
+    obrigatorias = [c for c in tabela_ausentes.index if np.dtype(colunas_tipos.get(c, 'f8')).kind != 'f']
+    if obrigatorias:
+        raise ValueError(f"Valores ausentes em colunas inteiras do delta: {obrigatorias}")
+
+    fora = _verificar_limites(delta, colunas_tipos)
+    if fora:
+        raise ValueError(f"Valores fora do intervalo do tipo compacto nas colunas: {fora}")
+
+    if not detectar_valores_duplicados(delta).empty:
+        delta = delta.drop_duplicates()
+    if chave is not None:
+        delta = delta.drop_duplicates(subset=[chave], keep='last')
+
+    delta = modificar_tipo_colunas(delta.copy(), colunas_tipos)
+    nao_convertidas = [c for c, t in colunas_tipos.items() if delta[c].dtype != np.dtype(t)]
+    if nao_convertidas:
+        raise ValueError(f"Não foi possível converter as colunas: {nao_convertidas}")
+    return delta
+
+
+def ingerir_delta(caminho_delta: str, csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                  chave: Optional[str] = None) -> dict:
+    """
+    Ingere um arquivo delta no cache colunar e atualiza os cubos, a grade de
+    co-momentos, a matriz de campanhas, as amostras, as partições e o banco SQLite
+    gravados.
+
+    Parâmetros:
+      - caminho_delta (str): CSV com clientes novos ou alterados (mesmas colunas do processado).
+      - csv_path (str): Caminho do CSV processado (origem do cache).
+      - chave (str, opcional): Coluna que identifica o cliente para atualizações.
+
+    Retorna:
+      - dict: Resumo da ingestão.
+    """
+    store = data_layer.open_store(csv_path)
+    if chave is not None and chave not in store.columns:
+        raise ValueError(f"Coluna chave '{chave}' não existe no dataset processado.")
+
+    delta = carregar_dados(caminho_delta)
+    recebidas = len(delta)
+    delta = validar_delta(delta, store.columns, chave)
+
+    gravadas, antigas, versao_anterior, versao_nova = data_layer.append_rows(csv_path, delta, chave)
+    cubos = aggregates.update_cubes(store.store_dir, versao_anterior, versao_nova, gravadas, antigas)
+    grade = correlations.update_grid(store.store_dir, versao_anterior, versao_nova, gravadas, antigas)
+    matriz = campaigns.update_matrix(store.store_dir, versao_anterior, versao_nova, gravadas, antigas)
+    amostras = sampling.update_samples(store.store_dir, versao_anterior, versao_nova, len(antigas))
+    particoes = partitions.update_partitions(store.store_dir, versao_anterior, versao_nova, gravadas, antigas)
+    banco = sql_engine.update_database(store.store_dir, versao_anterior, versao_nova, gravadas, antigas, chave)
+
+    return {
+        'linhas_recebidas': recebidas,
+        'linhas_descartadas': recebidas - len(delta),
+        'linhas_anexadas': len(gravadas) - len(antigas),
+        'linhas_atualizadas': len(antigas),
+        'cubos_atualizados': [nome for nome, ok in cubos.items() if ok],
+        'grade_comomentos_atualizada': bool(grade),
+        'matriz_campanhas_atualizada': bool(matriz),
+        'amostras_atualizadas': [nome for nome, ok in amostras.items() if ok],
+        'particoes_atualizadas': bool(particoes),
+        'banco_sql_atualizado': bool(banco),
+        'versao': versao_nova,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestão incremental de clientes no cache colunar.")
+    parser.add_argument('delta', help="CSV com clientes novos ou alterados")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado de origem")
+    parser.add_argument('--chave', default=None, help="Coluna que identifica o cliente")
+    args = parser.parse_args()
+
+    resumo = ingerir_delta(args.delta, args.csv, args.chave)
+    for campo, valor in resumo.items():
+        print(f"- {campo}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Instrumentação das etapas dos dashboards.
+
+Cada etapa (carga, agrupamento, montagem de figura, renderização...) registra o
+tempo de parede, o número de linhas de entrada/saída e a memória residente do
+processo. Os registros de cada rerun ficam disponíveis:
+
+  - no painel de depuração da barra lateral (``render_debug_panel``), exibido
+    quando a URL tem ``?debug=1`` ou a variável ``IFOOD_DEBUG=1`` está definida;
+  - como logs estruturados (uma linha JSON por etapa, logger ``ifood.perf``),
+    ativados por ``IFOOD_PERF_LOG=stderr`` ou ``IFOOD_PERF_LOG=caminho/do/arquivo``.
+
+Uso:
+    @timed()
+    def load_data(path): ...
+
+    with stage('render_scatter'):
+        st.plotly_chart(fig)
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger('ifood.perf')
+logger.propagate = False
+
+
+def _configurar_log() -> None:
+    destino = os.environ.get('IFOOD_PERF_LOG')
+    if not destino or destino == '0' or logger.handlers:
+        return
+    handler = logging.StreamHandler() if destino in ('1', 'stderr') else logging.FileHandler(destino, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+_configurar_log()
+
+# Registros do rerun em andamento; cada sessão do Streamlit roda o script em sua própria thread
+_estado = threading.local()
+
+# Limite de etapas guardadas por thread (fora do Streamlit não há reruns para reiniciar a lista)
+MAX_ETAPAS = 500
+
+
+def _rss_mb() -> Optional[float]:
+    """Memória residente atual do processo (MB)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            # Fora do Linux só há o pico (em KB no Linux/BSD, bytes no macOS)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except ImportError:
+            return None
+
+
+def _linhas(obj) -> Optional[int]:
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, tuple) and obj and isinstance(obj[0], (pd.DataFrame, pd.Series)):
+        return len(obj[0])
+    return None
+
+
+def start_rerun(pagina: str) -> str:
+    """Inicia o registro de um novo rerun; retorna seu identificador."""
+    _estado.rerun = uuid.uuid4().hex[:8]
+    _estado.pagina = pagina
+    _estado.etapas = []
+    _estado.nivel = 0
+    return _estado.rerun
+
+
+def records() -> List[dict]:
+    """Etapas registradas no rerun atual desta thread."""
+    return list(getattr(_estado, 'etapas', []))
+
+
+@contextmanager
+def stage(nome: str, linhas: Optional[int] = None):
+    """
+    Mede o bloco como uma etapa. O dicionário devolvido pode receber
+    ``linhas_saida`` (ou outros campos) dentro do bloco.
+    """
+    if not hasattr(_estado, 'etapas'):
+        start_rerun('')
+    registro = {'etapa': nome, 'nivel': _estado.nivel, 'linhas': linhas, 'linhas_saida': None}
+    rss_inicio = _rss_mb()
+    inicio = time.perf_counter()
+    _estado.nivel += 1
+    if len(_estado.etapas) >= MAX_ETAPAS:
+        del _estado.etapas[:len(_estado.etapas) - MAX_ETAPAS + 1]
+    _estado.etapas.append(registro)
+    try:
+        yield registro
+    finally:
+        _estado.nivel -= 1
+        rss_fim = _rss_mb()
+        registro['tempo_ms'] = (time.perf_counter() - inicio) * 1000
+        registro['rss_mb'] = rss_fim
+        registro['delta_rss_mb'] = rss_fim - rss_inicio if rss_fim is not None and rss_inicio is not None else None
+        if logger.handlers:
+            logger.info(json.dumps({'evento': 'etapa', 'rerun': _estado.rerun, 'pagina': _estado.pagina,
+                                    'pid': os.getpid(), **registro}, default=str))
+
+
+def timed(nome: Optional[str] = None) -> Callable:
+    """Decorador que mede cada chamada da função como uma etapa."""
+    def decorador(funcao: Callable) -> Callable:
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            entrada = next((_linhas(a) for a in list(args) + list(kwargs.values()) if _linhas(a) is not None), None)
+            with stage(nome or funcao.__name__, entrada) as registro:
+                resultado = funcao(*args, **kwargs)
+                registro['linhas_saida'] = _linhas(resultado)
+                return resultado
+        return envoltorio
+    return decorador
+
+
+def debug_enabled() -> bool:
+    """Indica se o painel de depuração deve ser exibido."""
+    if os.environ.get('IFOOD_DEBUG') == '1':
+        return True
+    try:
+        import streamlit as st
+        return st.query_params.get('debug') == '1'
+    except Exception:
+        return False
+
+
+def render_debug_panel() -> None:
+    """Exibe na barra lateral as etapas do rerun atual (se a depuração estiver ativa)."""
+    if not debug_enabled():
+        return
+    import streamlit as st
+
+    etapas = records()
+    with st.sidebar.expander("⏱️ Tempos desta execução", expanded=True):
+        if not etapas:
+            st.write("Nenhuma etapa registrada.")
+            return
+        tabela = pd.DataFrame(etapas)
+        tabela['etapa'] = ['  ' * n + ('↳ ' if n else '') + e for n, e in zip(tabela['nivel'], tabela['etapa'])]
+        total = tabela.loc[tabela['nivel'] == 0, 'tempo_ms'].sum()
+        st.caption(f"Rerun {getattr(_estado, 'rerun', '')} · {total:.0f} ms em etapas medidas")
+        st.dataframe(tabela[['etapa', 'tempo_ms', 'linhas', 'linhas_saida', 'delta_rss_mb', 'rss_mb']]
+                     .round(1), hide_index=True, use_container_width=True)
+
+        from ifood.result_cache import RESULTADOS
+        cache = RESULTADOS.stats()
+        taxa = f"{cache['taxa_acerto']:.0%}" if cache['taxa_acerto'] is not None else '-'
+        st.caption(f"Cache de resultados: {cache['itens']} itens, {cache['mb']:.1f}/{cache['max_mb']:.0f} MB · "
+                   f"acertos {cache['acertos']} · faltas {cache['faltas']} ({taxa}) · descartes {cache['descartes']}")
@@ -0,0 +1,383 @@
+"""
+Layout particionado do dataset processado, seguindo ``sql/optimization_examples``.
+
+``segmentacao_por_categoria.sql`` propõe particionar a tabela por faixa de
+``MntTotal`` (menos de 500, de 500 a 1500, 1500 ou mais) e ``clientes_alto_valor.sql``
+um índice composto em ``(Income, MntTotal)``. Aqui o cache colunar é regravado em
+partições por faixa de gasto x faixa de renda; dentro de cada partição as linhas
+ficam ordenadas por ``Income`` e ``MntTotal``.
+
+Cada partição é um cache colunar completo (``data_layer.ColumnStore``), com o
+mínimo, o máximo e a presença de nulos de cada coluna por grupo de linhas, e o
+manifesto das partições guarda as mesmas estatísticas por partição (o índice de
+mín./máx.). Uma consulta descarta primeiro as partições inteiras cujo índice
+exclui algum predicado e, nas restantes, os grupos de linhas fora da faixa; como
+as linhas estão ordenadas por renda, uma faixa de renda estreita lê poucos grupos.
+Os índices de ``filtragem_por_comportamento.sql`` (canais de compra) entram como
+estatísticas de cada partição e grupo.
+
+O layout fica em ``<cache>/particoes/``, junto com a versão do dataset. A ingestão
+incremental (``update_partitions``) regrava só as partições que receberam ou
+perderam linhas; o layout inteiro é gravado na subida do servidor ou pela linha
+de comando. ``reader_for`` escolhe entre as partições e o cache original conforme
+os filtros, sem regravar nada durante a consulta.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.partitions
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from ifood import data_layer
+
+# Limites das faixas (como em ``VALUES LESS THAN``) e nomes das partições
+LIMITES_GASTO = [500, 1500]
+NOMES_GASTO = ['gasto_baixo', 'gasto_medio', 'gasto_alto']
+LIMITES_RENDA = [30000, 60000, 90000]
+NOMES_RENDA = ['renda_baixa', 'renda_media', 'renda_alta', 'renda_muito_alta', 'renda_ausente']
+
+# Colunas que definem as partições; filtros sobre elas são os que mais descartam dados
+CHAVES = ['MntTotal', 'Income']
+
+# Posição de cada linha no cache original, gravada como coluna extra em cada partição
+COLUNA_POSICAO = 'posicao_original'
+
+
+def particoes_dir(store_dir: str) -> str:
+    """Diretório do layout particionado de um cache colunar."""
+    return os.path.join(store_dir, 'particoes')
+
+
+def partition_ids(gasto: np.ndarray, renda: np.ndarray) -> np.ndarray:
+    """Partição (faixa de gasto x faixa de renda) de cada linha; renda nula tem faixa própria."""
+    faixa_gasto = np.searchsorted(LIMITES_GASTO, gasto, side='right')
+    faixa_renda = np.searchsorted(LIMITES_RENDA, renda, side='left')
+    faixa_renda[np.isnan(renda)] = len(NOMES_RENDA) - 1
+    return faixa_gasto * len(NOMES_RENDA) + faixa_renda
+
+
+def _nome_particao(k: int) -> str:
+    return f"{NOMES_GASTO[k // len(NOMES_RENDA)]}__{NOMES_RENDA[k % len(NOMES_RENDA)]}"
+
+
+def _ordenar(gasto: np.ndarray, renda: np.ndarray, linhas: np.ndarray) -> np.ndarray:
+    """Linhas de uma partição ordenadas por renda e gasto."""
+    return linhas[np.lexsort((gasto[linhas], renda[linhas]))]
+
+
+def _gravar_particao(store: data_layer.ColumnStore, linhas: np.ndarray, k: int,
+                     destino: str, diretorio: str) -> dict:
+    """Grava as ``linhas`` (já ordenadas) da partição ``k`` e retorna sua entrada no manifesto."""
+    tipos = {c: store.column(c).dtype.str for c in store.columns}
+    tipos[COLUNA_POSICAO] = np.dtype(np.int64).str
+    blocos = ({**{c: store.column(c)[lote] for c in store.columns}, COLUNA_POSICAO: lote}
+              for lote in (linhas[i:i + data_layer.LINHAS_POR_GRUPO]
+                           for i in range(0, len(linhas), data_layer.LINHAS_POR_GRUPO)))
+    manifest = data_layer.write_store(os.path.join(destino, diretorio), blocos, tipos, versao=store.version)
+    estatisticas: Dict[str, list] = {}
+    for grupo in manifest['grupos']:
+        data_layer.merge_stats(estatisticas, grupo['estatisticas'])
+    return {
+        'nome': _nome_particao(k),
+        'diretorio': diretorio,
+        'linhas': len(linhas),
+        'estatisticas': estatisticas,
+    }
+
+
+def _gravar_manifesto(destino: str, manifest: dict) -> None:
+    caminho = os.path.join(destino, 'manifest.json')
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def build_partitions(store: data_layer.ColumnStore, destino: str) -> dict:
+    """
+    Grava o layout particionado de ``store`` em ``destino``.
+
+    Parâmetros:
+      - store (ColumnStore): Cache colunar do dataset.
+      - destino (str): Diretório a criar.
+
+    Retorna:
+      - dict: Manifesto das partições.
+    """
+    gasto, renda = store.column('MntTotal'), store.column('Income')
+    particao = partition_ids(gasto, renda)
+    # Uma única ordenação agrupa as partições e ordena cada uma por renda e gasto
+    ordem = np.lexsort((gasto, renda, particao))
+    limites = np.concatenate([[0], np.cumsum(np.bincount(particao, minlength=len(NOMES_GASTO) * len(NOMES_RENDA)))])
+
+    particoes = [_gravar_particao(store, ordem[limites[k]:limites[k + 1]], k, destino, f'p{k:02d}')
+                 for k in range(len(limites) - 1) if limites[k + 1] > limites[k]]
+
+    manifest = {
+        'versao': store.version,
+        'linhas': len(store),
+        'chaves': {'MntTotal': LIMITES_GASTO, 'Income': LIMITES_RENDA},
+        'ordenacao': ['Income', 'MntTotal'],
+        'particoes': particoes,
+    }
+    os.makedirs(destino, exist_ok=True)
+    _gravar_manifesto(destino, manifest)
+    return manifest
+
+
+def _ler_manifesto(diretorio: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(diretorio, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def refresh_partitions(store: data_layer.ColumnStore) -> str:
+    """
+    Regrava as partições da versão atual e as publica em ``particoes_dir``
+    (troca atômica do diretório). Retorna o diretório publicado.
+    """
+    destino = particoes_dir(store.store_dir)
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    build_partitions(store, temporario)
+
+    antigo = f"{destino}.{os.getpid()}.old"
+    if os.path.isdir(destino):
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return destino
+
+
+def update_partitions(store_dir: str, versao_anterior: str, versao_nova: str,
+                      inseridos: pd.DataFrame, removidos: pd.DataFrame) -> Optional[bool]:
+    """
+    Atualiza o layout gravado após uma ingestão incremental. Só as partições das
+    linhas inseridas e dos valores antigos das substituídas são regravadas (com as
+    linhas ordenadas de novo), cada uma num diretório novo; as demais continuam
+    valendo, porque anexos e substituições não mudam a posição das outras linhas.
+    Os diretórios substituídos são removidos na ingestão seguinte, como os arquivos
+    de ``data_layer.append_rows``, para não sumir sob leitores da versão anterior.
+
+    Parâmetros:
+      - store_dir (str): Diretório do cache colunar.
+      - versao_anterior (str): Versão do dataset antes da ingestão.
+      - versao_nova (str): Versão do dataset após a ingestão.
+      - inseridos (pd.DataFrame): Linhas gravadas (novas ou substitutas).
+      - removidos (pd.DataFrame): Valores antigos das linhas substituídas.
+
+    Retorna:
+      - bool ou None: ``True`` se atualizado, ``None`` se não havia layout gravado.
+        Um layout de outra versão é regravado inteiro aqui, e não na primeira consulta.
+    """
+    destino = particoes_dir(store_dir)
+    manifest = _ler_manifesto(destino)
+    if manifest is None:
+        return None
+    store = data_layer.ColumnStore(store_dir)
+    if manifest.get('versao') != versao_anterior or store.version != versao_nova:
+        refresh_partitions(store)
+        return True
+
+    for diretorio in manifest.pop('obsoletos', []):
+        shutil.rmtree(os.path.join(destino, diretorio), ignore_errors=True)
+    afetadas = np.unique(np.concatenate([
+        partition_ids(linhas['MntTotal'].to_numpy(dtype=float), linhas['Income'].to_numpy(dtype=float))
+        for linhas in (inseridos, removidos)]))
+
+    gasto, renda = store.column('MntTotal'), store.column('Income')
+    particao = partition_ids(gasto, renda)
+    incremento = len(store.manifest['incrementos'])
+    atuais = {p['nome']: p for p in manifest['particoes']}
+    obsoletos = []
+    for k in afetadas:
+        nome = _nome_particao(k)
+        if nome in atuais:
+            obsoletos.append(atuais.pop(nome)['diretorio'])
+        linhas = np.flatnonzero(particao == k)
+        if len(linhas):
+            atuais[nome] = _gravar_particao(store, _ordenar(gasto, renda, linhas), k,
+                                            destino, f'p{k:02d}.{incremento}')
+
+    ordem = [_nome_particao(k) for k in range(len(NOMES_GASTO) * len(NOMES_RENDA))]
+    manifest['particoes'] = [atuais[nome] for nome in ordem if nome in atuais]
+    manifest['versao'] = versao_nova
+    manifest['linhas'] = len(store)
+    if obsoletos:
+        manifest['obsoletos'] = obsoletos
+    _gravar_manifesto(destino, manifest)
+    return True
+
+
+class PartitionedStore:
+    """
+    Visão somente leitura das partições, com a mesma interface de consulta
+    (``plan``/``query``) do ``ColumnStore``. As linhas saem agrupadas por partição,
+    não na ordem do cache original; ``posicoes=True`` devolve essa ordem no índice.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self.manifest = _ler_manifesto(diretorio)
+        if self.manifest is None:
+            raise FileNotFoundError(f"Partições não encontradas em '{diretorio}'")
+        self.particoes = [data_layer.ColumnStore(os.path.join(diretorio, p['diretorio']))
+                          for p in self.manifest['particoes']]
+
+    @property
+    def version(self) -> str:
+        return self.manifest['versao']
+
+    @property
+    def columns(self) -> List[str]:
+        return [c for c in self.particoes[0].columns if c != COLUNA_POSICAO] if self.particoes else []
+
+    def __len__(self) -> int:
+        return self.manifest['linhas']
+
+    def partitions(self, filtros: Optional[Dict[str, Any]] = None) -> List[int]:
+        """Índices das partições que o índice de mín./máx. não descarta."""
+        predicados = data_layer.predicates(filtros)
+        return [i for i, p in enumerate(self.manifest['particoes'])
+                if all(data_layer.may_match(p['estatisticas'][q.coluna], q) for q in predicados)]
+
+    def plan(self, columns: Optional[List[str]] = None,
+             filtros: Optional[Dict[str, Any]] = None) -> data_layer.Plano:
+        """Partições lidas por ``query`` e o volume de dados tocado nelas (já sem os grupos descartados)."""
+        columns = list(columns) if columns is not None else self.columns
+        lidas = self.partitions(filtros)
+        planos = [self.particoes[i].plan(columns, filtros) for i in lidas]
+        total = sum(p.plan(columns).bytes_total for p in self.particoes)
+        return data_layer.Plano(lidas, sum(p.linhas for p in planos), sum(p.bytes_lidos for p in planos), total)
+
+    def query(self, columns: Optional[List[str]] = None, filtros: Optional[Dict[str, Any]] = None,
+              dropna: bool = False, posicoes: bool = False) -> pd.DataFrame:
+        """
+        Lê só as partições e os grupos de linhas que podem atender a ``filtros``.
+
+        Parâmetros:
+          - columns (list, opcional): Colunas a incluir; por padrão todas.
+          - filtros (dict, opcional): Estado dos widgets, no formato de ``data_layer.predicates``.
+          - dropna (bool): Remove as linhas com valores nulos nas colunas pedidas.
+          - posicoes (bool): Usa as posições no cache original como índice.
+
+        Retorna:
+          - pd.DataFrame: Linhas selecionadas, agrupadas por partição.
+        """
+        selecionadas = list(columns) if columns is not None else self.columns
+        pedidas = selecionadas + [COLUNA_POSICAO] if posicoes else selecionadas
+        partes = [self.particoes[i].query(pedidas, filtros, dropna) for i in self.partitions(filtros)]
+        if partes:
+            df = pd.concat(partes, ignore_index=True)
+        else:
+            df = pd.DataFrame({c: self.particoes[0].column(c)[:0] for c in pedidas}, columns=pedidas)
+        if posicoes:
+            df = df.set_index(COLUNA_POSICAO).rename_axis(None)
+        return df
+
+
+# Partições abertas por diretório do cache, compartilhadas pelas sessões do processo
+_PARTICOES: Dict[str, PartitionedStore] = {}
+_LOCK = threading.Lock()
+
+
+def open_partitions(store: data_layer.ColumnStore) -> PartitionedStore:
+    """
+    Partições da versão atual de ``store``, abertas da memória do processo, do
+    diretório gravado ou regravadas.
+    """
+    with _LOCK:
+        particionado = _PARTICOES.get(store.store_dir)
+        if particionado is not None and particionado.version == store.version:
+            return particionado
+
+        manifest = _ler_manifesto(particoes_dir(store.store_dir))
+        if manifest is None or manifest.get('versao') != store.version:
+            refresh_partitions(store)
+        particionado = PartitionedStore(particoes_dir(store.store_dir))
+        _PARTICOES[store.store_dir] = particionado
+        return particionado
+
+
+def _particoes_publicadas(store: data_layer.ColumnStore) -> Optional[PartitionedStore]:
+    """Partições já gravadas para a versão atual de ``store``, sem regravá-las."""
+    with _LOCK:
+        particionado = _PARTICOES.get(store.store_dir)
+        if particionado is not None and particionado.version == store.version:
+            return particionado
+        manifest = _ler_manifesto(particoes_dir(store.store_dir))
+        if manifest is None or manifest.get('versao') != store.version:
+            return None
+        particionado = PartitionedStore(particoes_dir(store.store_dir))
+        _PARTICOES[store.store_dir] = particionado
+        return particionado
+
+
+def reader_for(store: data_layer.ColumnStore,
+               filtros: Optional[Dict[str, Any]]) -> Union[data_layer.ColumnStore, PartitionedStore]:
+    """
+    Leitor mais barato para ``filtros``: as partições quando algum filtro é sobre
+    uma chave de partição (``CHAVES``); senão o próprio cache, na ordem original.
+    Partições ausentes ou de outra versão não são regravadas na consulta (isso fica
+    com ``open_partitions`` e a ingestão): a leitura cai no cache original.
+    """
+    if len(store) and filtros and set(filtros) & set(CHAVES):
+        particionado = _particoes_publicadas(store)
+        if particionado is not None:
+            return particionado
+    return store
+
+
+def query(csv_path: str = data_layer.CAMINHO_CSV_PADRAO, columns: Optional[List[str]] = None,
+          filtros: Optional[Dict[str, Any]] = None, dropna: bool = False) -> pd.DataFrame:
+    """
+    Como ``data_layer.query``, mas lendo das partições quando os filtros envolvem
+    gasto total ou renda. A ordem das linhas pode diferir da do cache original.
+    """
+    store = data_layer.open_store(csv_path)
+    return reader_for(store, filtros).query(columns, filtros, dropna)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grava o layout particionado por faixa de gasto x renda.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    args = parser.parse_args()
+
+    store = data_layer.open_store(args.csv)
+    destino = refresh_partitions(store)
+    particionado = open_partitions(store)
+    print(f"✅ {len(particionado.particoes)} partições gravadas em '{destino}'\n")
+    tabela = pd.DataFrame([{
+        'particao': p['nome'],
+        'linhas': p['linhas'],
+        'MntTotal': f"{p['estatisticas']['MntTotal'][0]}–{p['estatisticas']['MntTotal'][1]}",
+        'Income': f"{p['estatisticas']['Income'][0]}–{p['estatisticas']['Income'][1]}",
+    } for p in particionado.manifest['particoes']])
+    print(tabela.to_string(index=False))
+
+    # Consultas das otimizações propostas em sql/optimization_examples
+    consultas = {
+        'clientes_alto_valor (MntTotal > 1000, NumStorePurchases > 5)':
+            (['Income', 'MntTotal'], {'MntTotal': (1001, None), 'NumStorePurchases': (6, None)}),
+        'gasto alto (MntTotal >= 1500)': (['MntTotal', 'MntWines'], {'MntTotal': (1500, None)}),
+        'renda entre 50 e 55 mil': (['Income', 'MntWines'], {'Income': (50000, 55000)}),
+    }
+    print()
+    for nome, (colunas, filtros) in consultas.items():
+        plano = particionado.plan(colunas, filtros)
+        print(f"{nome}: {len(plano.grupos)}/{len(particionado.particoes)} partições, "
+              f"{plano.bytes_lidos / max(plano.bytes_total, 1):.1%} dos bytes")
+
+
+if __name__ == "__main__":
+    main()
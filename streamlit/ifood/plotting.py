@@ -0,0 +1,136 @@
+"""
+Gráficos de dispersão com tamanho de payload limitado.
+
+Acima de ``LIMITE_PONTOS`` linhas, enviar cada ponto ao navegador gera payloads de
+vários megabytes e trava a página. Os modos abaixo limitam o que é enviado:
+
+  - ``MODO_AMOSTRA``: Scattergl (WebGL) sobre uma amostra estratificada de no
+    máximo ``MAX_PONTOS`` linhas, preservando a proporção de cada estrato;
+  - ``MODO_GRADE``: contagens agregadas no servidor em uma grade 2-D de no
+    máximo ``BINS_GRADE[0] x BINS_GRADE[1]`` células.
+
+``MODO_AUTOMATICO`` envia todos os pontos enquanto couberem no limite e passa
+para a amostra quando o filtro selecionar mais linhas.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+MODO_AUTOMATICO = 'Automático'
+MODO_AMOSTRA = 'Pontos (WebGL, amostra)'
+MODO_GRADE = 'Grade de densidade'
+MODOS_DISPERSAO = [MODO_AUTOMATICO, MODO_AMOSTRA, MODO_GRADE]
+
+LIMITE_PONTOS = 5_000
+MAX_PONTOS = 5_000
+BINS_GRADE = (80, 60)
+
+
+def stratified_sample(df: pd.DataFrame, estrato: str, n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Amostra aleatória de até ``n`` linhas com alocação proporcional por estrato.
+
+    Todo estrato não vazio recebe pelo menos uma linha (desde que ``n`` comporte),
+    para que categorias pequenas continuem visíveis na legenda.
+
+    Parâmetros:
+      - df (pd.DataFrame): Linhas a amostrar.
+      - estrato (str): Coluna categórica que define os estratos.
+      - n (int): Número máximo de linhas da amostra.
+      - seed (int): Semente do gerador, para a amostra ser estável entre interações.
+
+    Retorna:
+      - pd.DataFrame: Amostra, na ordem original das linhas.
+    """
+    if len(df) <= n:
+        return df
+    codigos = pd.Series(pd.factorize(df[estrato])[0])
+    tamanhos = codigos.value_counts()
+    cotas = np.maximum(np.floor(tamanhos * n / len(df)), 1).astype(np.int64)
+    while cotas.sum() > n:
+        cotas[cotas.idxmax()] -= 1
+
+    # Posição de cada linha dentro do seu estrato após um embaralhamento aleatório
+    ordem = np.random.default_rng(seed).permutation(len(df))
+    posicao = np.empty(len(df), dtype=np.int64)
+    posicao[ordem] = codigos.iloc[ordem].groupby(codigos.iloc[ordem].to_numpy()).cumcount().to_numpy()
+    selecionadas = posicao < codigos.map(cotas).to_numpy()
+    return df[selecionadas]
+
+
+def grid_counts(x: np.ndarray, y: np.ndarray,
+                bins: Tuple[int, int] = BINS_GRADE) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Contagem de linhas por célula de uma grade regular sobre ``x`` e ``y``.
+
+    Retorna:
+      - tuple: (contagens ``(bins_y, bins_x)``, centros em x, centros em y).
+    """
+    contagens, bordas_x, bordas_y = np.histogram2d(x, y, bins=bins)
+    centros_x = (bordas_x[:-1] + bordas_x[1:]) / 2
+    centros_y = (bordas_y[:-1] + bordas_y[1:]) / 2
+    return contagens.T, centros_x, centros_y
+
+
+def resolve_mode(modo: str, n_linhas: int) -> str:
+    """Modo efetivo de renderização para ``n_linhas`` pontos."""
+    if modo == MODO_AUTOMATICO:
+        return MODO_AUTOMATICO if n_linhas <= LIMITE_PONTOS else MODO_AMOSTRA
+    return modo
+
+
+def scatter_figure(df: pd.DataFrame, x: str, y: str, cor: str, modo: str = MODO_AUTOMATICO,
+                   titulo: str = '', labels: Optional[Dict[str, str]] = None,
+                   color_discrete_sequence=None) -> go.Figure:
+    """
+    Gráfico de dispersão cujo payload não depende do número de linhas de ``df``.
+
+    Parâmetros:
+      - df (pd.DataFrame): Linhas filtradas.
+      - x, y (str): Colunas dos eixos.
+      - cor (str): Coluna categórica usada nas cores e na estratificação da amostra.
+      - modo (str): Um de ``MODOS_DISPERSAO``.
+      - titulo (str): Título do gráfico.
+      - labels (dict, opcional): Rótulos dos eixos, como em ``px.scatter``.
+      - color_discrete_sequence (list, opcional): Paleta das categorias.
+
+    Retorna:
+      - go.Figure: Figura com no máximo ``max(LIMITE_PONTOS, MAX_PONTOS)`` pontos
+        ou ``BINS_GRADE[0] * BINS_GRADE[1]`` células.
+    """
+    labels = labels or {}
+    modo = resolve_mode(modo, len(df))
+
+    if modo == MODO_GRADE:
+        dados = df[[x, y]].dropna()
+        contagens, centros_x, centros_y = grid_counts(dados[x].to_numpy(), dados[y].to_numpy())
+        fig = go.Figure(go.Heatmap(
+            x=centros_x, y=centros_y, z=np.where(contagens > 0, contagens, np.nan),
+            colorscale='Reds', colorbar={'title': 'Clientes'},
+            hovertemplate=f"{labels.get(x, x)}: %{{x:,.0f}}<br>{labels.get(y, y)}: %{{y:,.0f}}"
+                          "<br>Clientes: %{z:,.0f}<extra></extra>"
+        ))
+        fig.update_layout(title=f"{titulo} ({len(dados):,} clientes agregados)",
+                          xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+        return fig
+
+    amostra = df
+    if modo == MODO_AMOSTRA:
+        amostra = stratified_sample(df, cor, MAX_PONTOS)
+        if len(amostra) < len(df):
+            titulo = f"{titulo} (amostra de {len(amostra):,} de {len(df):,} clientes)"
+
+    return px.scatter(
+        amostra,
+        x=x,
+        y=y,
+        color=cor,
+        color_discrete_sequence=color_discrete_sequence,
+        title=titulo,
+        labels=labels,
+        render_mode='webgl' if modo == MODO_AMOSTRA else 'auto'
+    )
@@ -0,0 +1,127 @@
+"""
+Pré-cálculo em segundo plano dos estados vizinhos dos filtros dos dashboards.
+
+O Streamlit reexecuta ``main`` de forma síncrona a cada interação. Depois de
+renderizar o estado pedido, o dashboard agenda aqui os estados que o usuário
+provavelmente escolherá em seguida (a faixa do slider deslocada um passo para
+cada lado, as outras opções do selectbox). Uma thread de fundo calcula os
+agregados e as figuras desses estados e os guarda no cache limitado de
+``ifood.result_cache``; quando o usuário chega a um deles, o rerun só lê o
+resultado pronto.
+
+Cada sessão tem a sua geração de agendamentos: uma interação descarta só os
+vizinhos ainda pendentes da própria sessão, não os das outras.
+
+Uso:
+    visao = PREFETCHER.get(cache_key('painel', versao, ...), lambda: build_view(...))
+    PREFETCHER.prefetch([(chave_vizinha, lambda: build_view(...)), ...], sessao=ui.session_id())
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from ifood.result_cache import RESULTADOS, CacheKey, ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Alimenta um ``ResultCache`` sob demanda e por uma thread de fundo."""
+
+    def __init__(self, cache: Optional[ResultCache] = None, workers: int = 1):
+        self.cache = cache if cache is not None else ResultCache()
+        # chave pendente -> {sessão: geração que a pediu por último}
+        self._pendentes: Dict[CacheKey, Dict[Hashable, int]] = {}
+        # sessão -> [geração atual, chaves pendentes pedidas por ela]; removida quando não há pendentes
+        self._sessoes: Dict[Hashable, List[int]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ifood-prefetch')
+        self.precalculados = 0
+
+    def get(self, chave: CacheKey, funcao: Callable[[], Any]) -> Any:
+        """Retorna o valor guardado para ``chave`` ou o calcula agora com ``funcao``."""
+        return self.cache.get_or_compute(chave, funcao)
+
+    def prefetch(self, tarefas: Iterable[Tuple[CacheKey, Callable[[], Any]]],
+                 sessao: Hashable = None) -> int:
+        """
+        Agenda o cálculo em segundo plano das chaves ainda ausentes. Tarefas de
+        agendamentos anteriores da mesma ``sessao`` que ainda não começaram são
+        descartadas, pois a interação mais recente tornou aqueles vizinhos menos
+        prováveis; as das outras sessões seguem na fila. Uma chave já pendente
+        passa a valer para o agendamento atual e só é descartada se nenhuma sessão
+        a pediu na sua geração corrente.
+
+        Parâmetros:
+          - tarefas (iterable): Pares ``(chave, função)`` dos estados vizinhos.
+          - sessao (hashable, opcional): Sessão que agenda (``ui.session_id()``).
+
+        Retorna:
+          - int: Número de tarefas novas na fila.
+        """
+        agendadas = 0
+        with self._lock:
+            estado = self._sessoes.setdefault(sessao, [0, 0])
+            estado[0] += 1
+            for chave, funcao in tarefas:
+                if chave in self.cache:
+                    continue
+                interessadas = self._pendentes.get(chave)
+                if interessadas is None:
+                    interessadas = self._pendentes[chave] = {}
+                    self._executor.submit(self._executar, chave, funcao)
+                    agendadas += 1
+                if sessao not in interessadas:
+                    estado[1] += 1
+                interessadas[sessao] = estado[0]
+            if not estado[1]:
+                del self._sessoes[sessao]
+        return agendadas
+
+    def _liberar(self, chave: CacheKey) -> None:
+        """Retira ``chave`` das pendentes (chamado com ``_lock``)."""
+        for sessao in self._pendentes.pop(chave):
+            estado = self._sessoes[sessao]
+            estado[1] -= 1
+            if not estado[1]:
+                del self._sessoes[sessao]
+
+    def _executar(self, chave: CacheKey, funcao: Callable[[], Any]) -> None:
+        with self._lock:
+            if not any(self._sessoes[sessao][0] == geracao for sessao, geracao in self._pendentes[chave].items()):
+                self._liberar(chave)
+                return
+        calculados = 0
+        try:
+            self.cache.put(chave, funcao())
+            calculados = 1
+        except Exception:
+            logger.exception("Falha no pré-cálculo de %r", chave)
+        with self._lock:
+            self.precalculados += calculados
+            self._liberar(chave)
+
+    def stats(self) -> Dict[str, int]:
+        """Pré-cálculos concluídos e em andamento."""
+        with self._lock:
+            return {'precalculados': self.precalculados, 'em_andamento': len(self._pendentes)}
+
+
+def neighbour_ranges(faixa: Tuple[int, int], minimo: int, maximo: int, passo: int = 1) -> List[Tuple[int, int]]:
+    """
+    Faixas a um passo de ``faixa`` (cada extremo movido para um lado, depois a
+    faixa inteira deslocada), limitadas a ``[minimo, maximo]``.
+    """
+    inicio, fim = faixa
+    vizinhas = []
+    for d_inicio, d_fim in ((-passo, 0), (passo, 0), (0, -passo), (0, passo), (-passo, -passo), (passo, passo)):
+        nova = (max(minimo, inicio + d_inicio), min(maximo, fim + d_fim))
+        if nova[0] <= nova[1] and nova != (inicio, fim) and nova not in vizinhas:
+            vizinhas.append(nova)
+    return vizinhas
+
+
+# Instância compartilhada por todas as sessões e dashboards, sobre o cache de resultados comum
+PREFETCHER = Prefetcher(RESULTADOS)
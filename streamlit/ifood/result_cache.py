@@ -0,0 +1,166 @@
+"""
+Cache limitado de resultados por filtro (agregados, tabelas e figuras) dos dashboards.
+
+Diferente de um ``st.cache_data`` sem limite, o cache tem um orçamento em bytes
+(``IFOOD_CACHE_MB``, padrão 256) e descarta primeiro os itens usados há mais
+tempo; opcionalmente os itens também expiram após ``IFOOD_CACHE_TTL`` segundos.
+As chaves (``cache_key``) juntam o nome do dashboard, a versão do dataset e os
+parâmetros normalizados do filtro: quando o dataset muda de versão, os itens da
+versão anterior daquele dashboard são descartados na primeira gravação.
+
+Uma única instância (``RESULTADOS``) é compartilhada por todas as sessões e
+dashboards do processo, e ``stats()`` informa acertos, faltas e descartes.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MAX_MB_PADRAO = 256
+
+
+class CacheKey(NamedTuple):
+    """Chave de um resultado: dashboard, versão do dataset e parâmetros normalizados."""
+    namespace: str
+    versao: str
+    params: Tuple[Tuple[str, Hashable], ...]
+
+
+def _normalizar(valor: Any) -> Hashable:
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (list, tuple)):
+        return tuple(_normalizar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _normalizar(v)) for k, v in valor.items()))
+    return valor
+
+
+def cache_key(namespace: str, versao: str, **params) -> CacheKey:
+    """
+    Monta a chave de um resultado. Listas viram tuplas, escalares do numpy viram
+    escalares do Python e a ordem dos parâmetros não importa.
+    """
+    return CacheKey(namespace, versao, tuple(sorted((k, _normalizar(v)) for k, v in params.items())))
+
+
+def estimate_size(obj: Any) -> int:
+    """Tamanho aproximado em bytes de DataFrames, arrays, figuras e contêineres."""
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        uso = obj.memory_usage(deep=True)
+        return int(uso.sum() if isinstance(uso, pd.Series) else uso)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_size(v) for v in obj)
+    if hasattr(obj, 'to_plotly_json'):
+        return estimate_size(obj.to_plotly_json())
+    return sys.getsizeof(obj)
+
+
+class ResultCache:
+    """LRU com orçamento em bytes, TTL opcional e estatísticas de uso; seguro entre threads."""
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('IFOOD_CACHE_MB', MAX_MB_PADRAO)) * 2 ** 20)
+        if ttl is None and os.environ.get('IFOOD_CACHE_TTL'):
+            ttl = float(os.environ['IFOOD_CACHE_TTL'])
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # chave -> (valor, tamanho em bytes, instante de expiração)
+        self._itens: "OrderedDict[CacheKey, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._contadores = {'acertos': 0, 'faltas': 0, 'descartes': 0, 'expirados': 0, 'grandes_demais': 0}
+
+    def _remover(self, chave: CacheKey) -> None:
+        self._bytes -= self._itens.pop(chave)[1]
+
+    def _valido(self, chave: CacheKey) -> bool:
+        item = self._itens.get(chave)
+        if item is None:
+            return False
+        if item[2] < time.monotonic():
+            self._remover(chave)
+            self._contadores['expirados'] += 1
+            return False
+        return True
+
+    def __contains__(self, chave: CacheKey) -> bool:
+        with self._lock:
+            return self._valido(chave)
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def get(self, chave: CacheKey, padrao: Any = None) -> Any:
+        """Valor guardado para ``chave`` (ou ``padrao``), contando acerto ou falta."""
+        with self._lock:
+            if self._valido(chave):
+                self._itens.move_to_end(chave)
+                self._contadores['acertos'] += 1
+                return self._itens[chave][0]
+            self._contadores['faltas'] += 1
+            return padrao
+
+    def put(self, chave: CacheKey, valor: Any, tamanho: Optional[int] = None) -> None:
+        """
+        Guarda ``valor``, descartando os itens menos usados até caber no orçamento.
+        Itens maiores que o orçamento inteiro não são guardados.
+        """
+        tamanho = estimate_size(valor) if tamanho is None else tamanho
+        expira = time.monotonic() + self.ttl if self.ttl else float('inf')
+        with self._lock:
+            # Resultados de versões anteriores do dataset não serão mais pedidos
+            for antiga in [c for c in self._itens if c.namespace == chave.namespace and c.versao != chave.versao]:
+                self._remover(antiga)
+                self._contadores['descartes'] += 1
+            if chave in self._itens:
+                self._remover(chave)
+            if tamanho > self.max_bytes:
+                self._contadores['grandes_demais'] += 1
+                return
+            while self._bytes + tamanho > self.max_bytes:
+                self._remover(next(iter(self._itens)))
+                self._contadores['descartes'] += 1
+            self._itens[chave] = (valor, tamanho, expira)
+            self._bytes += tamanho
+
+    def get_or_compute(self, chave: CacheKey, funcao: Callable[[], Any]) -> Any:
+        """Retorna o valor guardado ou o calcula com ``funcao`` e o guarda."""
+        faltou = object()
+        valor = self.get(chave, faltou)
+        if valor is faltou:
+            valor = funcao()
+            self.put(chave, valor)
+        return valor
+
+    def clear(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Itens, bytes ocupados, orçamento, taxa de acerto e contadores de eventos."""
+        with self._lock:
+            consultas = self._contadores['acertos'] + self._contadores['faltas']
+            return {
+                'itens': len(self._itens),
+                'mb': self._bytes / 2 ** 20,
+                'max_mb': self.max_bytes / 2 ** 20,
+                'taxa_acerto': self._contadores['acertos'] / consultas if consultas else None,
+                **self._contadores,
+            }
+
+
+# Instância compartilhada por todas as sessões e dashboards do processo
+RESULTADOS = ResultCache()
@@ -0,0 +1,342 @@
+"""
+Amostras estratificadas para o modo de prévia rápida dos dashboards.
+
+Em sessões exploratórias sobre bases muito grandes, os dashboards podem responder
+a partir de uma amostra em vez de percorrer todas as linhas. Cada amostra de
+``AMOSTRAS`` divide a base em estratos (ex.: faixa etária x graduação) e mantém,
+por estrato, um reservatório de até ``TAMANHO_ESTRATO`` linhas escolhidas
+uniformemente (algoritmo R) e o total de linhas do estrato. A ingestão incremental
+só estende os reservatórios com as linhas anexadas (``update_samples``).
+
+As estimativas (médias por domínio, correlação e quantis) ponderam cada linha pelo
+inverso da fração amostrada do seu estrato e vêm com intervalo de confiança de
+``NIVEL_CONFIANCA``. Estratos amostrados por inteiro não têm erro: em bases
+pequenas a prévia coincide com o cálculo exato.
+
+As amostras ficam em ``<cache>/amostras/<nome>.npz`` junto com a versão do dataset.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.sampling [--amostra renda]
+"""
+
+import argparse
+import os
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from ifood import data_layer
+from ifood.aggregates import GASTOS_FAMILIA, PRODUTOS_RENDA
+
+ColumnGetter = Callable[[str], np.ndarray]
+
+# Linhas guardadas por estrato
+TAMANHO_ESTRATO = 1000
+
+NIVEL_CONFIANCA = 0.95
+Z = float(stats.norm.ppf(0.5 + NIVEL_CONFIANCA / 2))
+
+LIMITES_IDADE = [30, 40, 50, 60]
+LIMITES_RENDA = [30000, 60000, 90000]
+
+
+class Desenho(NamedTuple):
+    """Colunas guardadas na amostra e como calcular o estrato de cada linha."""
+    colunas: List[str]
+    estratos: Callable[[ColumnGetter], np.ndarray]
+
+
+def _estrato_renda(get: ColumnGetter) -> np.ndarray:
+    renda = get('Income')
+    estrato = np.searchsorted(LIMITES_RENDA, renda, side='left')
+    estrato[np.isnan(renda)] = len(LIMITES_RENDA) + 1
+    return estrato
+
+
+AMOSTRAS: Dict[str, Desenho] = {
+    # Estratos alinhados aos grupos exibidos por cada dashboard
+    'idade_educacao': Desenho(
+        ['Age', 'education_Graduation', 'AcceptedCmpOverall'],
+        lambda get: np.searchsorted(LIMITES_IDADE, get('Age'), side='right') * 2 + get('education_Graduation')),
+    'renda': Desenho(['Income'] + PRODUTOS_RENDA, _estrato_renda),
+    'filhos': Desenho(['Kidhome', 'Teenhome'] + GASTOS_FAMILIA,
+                      lambda get: get('Kidhome').astype(np.int64) + get('Teenhome')),
+}
+
+
+class Amostra(NamedTuple):
+    """Linhas amostradas, o estrato de cada uma e o total de linhas de cada estrato."""
+    dados: pd.DataFrame
+    estratos: np.ndarray
+    populacao: np.ndarray
+
+    @property
+    def tamanhos(self) -> np.ndarray:
+        return np.bincount(self.estratos, minlength=len(self.populacao))
+
+    @property
+    def pesos(self) -> np.ndarray:
+        """Linhas da base representadas por cada linha da amostra."""
+        return (self.populacao / np.maximum(self.tamanhos, 1))[self.estratos]
+
+
+class Estimativa(NamedTuple):
+    """Valor estimado e intervalo de confiança de ``NIVEL_CONFIANCA``."""
+    valor: float
+    inferior: float
+    superior: float
+
+
+def _reservar(reservas: np.ndarray, vistos: np.ndarray, posicoes: np.ndarray, estratos: np.ndarray,
+              rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Passa um lote de linhas (em ordem de posição) pelos reservatórios.
+
+    A k-ésima linha de um estrato entra com probabilidade ``TAMANHO_ESTRATO / k`` numa
+    vaga uniforme; como essa decisão não depende do conteúdo do reservatório, o
+    lote inteiro é sorteado de uma vez e, em cada vaga, vale a última linha sorteada.
+    """
+    total = max(len(vistos), int(estratos.max()) + 1 if len(estratos) else 0)
+    if total > len(vistos):
+        reservas = np.vstack([reservas, np.full((total - len(vistos), TAMANHO_ESTRATO), -1, dtype=np.int64)])
+        vistos = np.concatenate([vistos, np.zeros(total - len(vistos), dtype=np.int64)])
+    if not len(estratos):
+        return reservas, vistos
+
+    ordem = np.argsort(estratos, kind='stable')
+    ordenados = estratos[ordem]
+    contador = vistos[ordenados] + np.arange(len(ordenados)) - np.searchsorted(ordenados, ordenados) + 1
+    vaga = np.where(contador <= TAMANHO_ESTRATO, contador - 1, rng.integers(0, contador))
+    entra = vaga < TAMANHO_ESTRATO
+
+    destino = ordenados[entra] * TAMANHO_ESTRATO + vaga[entra]
+    escolhidas = posicoes[ordem][entra]
+    _, ultimas = np.unique(destino[::-1], return_index=True)
+    ultimas = len(destino) - 1 - ultimas
+    reservas.reshape(-1)[destino[ultimas]] = escolhidas[ultimas]
+    return reservas, vistos + np.bincount(estratos, minlength=total)
+
+
+def _rng(versao: str) -> np.random.Generator:
+    return np.random.default_rng(int(versao[:16], 16))
+
+
+def _estender(nome: str, store: data_layer.ColumnStore, reservas: np.ndarray, vistos: np.ndarray,
+              inicio: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Passa as linhas ``[inicio, len(store))`` pelos reservatórios, em lotes."""
+    rng = _rng(store.version)
+    for a in range(inicio, len(store), data_layer.LINHAS_POR_GRUPO):
+        b = min(a + data_layer.LINHAS_POR_GRUPO, len(store))
+        estratos = AMOSTRAS[nome].estratos(lambda c: store.column(c)[a:b])
+        reservas, vistos = _reservar(reservas, vistos, np.arange(a, b), estratos, rng)
+    return reservas, vistos
+
+
+def sample_path(store_dir: str, nome: str) -> str:
+    return os.path.join(store_dir, 'amostras', f'{nome}.npz')
+
+
+def _gravar(caminho: str, reservas: np.ndarray, vistos: np.ndarray, linhas: int, versao: str) -> None:
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp.npz"
+    np.savez(temporario, reservas=reservas, vistos=vistos, linhas=linhas, versao=versao)
+    os.replace(temporario, caminho)
+
+
+def _ler(caminho: str) -> Optional[Tuple[np.ndarray, np.ndarray, int, str]]:
+    if not os.path.exists(caminho):
+        return None
+    with np.load(caminho) as dados:
+        return dados['reservas'], dados['vistos'], int(dados['linhas']), str(dados['versao'])
+
+
+def _montar(nome: str, store: data_layer.ColumnStore, reservas: np.ndarray, vistos: np.ndarray) -> Amostra:
+    estratos, vagas = np.nonzero(reservas >= 0)
+    posicoes = reservas[estratos, vagas]
+    ordem = np.argsort(posicoes)
+    posicoes, estratos = posicoes[ordem], estratos[ordem]
+    dados = pd.DataFrame({c: store.column(c)[posicoes] for c in AMOSTRAS[nome].colunas})
+    return Amostra(dados, estratos, vistos.astype(np.float64))
+
+
+# Amostras em memória por (diretório do cache, nome): (versão, Amostra), compartilhadas pelas sessões
+_CARREGADAS: Dict[Tuple[str, str], Tuple[str, Amostra]] = {}
+_LOCK = threading.Lock()
+
+
+def load_sample(csv_path: str, nome: str) -> Amostra:
+    """
+    Amostra ``nome`` da versão atual do dataset, lida da memória do processo, do
+    arquivo gravado ou sorteada de novo.
+    """
+    store = data_layer.open_store(csv_path)
+    chave = (store.store_dir, nome)
+    with _LOCK:
+        em_memoria = _CARREGADAS.get(chave)
+        if em_memoria is not None and em_memoria[0] == store.version:
+            return em_memoria[1]
+
+        caminho = sample_path(store.store_dir, nome)
+        gravada = _ler(caminho)
+        if gravada is not None and gravada[3] == store.version:
+            reservas, vistos = gravada[0], gravada[1]
+        else:
+            reservas, vistos = _estender(nome, store, np.full((0, TAMANHO_ESTRATO), -1, dtype=np.int64),
+                                         np.zeros(0, dtype=np.int64), 0)
+            _gravar(caminho, reservas, vistos, len(store), store.version)
+
+        amostra = _montar(nome, store, reservas, vistos)
+        _CARREGADAS[chave] = (store.version, amostra)
+        return amostra
+
+
+def update_samples(store_dir: str, versao_anterior: str, versao_nova: str, atualizadas: int) -> Dict[str, bool]:
+    """
+    Estende no lugar as amostras gravadas com as linhas anexadas por uma ingestão
+    incremental. Linhas sobrescritas podem ter mudado de estrato: nesse caso, e
+    para amostras de outra versão, a amostra é descartada (será sorteada de novo
+    na próxima leitura).
+
+    Retorna:
+      - dict: Nome da amostra -> ``True`` se foi estendida, ``False`` se descartada.
+    """
+    store = data_layer.ColumnStore(store_dir)
+    resultado = {}
+    for nome in AMOSTRAS:
+        caminho = sample_path(store_dir, nome)
+        gravada = _ler(caminho)
+        if gravada is None:
+            continue
+        reservas, vistos, linhas, versao = gravada
+        if versao != versao_anterior or atualizadas:
+            os.remove(caminho)
+            resultado[nome] = False
+            continue
+        reservas, vistos = _estender(nome, store, reservas, vistos, linhas)
+        _gravar(caminho, reservas, vistos, len(store), versao_nova)
+        resultado[nome] = True
+    return resultado
+
+
+def _dominio(amostra: Amostra, valores: Sequence[np.ndarray], dominio: Optional[np.ndarray]) -> np.ndarray:
+    """Linhas no domínio e com todos os ``valores`` definidos."""
+    dentro = np.ones(len(amostra.dados), dtype=bool) if dominio is None else np.asarray(dominio, dtype=bool)
+    for v in valores:
+        dentro = dentro & ~np.isnan(v)
+    return dentro
+
+
+def _fator_finito(amostra: Amostra, dentro: np.ndarray) -> float:
+    """Correção de população finita dos estratos que têm linhas no domínio."""
+    estratos = np.unique(amostra.estratos[dentro])
+    populacao = amostra.populacao[estratos].sum()
+    return max(0.0, 1 - amostra.tamanhos[estratos].sum() / populacao) if populacao else 0.0
+
+
+def _quantil_ponderado(valores: np.ndarray, pesos: np.ndarray, q: float) -> float:
+    ordem = np.argsort(valores)
+    acumulado = np.cumsum(pesos[ordem])
+    return float(valores[ordem][min(np.searchsorted(acumulado, q * acumulado[-1]), len(valores) - 1)])
+
+
+def mean(amostra: Amostra, coluna: str, dominio: Optional[np.ndarray] = None) -> Estimativa:
+    """
+    Média de ``coluna`` nas linhas do domínio (estimador de razão estratificado),
+    com variância por linearização e correção de população finita por estrato.
+    """
+    y = amostra.dados[coluna].to_numpy(dtype=np.float64)
+    dentro = _dominio(amostra, [y], dominio)
+    pesos = amostra.pesos
+    total = pesos[dentro].sum()
+    if total == 0:
+        return Estimativa(np.nan, np.nan, np.nan)
+    media = float((pesos * y)[dentro].sum() / total)
+
+    # Variável linearizada: desvio da média no domínio, zero fora dele
+    z = np.where(dentro, y - media, 0.0) / total
+    n = amostra.tamanhos.astype(np.float64)
+    soma = np.bincount(amostra.estratos, weights=z, minlength=len(n))
+    soma2 = np.bincount(amostra.estratos, weights=z * z, minlength=len(n))
+    variancia_estrato = np.where(n > 1, (soma2 - soma ** 2 / np.maximum(n, 1)) / np.maximum(n - 1, 1), 0.0)
+    fracao = np.where(amostra.populacao > 0, n / np.maximum(amostra.populacao, 1), 1.0)
+    variancia = float(np.sum(amostra.populacao ** 2 * (1 - fracao) * variancia_estrato / np.maximum(n, 1)))
+    erro = Z * np.sqrt(max(variancia, 0.0))
+    return Estimativa(media, media - erro, media + erro)
+
+
+def group_means(amostra: Amostra, coluna: str, grupos: pd.Series, categorias: Sequence,
+                dominio: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """Média de ``coluna`` em cada categoria de ``grupos`` (dentro do domínio), com intervalos."""
+    dentro = np.ones(len(amostra.dados), dtype=bool) if dominio is None else np.asarray(dominio, dtype=bool)
+    linhas = [(categoria, *mean(amostra, coluna, dentro & (grupos == categoria).to_numpy()))
+              for categoria in categorias]
+    return pd.DataFrame(linhas, columns=['grupo', 'valor', 'inferior', 'superior'])
+
+
+def correlation(amostra: Amostra, x: str, y: str, dominio: Optional[np.ndarray] = None) -> Estimativa:
+    """
+    Correlação de Pearson ponderada entre ``x`` e ``y`` no domínio. O intervalo usa a
+    transformação de Fisher com o tamanho efetivo de Kish (aproximação).
+    """
+    vx = amostra.dados[x].to_numpy(dtype=np.float64)
+    vy = amostra.dados[y].to_numpy(dtype=np.float64)
+    dentro = _dominio(amostra, [vx, vy], dominio)
+    pesos, vx, vy = amostra.pesos[dentro], vx[dentro], vy[dentro]
+    if len(pesos) < 3:
+        return Estimativa(np.nan, np.nan, np.nan)
+    dx = vx - np.average(vx, weights=pesos)
+    dy = vy - np.average(vy, weights=pesos)
+    denominador = np.sqrt(np.sum(pesos * dx * dx) * np.sum(pesos * dy * dy))
+    if denominador == 0:
+        return Estimativa(np.nan, np.nan, np.nan)
+    r = float(np.clip(np.sum(pesos * dx * dy) / denominador, -1 + 1e-12, 1 - 1e-12))
+
+    efetivo = pesos.sum() ** 2 / np.sum(pesos * pesos)
+    erro = Z * np.sqrt(_fator_finito(amostra, dentro) / max(efetivo - 3, 1))
+    return Estimativa(r, float(np.tanh(np.arctanh(r) - erro)), float(np.tanh(np.arctanh(r) + erro)))
+
+
+def quantile(amostra: Amostra, coluna: str, q: float, dominio: Optional[np.ndarray] = None) -> Estimativa:
+    """
+    Quantil ponderado de ``coluna`` no domínio; o intervalo (método de Woodruff)
+    vem dos quantis nas probabilidades ``q`` ± o erro da proporção.
+    """
+    y = amostra.dados[coluna].to_numpy(dtype=np.float64)
+    dentro = _dominio(amostra, [y], dominio)
+    pesos, y = amostra.pesos[dentro], y[dentro]
+    if not len(y):
+        return Estimativa(np.nan, np.nan, np.nan)
+    efetivo = pesos.sum() ** 2 / np.sum(pesos * pesos)
+    erro = Z * np.sqrt(_fator_finito(amostra, dentro) * q * (1 - q) / efetivo)
+    return Estimativa(_quantil_ponderado(y, pesos, q),
+                      _quantil_ponderado(y, pesos, max(q - erro, 0.0)),
+                      _quantil_ponderado(y, pesos, min(q + erro, 1.0)))
+
+
+def interval_text(estimativa: Estimativa, formato: str = '{:.2f}') -> str:
+    """Intervalo formatado para rótulos e relatórios, ex.: ``IC 95%: 0.12–0.18``."""
+    return (f"IC {NIVEL_CONFIANCA:.0%}: {formato.format(estimativa.inferior)}–"
+            f"{formato.format(estimativa.superior)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sorteia as amostras estratificadas da prévia rápida.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    parser.add_argument('--amostra', choices=list(AMOSTRAS), action='append', help="Amostras (padrão: todas)")
+    args = parser.parse_args()
+
+    for nome in args.amostra or AMOSTRAS:
+        amostra = load_sample(args.csv, nome)
+        print(f"✅ Amostra '{nome}': {len(amostra.dados):,} de {int(amostra.populacao.sum()):,} linhas, "
+              f"{int((amostra.populacao > 0).sum())} estratos")
+        for coluna in AMOSTRAS[nome].colunas:
+            media, mediana = mean(amostra, coluna), quantile(amostra, coluna, 0.5)
+            print(f"  - {coluna}: média {media.valor:.2f} ({interval_text(media)}), "
+                  f"mediana {mediana.valor:.2f} ({interval_text(mediana)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Pontuação de propensão à aceitação de campanhas.
+
+Versão em Python de ``sql/advanced_queries/modelo_preditivo.sql``: em vez dos
+coeficientes fixos da consulta, uma regressão logística (scikit-learn) é ajustada
+sobre as mesmas variáveis e escalas, tendo como alvo a aceitação de qualquer
+campanha (``AcceptedCmp1``-``AcceptedCmp5`` ou ``Response``). A base inteira é
+pontuada em lotes vetorizados lidos diretamente do cache colunar, e os clientes
+elegíveis (``Complain = 0``) são divididos em quartis de propensão, como o
+``NTILE(4)`` da consulta.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.scoring lista_campanha.csv [--processos 4]
+"""
+
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from ifood import data_layer
+
+# Variáveis do modelo e divisores aplicados a cada uma (os mesmos da consulta SQL)
+ESCALAS: Dict[str, float] = {
+    'MntTotal': 1000,
+    'NumDealsPurchases': 5,
+    'Recency': 30,
+    'education_PhD': 1,
+}
+ALVOS = ['AcceptedCmp1', 'AcceptedCmp2', 'AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5', 'Response']
+
+TAMANHO_LOTE = 1_000_000
+MAX_LINHAS_AJUSTE = 1_000_000
+N_GRUPOS = 4
+
+
+class ModeloAceitacao(NamedTuple):
+    """Coeficientes da regressão logística, na escala de ``ESCALAS``."""
+    coeficientes: np.ndarray
+    intercepto: float
+    variaveis: List[str]
+
+
+def _matriz(store: data_layer.ColumnStore, inicio: int, fim: int) -> np.ndarray:
+    return np.column_stack([store.column(c)[inicio:fim].astype(np.float64) / ESCALAS[c] for c in ESCALAS])
+
+
+def _elegiveis(store: data_layer.ColumnStore, inicio: int = 0, fim: Optional[int] = None) -> np.ndarray:
+    return store.column('Complain')[inicio:fim] == 0
+
+
+def fit_model(store: data_layer.ColumnStore, max_linhas: int = MAX_LINHAS_AJUSTE,
+              seed: int = 0) -> ModeloAceitacao:
+    """
+    Ajusta a regressão logística sobre os clientes elegíveis.
+
+    Parâmetros:
+      - store (ColumnStore): Cache colunar do dataset.
+      - max_linhas (int): Acima deste número de clientes o ajuste usa uma amostra
+        aleatória (o erro dos coeficientes já é desprezível nesse tamanho).
+      - seed (int): Semente da amostra.
+
+    Retorna:
+      - ModeloAceitacao: Coeficientes ajustados.
+    """
+    linhas = np.flatnonzero(_elegiveis(store))
+    if len(linhas) > max_linhas:
+        linhas = np.sort(np.random.default_rng(seed).choice(linhas, max_linhas, replace=False))
+
+    X = np.column_stack([store.column(c)[linhas].astype(np.float64) / ESCALAS[c] for c in ESCALAS])
+    y = np.zeros(len(linhas), dtype=bool)
+    for alvo in ALVOS:
+        y |= store.column(alvo)[linhas] > 0
+
+    regressao = LogisticRegression(max_iter=1000).fit(X, y)
+    return ModeloAceitacao(regressao.coef_[0].copy(), float(regressao.intercept_[0]), list(ESCALAS))
+
+
+def _pontuar_intervalo(store_dir: str, inicio: int, fim: int,
+                       coeficientes: np.ndarray, intercepto: float) -> np.ndarray:
+    # Executada também nos processos auxiliares: cada um mapeia o cache por conta própria
+    store = data_layer.ColumnStore(store_dir)
+    probabilidades = np.empty(fim - inicio, dtype=np.float32)
+    for a in range(inicio, fim, TAMANHO_LOTE):
+        b = min(a + TAMANHO_LOTE, fim)
+        z = _matriz(store, a, b) @ coeficientes + intercepto
+        probabilidades[a - inicio:b - inicio] = 1 / (1 + np.exp(-z))
+    return probabilidades
+
+
+def ntile(valores: np.ndarray, n_grupos: int = N_GRUPOS) -> np.ndarray:
+    """
+    Equivalente a ``NTILE(n_grupos) OVER (ORDER BY valores DESC)``: o grupo 1 tem os
+    maiores valores e os primeiros grupos recebem uma linha a mais quando a divisão
+    não é exata.
+    """
+    n = len(valores)
+    tamanho, resto = divmod(n, n_grupos)
+    posicoes = np.arange(n)
+    limite = resto * (tamanho + 1)
+    grupos_ordenados = np.where(posicoes < limite,
+                                posicoes // (tamanho + 1),
+                                resto + (posicoes - limite) // max(tamanho, 1)) + 1
+    grupos = np.empty(n, dtype=np.int8)
+    grupos[np.argsort(-valores, kind='stable')] = grupos_ordenados
+    return grupos
+
+
+def score_customers(store: data_layer.ColumnStore, modelo: ModeloAceitacao,
+                    processos: int = 1) -> pd.DataFrame:
+    """
+    Pontua todos os clientes elegíveis e atribui os quartis de propensão.
+
+    Parâmetros:
+      - store (ColumnStore): Cache colunar do dataset.
+      - modelo (ModeloAceitacao): Coeficientes de ``fit_model``.
+      - processos (int): Número de processos; acima de 1 a base é dividida em
+        intervalos pontuados em paralelo.
+
+    Retorna:
+      - pd.DataFrame: ``Customer_ID``, ``acceptance_probability`` e ``target_group``
+        (1 = maior propensão), na ordem do cache.
+    """
+    n = len(store)
+    if processos > 1 and n > TAMANHO_LOTE:
+        limites = np.linspace(0, n, processos + 1).astype(int)
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            partes = executor.map(_pontuar_intervalo, [store.store_dir] * processos, limites[:-1],
+                                  limites[1:], [modelo.coeficientes] * processos,
+                                  [modelo.intercepto] * processos)
+            probabilidades = np.concatenate(list(partes))
+    else:
+        probabilidades = _pontuar_intervalo(store.store_dir, 0, n, modelo.coeficientes, modelo.intercepto)
+
+    linhas = np.flatnonzero(_elegiveis(store))
+    probabilidades = probabilidades[linhas]
+    return pd.DataFrame({
+        'Customer_ID': store.customer_ids(linhas),
+        'acceptance_probability': probabilidades,
+        'target_group': ntile(probabilidades),
+    })
+
+
+# Modelos ajustados por (diretório do cache, versão), compartilhados pelas sessões do processo
+_MODELOS: Dict[Tuple[str, str], ModeloAceitacao] = {}
+_LOCK = threading.Lock()
+
+
+def load_model(csv_path: str = data_layer.CAMINHO_CSV_PADRAO) -> ModeloAceitacao:
+    """Modelo ajustado sobre a versão atual do dataset (ajustado uma vez por versão)."""
+    store = data_layer.open_store(csv_path)
+    chave = (store.store_dir, store.version)
+    with _LOCK:
+        if chave not in _MODELOS:
+            _MODELOS[chave] = fit_model(store)
+        return _MODELOS[chave]
+
+
+def campaign_list(csv_path: str = data_layer.CAMINHO_CSV_PADRAO, processos: int = 1) -> pd.DataFrame:
+    """Lista de campanha completa da versão atual do dataset."""
+    store = data_layer.open_store(csv_path)
+    return score_customers(store, load_model(csv_path), processos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera a lista de campanha com a propensão de aceitação.")
+    parser.add_argument('saida', help="CSV de saída")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado de origem")
+    parser.add_argument('--processos', type=int, default=1, help="Processos usados na pontuação")
+    args = parser.parse_args()
+
+    modelo = load_model(args.csv)
+    for variavel, coeficiente in zip(modelo.variaveis, modelo.coeficientes):
+        print(f"- {variavel} (/{ESCALAS[variavel]:g}): {coeficiente:+.4f}")
+    print(f"- intercepto: {modelo.intercepto:+.4f}")
+
+    lista = campaign_list(args.csv, args.processos)
+    lista.to_csv(args.saida, index=False)
+    print(f"\n✅ {len(lista)} clientes pontuados salvos em '{args.saida}'")
+
+
+if __name__ == "__main__":
+    main()
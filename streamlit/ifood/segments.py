@@ -0,0 +1,186 @@
+"""
+Segmentos de clientes materializados com índice por segmento x faixa de gasto.
+
+Versão em Python de ``sql/table_creation_scripts/segmentacao_clientes.sql``:
+segmento (Premium/Loyal/Ativo/Oportunidade), faixa de gasto ``NTILE(5)`` por
+``MntTotal`` (1 = maiores gastos) e ``food_score``.
+
+Os resultados são gravados em ``<cache>/segmentos.npz`` junto com um índice de
+array ordenado: as posições das linhas ordenadas por (segmento, faixa) e o
+deslocamento de início de cada combinação. Consultar os membros de uma
+combinação é um fatiamento, sem percorrer a base.
+
+Dentro de cada combinação as linhas ficam em ordem decrescente de ``food_score``,
+e o gasto total e o ``food_score`` total de cada combinação são pré-calculados:
+as métricas e os clientes de maior ``food_score`` de uma seleção saem das
+combinações escolhidas, sem tocar nas linhas de toda a seleção.
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ifood import data_layer
+from ifood.scoring import ntile
+
+SEGMENTOS = ['Premium', 'Loyal', 'Ativo', 'Oportunidade']
+N_FAIXAS = 5
+
+
+class SegmentIndex:
+    """
+    Segmentos materializados e índice de array ordenado.
+
+    Atributos:
+      - segmento (np.ndarray): Código do segmento de cada linha (posição em ``SEGMENTOS``).
+      - faixa (np.ndarray): Faixa de gasto de cada linha (1 a ``N_FAIXAS``).
+      - food_score (np.ndarray): Pontuação de alimentos de cada linha.
+      - ordem (np.ndarray): Posições das linhas ordenadas por (segmento, faixa) e,
+        dentro de cada combinação, por ``food_score`` decrescente.
+      - inicios (np.ndarray): Início de cada combinação em ``ordem``, formato
+        ``(len(SEGMENTOS) * N_FAIXAS + 1,)``.
+      - gastos (np.ndarray): Soma de ``MntTotal`` de cada combinação.
+      - scores (np.ndarray): Soma de ``food_score`` de cada combinação.
+    """
+
+    def __init__(self, segmento: np.ndarray, faixa: np.ndarray, food_score: np.ndarray,
+                 ordem: np.ndarray, inicios: np.ndarray, gastos: np.ndarray, scores: np.ndarray):
+        self.segmento = segmento
+        self.faixa = faixa
+        self.food_score = food_score
+        self.ordem = ordem
+        self.inicios = inicios
+        self.gastos = gastos
+        self.scores = scores
+
+    @classmethod
+    def build(cls, store: data_layer.ColumnStore) -> 'SegmentIndex':
+        """Calcula os segmentos sobre todas as linhas do cache colunar."""
+        total = store.column('MntTotal')
+        segmento = np.select(
+            [
+                (total > 1500) & (store.column('NumStorePurchases') > 8),
+                (total >= 500) & (total <= 1500) & (store.column('AcceptedCmpOverall') >= 2),
+                (store.column('Recency') < 30) & (store.column('NumWebVisitsMonth') > 5),
+            ],
+            [0, 1, 2],
+            default=3,
+        ).astype(np.int8)
+        faixa = ntile(total, N_FAIXAS)
+        food_score = (store.column('MntWines') * 0.4 + store.column('MntMeatProducts') * 0.3
+                      + store.column('MntSweetProducts') * 0.3).astype(np.float32)
+
+        combinacao = segmento.astype(np.int64) * N_FAIXAS + (faixa - 1)
+        # Ordem estável: empates de food_score ficam na ordem das posições
+        ordem = np.lexsort((-food_score, combinacao))
+        n_combinacoes = len(SEGMENTOS) * N_FAIXAS
+        contagens = np.bincount(combinacao, minlength=n_combinacoes)
+        inicios = np.concatenate([[0], np.cumsum(contagens)])
+        gastos = np.bincount(combinacao, weights=total, minlength=n_combinacoes)
+        scores = np.bincount(combinacao, weights=food_score, minlength=n_combinacoes)
+        tipo = np.int32 if len(store) < np.iinfo(np.int32).max else np.int64
+        return cls(segmento, faixa, food_score, ordem.astype(tipo), inicios, gastos, scores)
+
+    def save(self, path: str, version: str) -> None:
+        temporario = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporario, segmento=self.segmento, faixa=self.faixa, food_score=self.food_score,
+                 ordem=self.ordem, inicios=self.inicios, gastos=self.gastos, scores=self.scores,
+                 versao=np.array(version))
+        os.replace(temporario, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple[Optional['SegmentIndex'], str]:
+        """Lê o índice gravado; arquivos sem todos os campos (formato anterior) voltam como ``None``."""
+        with np.load(path) as dados:
+            if 'scores' not in dados.files:
+                return None, ''
+            indice = cls(dados['segmento'], dados['faixa'], dados['food_score'],
+                         dados['ordem'], dados['inicios'], dados['gastos'], dados['scores'])
+            return indice, str(dados['versao'])
+
+    def counts(self) -> np.ndarray:
+        """Número de clientes por combinação, formato ``(len(SEGMENTOS), N_FAIXAS)``."""
+        return np.diff(self.inicios).reshape(len(SEGMENTOS), N_FAIXAS)
+
+    def _combinacoes(self, segmentos: Optional[Iterable[str]], faixas: Optional[Iterable[int]]) -> List[int]:
+        codigos = range(len(SEGMENTOS)) if segmentos is None else [SEGMENTOS.index(s) for s in segmentos]
+        faixas = range(1, N_FAIXAS + 1) if faixas is None else list(faixas)
+        return [s * N_FAIXAS + (f - 1) for s in codigos for f in faixas]
+
+    def rows(self, segmentos: Optional[Iterable[str]] = None,
+             faixas: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Posições (ordenadas) das linhas das combinações pedidas.
+
+        Parâmetros:
+          - segmentos (list, opcional): Nomes dos segmentos; por padrão todos.
+          - faixas (list, opcional): Faixas de gasto (1 a ``N_FAIXAS``); por padrão todas.
+
+        Retorna:
+          - np.ndarray: Posições das linhas no cache colunar.
+        """
+        fatias = [self.ordem[self.inicios[k]:self.inicios[k + 1]] for k in self._combinacoes(segmentos, faixas)]
+        if not fatias:
+            return np.empty(0, dtype=self.ordem.dtype)
+        return np.sort(np.concatenate(fatias))
+
+    def summary(self, segmentos: Optional[Iterable[str]] = None,
+                faixas: Optional[Iterable[int]] = None) -> Tuple[int, float, float]:
+        """
+        Clientes, gasto médio e ``food_score`` médio das combinações pedidas, a
+        partir dos totais pré-calculados (gasto e score são ``nan`` sem clientes).
+        """
+        combinacoes = self._combinacoes(segmentos, faixas)
+        n = int(np.diff(self.inicios)[combinacoes].sum())
+        if n == 0:
+            return 0, float('nan'), float('nan')
+        return n, float(self.gastos[combinacoes].sum() / n), float(self.scores[combinacoes].sum() / n)
+
+    def top(self, k: int, segmentos: Optional[Iterable[str]] = None,
+            faixas: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Posições das ``k`` linhas de maior ``food_score`` das combinações pedidas
+        (empates pela posição). Só as ``k`` primeiras de cada combinação são lidas.
+        """
+        candidatos = [self.ordem[self.inicios[c]:min(self.inicios[c] + k, self.inicios[c + 1])]
+                      for c in self._combinacoes(segmentos, faixas)]
+        if not candidatos:
+            return np.empty(0, dtype=self.ordem.dtype)
+        candidatos = np.concatenate(candidatos)
+        return candidatos[np.lexsort((candidatos, -self.food_score[candidatos]))[:k]]
+
+
+def index_path(store_dir: str) -> str:
+    return os.path.join(store_dir, 'segmentos.npz')
+
+
+# Índices em memória por diretório do cache: (versão, índice)
+_INDICES: Dict[str, Tuple[str, SegmentIndex]] = {}
+_LOCK = threading.Lock()
+
+
+def load_segments(csv_path: str = data_layer.CAMINHO_CSV_PADRAO) -> SegmentIndex:
+    """
+    Retorna os segmentos da versão atual do dataset: da memória do processo, do
+    arquivo gravado ou, se nenhum estiver atualizado, recalculados e gravados.
+    """
+    store = data_layer.open_store(csv_path)
+    with _LOCK:
+        em_memoria = _INDICES.get(store.store_dir)
+        if em_memoria is not None and em_memoria[0] == store.version:
+            return em_memoria[1]
+
+        caminho = index_path(store.store_dir)
+        indice = None
+        if os.path.exists(caminho):
+            indice, versao = SegmentIndex.load(caminho)
+            if indice is None or versao != store.version:
+                indice = None
+        if indice is None:
+            indice = SegmentIndex.build(store)
+            indice.save(caminho, store.version)
+
+        _INDICES[store.store_dir] = (store.version, indice)
+        return indice
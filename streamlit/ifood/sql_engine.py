@@ -0,0 +1,402 @@
+"""
+Execução local dos scripts do diretório ``sql/`` sobre o dataset processado.
+
+O cache colunar é registrado como ``main_table`` em um banco SQLite embutido
+(via ``sqlalchemy``), gravado em ``<cache>/sql/ifood.sqlite``. Como o dataset não
+tem identificador de cliente, ``Customer_ID`` é a posição da linha no cache.
+
+Cada script é executado uma vez por versão do dataset e seu resultado fica
+materializado como tabela:
+
+  - consultas ``SELECT``/``WITH`` viram a tabela ``<nome do arquivo>``
+    (ex.: ``demografia_basica``, ``cesta_produtos``);
+  - scripts ``CREATE TABLE``/``CREATE VIEW``/``INSERT``/``CREATE INDEX`` criam os
+    próprios objetos (ex.: ``clv_analysis``, ``customer_segments``).
+
+Os scripts escritos para o dialeto do PostgreSQL (``ARRAY``, ``EXTRACT``,
+``INCLUDE``, ``PARTITION BY RANGE``...) têm uma versão equivalente para o SQLite
+em ``sql/sqlite/<subdiretório>/<nome>.sql``, executada no lugar do original.
+Scripts que ainda assim falham ficam registrados com o erro na tabela
+``_scripts_sql``, sem interromper os demais.
+
+Após uma ingestão incremental, ``update_database`` atualiza só as linhas
+inseridas e alteradas de ``main_table`` e reexecuta os scripts que derivam
+tabelas; o banco só é recriado do zero quando não corresponde à versão anterior.
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m ifood.sql_engine [--csv caminho/do/processado.csv]
+"""
+
+import argparse
+import glob
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+
+from ifood import data_layer
+
+DIRETORIO_SQL = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'sql'))
+
+# Subdiretórios de ``sql/`` executados, na ordem: índices primeiro, depois tabelas e consultas
+SUBDIRETORIOS = ['optimization_examples', 'table_creation_scripts', 'simple_queries', 'advanced_queries']
+
+# Versões dos scripts reescritas para o SQLite, com a mesma estrutura de subdiretórios
+SUBDIRETORIO_SQLITE = 'sqlite'
+
+TABELA_PRINCIPAL = 'main_table'
+TABELA_SCRIPTS = '_scripts_sql'
+
+
+class _Corr:
+    """Agregado ``CORR(x, y)`` (correlação de Pearson), ausente no SQLite."""
+
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.syy = self.sxy = 0.0
+
+    def step(self, x, y):
+        if x is None or y is None:
+            return
+        self.n += 1
+        self.sx += x
+        self.sy += y
+        self.sxx += x * x
+        self.syy += y * y
+        self.sxy += x * y
+
+    def finalize(self):
+        if self.n < 2:
+            return None
+        cov = self.sxy - self.sx * self.sy / self.n
+        var_x = self.sxx - self.sx * self.sx / self.n
+        var_y = self.syy - self.sy * self.sy / self.n
+        if var_x <= 0 or var_y <= 0:
+            return None
+        return cov / math.sqrt(var_x * var_y)
+
+
+def _registrar_funcoes(conexao: sqlite3.Connection, _registro=None) -> None:
+    conexao.create_aggregate('CORR', 2, _Corr)
+    try:
+        conexao.execute('SELECT EXP(0), POWER(2, 2)')
+    except sqlite3.OperationalError:
+        # SQLite compilado sem as funções matemáticas (anterior à 3.35)
+        conexao.create_function('EXP', 1, math.exp, deterministic=True)
+        conexao.create_function('POWER', 2, math.pow, deterministic=True)
+
+
+def database_path(store_dir: str) -> str:
+    return os.path.join(store_dir, 'sql', 'ifood.sqlite')
+
+
+def _engine(caminho: str) -> Engine:
+    engine = create_engine(f'sqlite:///{caminho}')
+    event.listen(engine, 'connect', _registrar_funcoes)
+    return engine
+
+
+def list_scripts(diretorio_sql: str = DIRETORIO_SQL) -> List[str]:
+    """Scripts ``.sql`` na ordem de execução."""
+    scripts = []
+    for subdiretorio in SUBDIRETORIOS:
+        scripts += sorted(glob.glob(os.path.join(diretorio_sql, subdiretorio, '*.sql')))
+    return scripts
+
+
+def script_source(caminho: str) -> str:
+    """Versão do script para o SQLite, se houver (``sql/sqlite/...``), ou o próprio script."""
+    subdiretorio, nome = os.path.split(caminho)
+    base, subdiretorio = os.path.split(subdiretorio)
+    alternativo = os.path.join(base, SUBDIRETORIO_SQLITE, subdiretorio, nome)
+    return alternativo if os.path.exists(alternativo) else caminho
+
+
+def split_statements(script: str) -> List[str]:
+    """Divide um script em comandos completos (terminados por ``;``)."""
+    comandos, atual = [], ''
+    for linha in script.splitlines(keepends=True):
+        atual += linha
+        if sqlite3.complete_statement(atual):
+            comandos.append(atual)
+            atual = ''
+    if atual.strip() and _sem_comentarios(atual):
+        comandos.append(atual)
+    return [c for c in comandos if _sem_comentarios(c)]
+
+
+def _sem_comentarios(comando: str) -> str:
+    comando = re.sub(r'/\*.*?\*/', ' ', comando, flags=re.S)
+    return re.sub(r'--[^\n]*', ' ', comando).strip()
+
+
+def _assinatura(versao: str, scripts: List[str]) -> str:
+    h = hashlib.sha256(versao.encode())
+    for caminho in scripts:
+        h.update(os.path.relpath(caminho, os.path.dirname(os.path.dirname(caminho))).encode())
+        with open(script_source(caminho), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _com_identificador(bloco: pd.DataFrame, inicio: int) -> pd.DataFrame:
+    """Acrescenta ``Customer_ID`` (posição da linha no cache) se o dataset não tiver a coluna."""
+    if 'Customer_ID' not in bloco.columns:
+        bloco.insert(0, 'Customer_ID', np.arange(inicio, inicio + len(bloco)))
+    return bloco
+
+
+def _carregar_tabela_principal(conexao, store: data_layer.ColumnStore) -> None:
+    tipos = {'f': 'REAL', 'i': 'INTEGER', 'u': 'INTEGER', 'b': 'INTEGER'}
+    colunas = ['"Customer_ID" INTEGER PRIMARY KEY']
+    colunas += [f'"{c}" {tipos[store.column(c).dtype.kind]}' for c in store.columns if c != 'Customer_ID']
+    conexao.execute(text(f'CREATE TABLE {TABELA_PRINCIPAL} ({", ".join(colunas)})'))
+
+    # Inserção por grupo de linhas: a memória usada não depende do tamanho do dataset
+    for grupo in store.manifest['grupos']:
+        inicio, fim = grupo['inicio'], grupo['inicio'] + grupo['linhas']
+        bloco = _com_identificador(pd.DataFrame({c: store.column(c)[inicio:fim] for c in store.columns}), inicio)
+        bloco.to_sql(TABELA_PRINCIPAL, conexao, if_exists='append', index=False, chunksize=50_000)
+
+
+def _objetos(conexao) -> Dict[str, str]:
+    """Nome -> tipo (``table``, ``view``, ``index``) dos objetos do banco."""
+    return dict(conexao.execute(text("SELECT name, type FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")).all())
+
+
+def _executar_script(conexao, caminho: str) -> Dict[str, Optional[str]]:
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    with open(script_source(caminho), encoding='utf-8') as f:
+        comandos = split_statements(f.read())
+
+    tabela = None
+    antes = _objetos(conexao)
+    transacao = conexao.begin_nested()
+    try:
+        for comando in comandos:
+            inicio = _sem_comentarios(comando).split(None, 1)[0].upper()
+            if inicio in ('SELECT', 'WITH'):
+                tabela = nome
+                conexao.execute(text(f'CREATE TABLE "{nome}" AS {comando.rstrip().rstrip(";")}'))
+            else:
+                conexao.execute(text(comando))
+                criada = re.search(r'CREATE\s+(?:TABLE|VIEW)\s+(\w+)', _sem_comentarios(comando), re.I)
+                tabela = criada.group(1) if criada else tabela
+        transacao.commit()
+        # Objetos criados pelo script, removidos antes de reexecutá-lo em ``update_database``
+        objetos = ','.join(o for o in _objetos(conexao) if o not in antes)
+        return {'script': nome, 'tabela': tabela, 'objetos': objetos, 'erro': None}
+    except Exception as e:
+        transacao.rollback()
+        erro = str(getattr(e, 'orig', e)) or type(e).__name__
+        return {'script': nome, 'tabela': None, 'objetos': '', 'erro': erro}
+
+
+def build_database(csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                   diretorio_sql: str = DIRETORIO_SQL) -> pd.DataFrame:
+    """
+    Recria o banco SQLite: carrega ``main_table`` e executa todos os scripts.
+
+    Parâmetros:
+      - csv_path (str): Caminho do CSV processado (origem do cache colunar).
+      - diretorio_sql (str): Diretório com os subdiretórios de scripts.
+
+    Retorna:
+      - pd.DataFrame: Situação de cada script (tabela materializada ou erro).
+    """
+    store = data_layer.open_store(csv_path)
+    scripts = list_scripts(diretorio_sql)
+    caminho = database_path(store.store_dir)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    if os.path.exists(temporario):
+        os.remove(temporario)
+
+    engine = _engine(temporario)
+    try:
+        with engine.connect() as conexao:
+            with conexao.begin():
+                _carregar_tabela_principal(conexao, store)
+            with conexao.begin():
+                situacao = pd.DataFrame([_executar_script(conexao, s) for s in scripts])
+                situacao['assinatura'] = _assinatura(store.version, scripts)
+                situacao.to_sql(TABELA_SCRIPTS, conexao, index=False)
+    finally:
+        engine.dispose()
+    os.replace(temporario, caminho)
+    return situacao.drop(columns='assinatura')
+
+
+# Bancos já verificados neste processo: caminho do banco -> assinatura
+_VERIFICADOS: Dict[str, str] = {}
+_LOCK = threading.Lock()
+
+
+def ensure_database(csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                    diretorio_sql: str = DIRETORIO_SQL) -> str:
+    """
+    Garante que o banco corresponde à versão atual do dataset e dos scripts,
+    recriando-o se necessário. Retorna o caminho do banco.
+    """
+    store = data_layer.open_store(csv_path)
+    caminho = database_path(store.store_dir)
+    assinatura = _assinatura(store.version, list_scripts(diretorio_sql))
+    with _LOCK:
+        if _VERIFICADOS.get(caminho) == assinatura and os.path.exists(caminho):
+            return caminho
+        atual = None
+        if os.path.exists(caminho):
+            engine = _engine(caminho)
+            try:
+                with engine.connect() as conexao:
+                    atual = conexao.execute(text(f'SELECT assinatura FROM {TABELA_SCRIPTS} LIMIT 1')).scalar()
+            except Exception:
+                atual = None
+            finally:
+                engine.dispose()
+        if atual != assinatura:
+            build_database(csv_path, diretorio_sql)
+        _VERIFICADOS[caminho] = assinatura
+        return caminho
+
+
+def _reexecutar_scripts(conexao, scripts: List[str], situacao: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reexecuta os scripts que derivam tabelas ou visões de ``main_table``,
+    removendo antes os objetos que criaram. Scripts que só criaram índices sobre
+    ``main_table`` não são reexecutados: o SQLite mantém os índices atualizados.
+    """
+    anteriores = {linha['script']: linha for _, linha in situacao.iterrows()}
+    linhas = []
+    for caminho in scripts:
+        nome = os.path.splitext(os.path.basename(caminho))[0]
+        anterior = anteriores.get(nome)
+        existentes = _objetos(conexao)
+        criados = anterior['objetos'] if anterior is not None and isinstance(anterior['objetos'], str) else ''
+        objetos = [o for o in criados.split(',') if o in existentes]
+        if objetos and all(existentes[o] == 'index' for o in objetos):
+            linhas.append(dict(anterior[['script', 'tabela', 'objetos', 'erro']]))
+            continue
+        for objeto in sorted(objetos, key=lambda o: existentes[o] != 'view'):
+            conexao.execute(text(f'DROP {existentes[objeto].upper()} IF EXISTS "{objeto}"'))
+        linhas.append(_executar_script(conexao, caminho))
+    return pd.DataFrame(linhas)
+
+
+def update_database(store_dir: str, versao_anterior: str, versao_nova: str,
+                    inseridos: pd.DataFrame, removidos: pd.DataFrame, chave: Optional[str] = None,
+                    diretorio_sql: str = DIRETORIO_SQL) -> Optional[bool]:
+    """
+    Atualiza no lugar o banco após uma ingestão incremental, numa única
+    transação: as linhas substituídas são atualizadas em ``main_table``, as
+    novas são inseridas e os scripts que derivam tabelas são reexecutados.
+
+    Parâmetros:
+      - store_dir (str): Diretório do cache colunar.
+      - versao_anterior, versao_nova (str): Versões do dataset antes e depois da ingestão.
+      - inseridos (pd.DataFrame): Linhas gravadas (novas e substitutas), na ordem de ``append_rows``.
+      - removidos (pd.DataFrame): Valores antigos das linhas substituídas.
+      - chave (str, opcional): Coluna que identifica o cliente nas substituições.
+      - diretorio_sql (str): Diretório com os subdiretórios de scripts.
+
+    Retorna:
+      - bool ou None: ``True`` se atualizado, ``False`` se descartado (gravado para
+        outra versão; será recriado na próxima leitura), ``None`` se não havia banco.
+    """
+    caminho = database_path(store_dir)
+    if not os.path.exists(caminho):
+        return None
+    scripts = list_scripts(diretorio_sql)
+    engine = _engine(caminho)
+    try:
+        with engine.connect() as conexao:
+            try:
+                situacao = pd.read_sql_table(TABELA_SCRIPTS, conexao)
+                atualizado = situacao['assinatura'].iloc[0] == _assinatura(versao_anterior, scripts)
+            except Exception:
+                atualizado = False
+            conexao.rollback()
+            if atualizado:
+                with conexao.begin():
+                    # O SQLite só abre a transação no primeiro comando de dados: as
+                    # linhas são gravadas antes de os scripts recriarem suas tabelas
+                    substituidas = np.zeros(len(inseridos), dtype=bool)
+                    if chave is not None and len(removidos):
+                        substituidas = inseridos[chave].isin(removidos[chave]).to_numpy()
+                        colunas = [c for c in inseridos.columns if c != 'Customer_ID']
+                        valores = inseridos.loc[substituidas, colunas + [chave]]
+                        valores = valores.astype(object).where(valores.notna(), None)
+                        atribuicoes = ', '.join(f'"{c}" = ?' for c in colunas)
+                        if chave != 'Customer_ID':
+                            conexao.execute(text(f'CREATE INDEX IF NOT EXISTS "_chave_{chave}" '
+                                                 f'ON {TABELA_PRINCIPAL} ("{chave}")'))
+                        conexao.exec_driver_sql(f'UPDATE {TABELA_PRINCIPAL} SET {atribuicoes} WHERE "{chave}" = ?',
+                                                list(valores.itertuples(index=False, name=None)))
+                    n = conexao.execute(text(f'SELECT COUNT(*) FROM {TABELA_PRINCIPAL}')).scalar()
+                    novos = _com_identificador(inseridos[~substituidas].reset_index(drop=True), n)
+                    novos.to_sql(TABELA_PRINCIPAL, conexao, if_exists='append', index=False, chunksize=50_000)
+
+                    situacao = _reexecutar_scripts(conexao, scripts, situacao)
+                    situacao['assinatura'] = _assinatura(versao_nova, scripts)
+                    conexao.execute(text(f'DROP TABLE {TABELA_SCRIPTS}'))
+                    situacao.to_sql(TABELA_SCRIPTS, conexao, index=False)
+    finally:
+        engine.dispose()
+    if not atualizado:
+        os.remove(caminho)
+    return atualizado
+
+
+def read_table(nome: str, csv_path: str = data_layer.CAMINHO_CSV_PADRAO) -> pd.DataFrame:
+    """
+    Lê uma tabela materializada (ex.: ``customer_segments``, ``demografia_basica``).
+
+    Levanta ``ValueError`` se o script correspondente falhou ou não existe.
+    """
+    engine = _engine(ensure_database(csv_path))
+    try:
+        with engine.connect() as conexao:
+            situacao = pd.read_sql_table(TABELA_SCRIPTS, conexao)
+            linha = situacao[(situacao['tabela'] == nome) | (situacao['script'] == nome)]
+            if linha.empty or linha['tabela'].isnull().all():
+                erro = linha['erro'].iloc[0] if not linha.empty else "tabela não encontrada"
+                raise ValueError(f"Tabela '{nome}' indisponível: {erro}")
+            return pd.read_sql_table(linha['tabela'].iloc[0], conexao)
+    finally:
+        engine.dispose()
+
+
+def query(sql: str, csv_path: str = data_layer.CAMINHO_CSV_PADRAO, **params) -> pd.DataFrame:
+    """Executa uma consulta arbitrária sobre o banco materializado."""
+    engine = _engine(ensure_database(csv_path))
+    try:
+        with engine.connect() as conexao:
+            return pd.read_sql_query(text(sql), conexao, params=params)
+    finally:
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa os scripts de sql/ sobre o dataset processado.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado de origem")
+    parser.add_argument('--sql', default=DIRETORIO_SQL, help="Diretório dos scripts")
+    args = parser.parse_args()
+
+    situacao = build_database(args.csv, args.sql)
+    for _, linha in situacao.iterrows():
+        if pd.isna(linha['erro']):
+            print(f"✅ {linha['script']}: {linha['tabela'] if pd.notna(linha['tabela']) else 'executado'}")
+        else:
+            print(f"❌ {linha['script']}: {linha['erro']}")
+
+
+if __name__ == "__main__":
+    main()
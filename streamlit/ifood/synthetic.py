@@ -0,0 +1,124 @@
+"""
+Gerador de clientes sintéticos com o mesmo schema de ``ifood_df_atualizado.csv``.
+
+As distribuições seguem as faixas do dataset original (ex.: renda entre ~1,7 mil e
+~114 mil, gastos assimétricos concentrados perto de zero, ~7% de aceitação por
+campanha), e os gastos crescem com a renda para que correlações e agrupamentos
+tenham resultados plausíveis. Serve para benchmarks e testes de carga em volumes
+que o dataset real não tem.
+"""
+
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from ifood.data_layer import SCHEMA
+
+# Gasto máximo de cada categoria no dataset original
+GASTO_MAXIMO = {
+    'MntWines': 1493,
+    'MntFruits': 199,
+    'MntMeatProducts': 1725,
+    'MntFishProducts': 259,
+    'MntSweetProducts': 262,
+    'MntGoldProds': 321,
+}
+COMPRAS_MAXIMAS = {
+    'NumDealsPurchases': 15,
+    'NumWebPurchases': 27,
+    'NumCatalogPurchases': 28,
+    'NumStorePurchases': 13,
+    'NumWebVisitsMonth': 20,
+}
+CAMPANHAS = ['AcceptedCmp3', 'AcceptedCmp4', 'AcceptedCmp5', 'AcceptedCmp1', 'AcceptedCmp2']
+ESTADOS_CIVIS = ['marital_Divorced', 'marital_Married', 'marital_Single', 'marital_Together', 'marital_Widow']
+PESOS_ESTADO_CIVIL = [0.10, 0.39, 0.22, 0.26, 0.03]
+EDUCACOES = ['education_2n Cycle', 'education_Basic', 'education_Graduation', 'education_Master', 'education_PhD']
+PESOS_EDUCACAO = [0.09, 0.02, 0.50, 0.17, 0.22]
+
+
+def generate_customers(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Gera ``n`` clientes sintéticos.
+
+    Parâmetros:
+      - n (int): Número de linhas.
+      - seed (int): Semente do gerador.
+
+    Retorna:
+      - pd.DataFrame: Colunas e ordem de ``SCHEMA``, com os tipos compactos.
+    """
+    r = np.random.default_rng(seed)
+    dados = {}
+    dados['Income'] = r.normal(52000, 20000, n).clip(1730, 113734).round()
+    dados['Kidhome'] = r.choice(3, n, p=[0.58, 0.40, 0.02])
+    dados['Teenhome'] = r.choice(3, n, p=[0.52, 0.46, 0.02])
+    dados['Recency'] = r.integers(0, 100, n)
+
+    # Gastos proporcionais à renda (e menores em famílias com crianças pequenas)
+    renda_relativa = dados['Income'] / 113734
+    for coluna, maximo in GASTO_MAXIMO.items():
+        gasto = r.beta(0.6, 3, n) * maximo * (0.3 + 1.4 * renda_relativa) / (1 + 0.5 * dados['Kidhome'])
+        dados[coluna] = gasto.clip(0, maximo).astype(np.int64)
+    for coluna, maximo in COMPRAS_MAXIMAS.items():
+        dados[coluna] = r.binomial(maximo, 0.3, n)
+
+    for coluna in CAMPANHAS:
+        dados[coluna] = (r.random(n) < 0.04 + 0.08 * renda_relativa).astype(np.int64)
+    dados['Complain'] = (r.random(n) < 0.01).astype(np.int64)
+    dados['Z_CostContact'] = np.full(n, 3)
+    dados['Z_Revenue'] = np.full(n, 11)
+    dados['Response'] = (r.random(n) < 0.15).astype(np.int64)
+    dados['Age'] = r.integers(24, 81, n)
+    dados['Customer_Days'] = r.integers(2159, 3259, n)
+
+    estado_civil = r.choice(len(ESTADOS_CIVIS), n, p=PESOS_ESTADO_CIVIL)
+    for i, coluna in enumerate(ESTADOS_CIVIS):
+        dados[coluna] = (estado_civil == i).astype(np.int64)
+    educacao = r.choice(len(EDUCACOES), n, p=PESOS_EDUCACAO)
+    for i, coluna in enumerate(EDUCACOES):
+        dados[coluna] = (educacao == i).astype(np.int64)
+
+    df = pd.DataFrame(dados)
+    df['MntTotal'] = df[['MntWines', 'MntFruits', 'MntMeatProducts', 'MntFishProducts', 'MntSweetProducts']].sum(axis=1)
+    df['MntRegularProds'] = df['MntTotal'] - df['MntGoldProds']
+    df['AcceptedCmpOverall'] = df[CAMPANHAS].sum(axis=1)
+    return df[list(SCHEMA)].astype(SCHEMA)
+
+
+def write_synthetic_csv(caminho: str, n: int, seed: int = 0,
+                        tamanho_bloco: int = 1_000_000) -> str:
+    """
+    Grava ``n`` clientes sintéticos em CSV, bloco a bloco (memória limitada pelo
+    tamanho do bloco). Retorna o caminho gravado.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    for i, inicio in enumerate(range(0, n, tamanho_bloco)):
+        bloco = generate_customers(min(tamanho_bloco, n - inicio), seed=seed + i)
+        bloco.to_csv(temporario, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def synthetic_path(diretorio: str, n: int, seed: Optional[int] = 0) -> str:
+    """Caminho padrão de um dataset sintético de ``n`` linhas."""
+    return os.path.join(diretorio, f'ifood_sintetico_{n}_{seed}.csv')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera clientes sintéticos no schema do dataset processado.")
+    parser.add_argument('linhas', type=int, help="Número de clientes")
+    parser.add_argument('saida', help="CSV de saída")
+    parser.add_argument('--seed', type=int, default=0, help="Semente do gerador")
+    args = parser.parse_args()
+
+    write_synthetic_csv(args.saida, args.linhas, args.seed)
+    print(f"✅ {args.linhas} clientes sintéticos salvos em '{args.saida}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Configuração de página e estilos compartilhados pelos dashboards.
+
+Os dashboards não chamam mais ``st.set_page_config`` nem injetam CSS na
+importação: a configuração da página é feita uma única vez pelo ponto de
+entrada (``app.py`` ou o bloco ``__main__`` de cada dashboard) e cada página
+aplica o seu tema ao ser renderizada.
+"""
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Tema vermelho dos dashboards de campanhas, renda, segmentos e venda cruzada
+CSS_PADRAO = """
+    <style>
+    .main { background-color: #FFFFFF; }
+    .header-text {
+        color: #000000;
+        font-family: 'Arial';
+        border-bottom: 2px solid #B22222;
+        padding-bottom: 10px;
+        margin-bottom: 1.5rem;
+    }
+    .metric-card {
+        background-color: #FFF5F5;
+        border: 2px solid #B22222;
+        border-radius: 8px;
+        padding: 20px;
+        margin: 10px 0;
+        box-shadow: 0 2px 4px rgba(178,34,34,0.1);
+    }
+    .report-box {
+        border: 2px solid #B22222;
+        border-radius: 8px;
+        padding: 25px;
+        margin: 15px 0;
+        background-color: #FFF5F5;
+    }
+    .stSlider>div>div>div>div {
+        background-color: #B22222 !important;
+    }
+    .analysis-section {
+        margin-top: 2rem;
+        padding: 1.5rem;
+        background-color: #F8F9FA;
+        border-radius: 8px;
+    }
+    </style>
+"""
+
+# Estética clean (preto e branco) do dashboard de família
+CSS_FAMILIA = """
+    <style>
+        body {
+            font-family: 'Segoe UI', sans-serif;
+            color: #000;
+            background-color: #fff;
+        }
+        .report-box {
+            background-color: #f9f9f9;
+            padding: 20px;
+            border-radius: 10px;
+            border-left: 5px solid #333;
+            line-height: 1.6;
+            font-size: 16px;
+        }
+        h1, h2, h3 {
+            color: #000;
+        }
+    </style>
+    """
+
+
+def configure_page(page_title: str, page_icon: str = "📊", sidebar: str = "expanded") -> None:
+    """Configura a página; deve ser chamada uma vez, antes de qualquer outro elemento."""
+    st.set_page_config(
+        page_title=page_title,
+        page_icon=page_icon,
+        layout="wide",
+        initial_sidebar_state=sidebar
+    )
+
+
+def apply_theme(css: str = CSS_PADRAO) -> None:
+    """Injeta o CSS do tema na página em renderização."""
+    st.markdown(css, unsafe_allow_html=True)
+
+
+# Estado da prévia rápida, compartilhado pelas páginas da sessão
+CHAVE_PREVIA = 'previa_rapida'
+
+
+def _calcular_exato() -> None:
+    st.session_state[CHAVE_PREVIA] = False
+
+
+def preview_toggle() -> bool:
+    """
+    Alternância da prévia rápida na barra lateral: com ela ligada, os números vêm
+    das amostras estratificadas de ``ifood.sampling``, com intervalo de confiança.
+    O botão "Calcular exato" desliga a prévia.
+    """
+    previa = st.sidebar.toggle(
+        '⚡ Prévia rápida (amostra)',
+        key=CHAVE_PREVIA,
+        help="Estimativas a partir de uma amostra estratificada, com intervalos de confiança de 95%."
+    )
+    if previa:
+        st.sidebar.button('🎯 Calcular exato', on_click=_calcular_exato)
+    return previa
+
+
+def session_id() -> str:
+    """Identificador da sessão do navegador em renderização (None fora do Streamlit)."""
+    contexto = get_script_run_ctx()
+    return contexto.session_id if contexto is not None else None
@@ -0,0 +1,318 @@
+"""
+Geração em lote dos relatórios executivos dos dashboards, sem navegador.
+
+Em vez de abrir cada dashboard e mover os filtros, uma grade de configurações
+(produtos x faixas de renda x faixas etárias x filtros de educação) é expandida
+nos trabalhos de cada relatório:
+
+  - ``marketing``: ``generate_insights`` por faixa etária x educação;
+  - ``renda``: ``generate_report`` por produto x faixa de renda;
+  - ``familia``: ``analisar_familia_vs_comportamento_compra`` (sem filtros);
+  - ``analises``: as análises de ``ifood.analyses`` por faixa de renda x faixa etária.
+
+Cada trabalho depende só das dimensões que o relatório usa, então a grade não é
+multiplicada por dimensões irrelevantes. Os cubos de agregados são construídos
+(ou lidos do cache) uma vez, antes de abrir o pool; cada processo os carrega do
+disco uma única vez e os reaproveita em todos os seus trabalhos. As análises do
+registro compartilham uma leitura de colunas por combinação de filtros.
+
+Para cada trabalho são gravados o relatório em markdown e uma figura estática
+(matplotlib, PNG ou SVG); ``index.md`` lista todos os relatórios gerados.
+
+Uso (a partir do diretório ``streamlit/``):
+    python relatorios.py --saida ../relatorios [--processos 4] [--formato svg]
+"""
+
+import argparse
+import logging
+import os
+import time
+import unicodedata
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import dashboard_family_  # noqa: E402
+import dashboard_marketing  # noqa: E402
+import dashboard_renda_gastos  # noqa: E402
+from ifood import aggregates, analyses, data_layer  # noqa: E402
+
+# Fora do ``streamlit run`` chamadas como ``st.spinner`` só geram avisos, silenciados aqui
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+DIRETORIO_PADRAO = os.path.join('..', 'relatorios')
+RELATORIOS = ['marketing', 'renda', 'familia', 'analises']
+FAIXAS_IDADE_PADRAO = ['0-29', '30-39', '40-49', '50-59', '60-120']
+FAIXAS_RENDA_PADRAO = ['0-29999', '30000-59999', '60000-89999', '90000-']
+CUBOS = {'marketing': 'idade_educacao', 'renda': 'renda_produtos', 'familia': 'filhos_gastos'}
+
+
+class Trabalho(NamedTuple):
+    """Um relatório da grade: tipo, parâmetros e nome dos arquivos de saída."""
+    relatorio: str
+    params: Tuple[Tuple[str, object], ...]
+    nome: str
+
+
+def parse_range(texto: str) -> Tuple[Optional[int], Optional[int]]:
+    """Converte ``'30000-59999'`` em ``(30000, 59999)``; um lado vazio fica em aberto (``None``)."""
+    minimo, _, maximo = texto.partition('-')
+    return (int(minimo) if minimo else None, int(maximo) if maximo else None)
+
+
+def _rotulo(faixa: Tuple[int, int]) -> str:
+    return f'{faixa[0]}-{faixa[1]}'
+
+
+def _slug(texto: str) -> str:
+    """Nome de arquivo sem acentos nem espaços (ex.: ``'Não Graduados'`` -> ``'nao_graduados'``)."""
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode().lower().replace(' ', '_')
+
+
+def _markdown(texto: str) -> str:
+    """Remove a indentação dos relatórios montados em f-strings nos dashboards."""
+    return '\n'.join(linha.strip() for linha in texto.strip().splitlines())
+
+
+def build_grid(csv_path: str, relatorios: Sequence[str], produtos: Sequence[str],
+               faixas_renda: Sequence[Tuple[Optional[int], Optional[int]]],
+               faixas_idade: Sequence[Tuple[Optional[int], Optional[int]]],
+               educacoes: Sequence[str]) -> List[Trabalho]:
+    """
+    Expande a grade de filtros nos trabalhos de cada relatório. Faixas em aberto
+    são fechadas nos limites do dataset (lidos do eixo dos cubos).
+
+    Retorna:
+      - list: Trabalhos, sem repetições.
+    """
+    eixo_renda = aggregates.load_cube(csv_path, 'renda_produtos').keys
+    eixo_idade = aggregates.load_cube(csv_path, 'idade_educacao').keys
+    fechar = lambda faixa, eixo: (int(eixo[0]) if faixa[0] is None else faixa[0],  # noqa: E731
+                                  int(eixo[-1]) if faixa[1] is None else faixa[1])
+    faixas_renda = list(dict.fromkeys(fechar(f, eixo_renda) for f in faixas_renda))
+    faixas_idade = list(dict.fromkeys(fechar(f, eixo_idade) for f in faixas_idade))
+
+    trabalhos = []
+    if 'marketing' in relatorios:
+        trabalhos += [Trabalho('marketing', (('age_range', idade), ('educ_filter', educacao)),
+                               f"idade_{_rotulo(idade)}_{_slug(educacao)}")
+                      for idade in faixas_idade for educacao in educacoes]
+    if 'renda' in relatorios:
+        trabalhos += [Trabalho('renda', (('coluna_gastos', produto), ('income_range', renda)),
+                               f"{produto}_renda_{_rotulo(renda)}")
+                      for produto in produtos for renda in faixas_renda]
+    if 'familia' in relatorios:
+        trabalhos.append(Trabalho('familia', (), 'familia'))
+    if 'analises' in relatorios:
+        trabalhos += [Trabalho('analises', (('filtros', (('Income', renda), ('Age', idade))),),
+                               f"renda_{_rotulo(renda)}_idade_{_rotulo(idade)}")
+                      for renda in faixas_renda for idade in faixas_idade]
+    return trabalhos
+
+
+# Cubos já carregados por este processo (um conjunto por CSV)
+_CUBOS_PROCESSO: Dict[str, Dict[str, object]] = {}
+
+
+def _cubo(csv_path: str, relatorio: str):
+    cubos = _CUBOS_PROCESSO.setdefault(csv_path, {})
+    if relatorio not in cubos:
+        cubos[relatorio] = aggregates.load_cube(csv_path, CUBOS[relatorio])
+    return cubos[relatorio]
+
+
+def _barras(ax, categorias: Sequence, valores: Sequence[float], titulo: str, rotulo_y: str) -> None:
+    """Barras com a paleta vermelha dos dashboards."""
+    cores = plt.get_cmap('Reds')(np.linspace(0.45, 0.9, max(len(valores), 1)))
+    ax.bar([str(c) for c in categorias], np.nan_to_num(np.asarray(valores, dtype=float)), color=cores)
+    ax.set_title(titulo)
+    ax.set_ylabel(rotulo_y)
+    ax.spines[['top', 'right']].set_visible(False)
+
+
+def _conteudo_marketing(csv_path: str, age_range: Tuple[int, int], educ_filter: str):
+    taxa_idade, taxa_educacao = dashboard_marketing.process_data_cube(_cubo(csv_path, 'marketing'),
+                                                                      age_range, educ_filter)
+    texto = _markdown(dashboard_marketing.generate_insights(taxa_idade, taxa_educacao))
+    fig, eixos = plt.subplots(1, 2, figsize=(11, 4))
+    _barras(eixos[0], taxa_idade['Faixa_Etaria'], taxa_idade['AcceptedCmpOverall'],
+            'Aceitação por Faixa Etária', 'Taxa de Aceitação')
+    _barras(eixos[1], taxa_educacao['education_Graduation'].map({0: 'Não Graduado', 1: 'Graduado'}),
+            taxa_educacao['AcceptedCmpOverall'], 'Aceitação por Educação', 'Taxa de Aceitação')
+    titulo = f"Campanhas por Demografia — idade {_rotulo(age_range)}, {educ_filter}"
+    return titulo, texto, fig
+
+
+def _conteudo_renda(csv_path: str, coluna_gastos: str, income_range: Tuple[int, int]):
+    correlacao, gastos_medios = dashboard_renda_gastos.calculate_analysis_cube(
+        _cubo(csv_path, 'renda'), coluna_gastos, income_range)
+    texto = _markdown(dashboard_renda_gastos.generate_report(correlacao, gastos_medios, coluna_gastos))
+    fig, ax = plt.subplots(figsize=(7, 4))
+    _barras(ax, gastos_medios['Categoria_Renda'], gastos_medios[coluna_gastos],
+            'Gastos Médios por Categoria de Renda', 'Gastos Médios (USD)')
+    titulo = f"Renda vs Gastos — {coluna_gastos}, renda {_rotulo(income_range)}"
+    return titulo, texto, fig
+
+
+def _conteudo_familia(csv_path: str):
+    gastos_medios, texto = dashboard_family_.analisar_familia_vs_comportamento_compra(
+        None, cubo=_cubo(csv_path, 'familia'))
+    if gastos_medios is None:
+        raise RuntimeError("Não foi possível realizar a análise de família.")
+    colunas = ['MntTotal', 'MntSweetProducts', 'MntGoldProds']
+    fig, eixos = plt.subplots(1, len(colunas), figsize=(14, 4))
+    for ax, coluna in zip(eixos, colunas):
+        _barras(ax, gastos_medios['Total_Filhos'], gastos_medios[coluna], coluna, 'Média (USD)')
+        ax.set_xlabel('Número Total de Filhos')
+    return "Família vs Compras", texto, fig
+
+
+def _conteudo_analises(csv_path: str, filtros: Tuple[Tuple[str, Tuple[int, int]], ...]):
+    # Faixas pequenas geram correlações e testes indefinidos (NaN), que ficam no relatório
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        resultados = analyses.run_analyses(csv_path=csv_path, filtros=dict(filtros))
+    partes = []
+    for nome, resultado in resultados.items():
+        partes.append(f"### {analyses.ANALISES[nome].descricao}\n")
+        for campo, valor in resultado.items():
+            if isinstance(valor, (pd.DataFrame, pd.Series)):
+                partes.append(f"{campo}:\n\n```\n{valor.to_string()}\n```\n")
+            else:
+                partes.append(f"- {campo}: {valor}")
+        partes.append('')
+    descricao = ', '.join(f'{coluna} {_rotulo(faixa)}' for coluna, faixa in filtros)
+    return f"Análises — {descricao}", '\n'.join(partes), None
+
+
+CONTEUDOS = {
+    'marketing': _conteudo_marketing,
+    'renda': _conteudo_renda,
+    'familia': _conteudo_familia,
+    'analises': _conteudo_analises,
+}
+
+
+def run_job(csv_path: str, saida: str, formato: str, trabalho: Trabalho) -> dict:
+    """
+    Gera e grava um relatório (markdown e figura). Executada nos processos do pool.
+
+    Retorna:
+      - dict: Trabalho, arquivos gravados, tempo e erro (se houver).
+    """
+    inicio = time.perf_counter()
+    diretorio = os.path.join(saida, trabalho.relatorio)
+    os.makedirs(diretorio, exist_ok=True)
+    registro = {'relatorio': trabalho.relatorio, 'nome': trabalho.nome,
+                'params': {k: v for k, v in trabalho.params}, 'markdown': None, 'figura': None, 'erro': None}
+    try:
+        titulo, texto, fig = CONTEUDOS[trabalho.relatorio](csv_path, **dict(trabalho.params))
+        linhas = [f"# {titulo}", '', texto.strip(), '']
+        if fig is not None:
+            figura = f"{trabalho.nome}.{formato}"
+            fig.tight_layout()
+            fig.savefig(os.path.join(diretorio, figura), format=formato, dpi=120)
+            plt.close(fig)
+            linhas += [f"![{titulo}]({figura})", '']
+            registro['figura'] = os.path.join(trabalho.relatorio, figura)
+        caminho = os.path.join(diretorio, f"{trabalho.nome}.md")
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(linhas))
+        registro['markdown'] = os.path.join(trabalho.relatorio, f"{trabalho.nome}.md")
+    except Exception as e:
+        registro['erro'] = f"{type(e).__name__}: {e}"
+    registro['tempo_s'] = time.perf_counter() - inicio
+    return registro
+
+
+def write_index(saida: str, registros: List[dict]) -> str:
+    """Grava ``index.md`` com um link para cada relatório e os trabalhos que falharam."""
+    linhas = ["# Relatórios Executivos", '', "| Relatório | Parâmetros | Arquivo | Tempo (s) |",
+              "|---|---|---|---|"]
+    for r in registros:
+        if r['erro'] is None:
+            params = ', '.join(f'{k}={v}' for k, v in r['params'].items()) or '-'
+            linhas.append(f"| {r['relatorio']} | {params} | [{r['nome']}]({r['markdown']}) | {r['tempo_s']:.2f} |")
+    falhas = [r for r in registros if r['erro'] is not None]
+    if falhas:
+        linhas += ['', "## Falhas", '']
+        linhas += [f"- {r['relatorio']}/{r['nome']}: {r['erro']}" for r in falhas]
+    caminho = os.path.join(saida, 'index.md')
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(linhas) + '\n')
+    return caminho
+
+
+def generate_reports(trabalhos: List[Trabalho], csv_path: str = data_layer.CAMINHO_CSV_PADRAO,
+                     saida: str = DIRETORIO_PADRAO, formato: str = 'png',
+                     processos: Optional[int] = None) -> List[dict]:
+    """
+    Gera os relatórios da grade em paralelo.
+
+    Parâmetros:
+      - trabalhos (list): Saída de ``build_grid``.
+      - csv_path (str): CSV processado.
+      - saida (str): Diretório dos relatórios (um subdiretório por tipo).
+      - formato (str): Formato das figuras (``png`` ou ``svg``).
+      - processos (int, opcional): Processos do pool; por padrão um por núcleo.
+
+    Retorna:
+      - list: Um registro por trabalho, na ordem de ``trabalhos``.
+    """
+    # Cache colunar e cubos prontos em disco antes do pool: os processos só os leem
+    data_layer.open_store(csv_path)
+    for relatorio in {t.relatorio for t in trabalhos} & set(CUBOS):
+        aggregates.load_cube(csv_path, CUBOS[relatorio])
+
+    processos = min(processos or os.cpu_count() or 1, max(len(trabalhos), 1))
+    argumentos = [[csv_path] * len(trabalhos), [saida] * len(trabalhos), [formato] * len(trabalhos), trabalhos]
+    if processos > 1:
+        # Trabalhos do mesmo tipo em sequência: cada lote reaproveita os cubos do processo
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            registros = list(executor.map(run_job, *argumentos,
+                                          chunksize=max(1, len(trabalhos) // (processos * 4))))
+    else:
+        registros = list(map(run_job, *argumentos))
+    write_index(saida, registros)
+    return registros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera em lote os relatórios executivos dos dashboards.")
+    parser.add_argument('--csv', default=data_layer.CAMINHO_CSV_PADRAO, help="CSV processado")
+    parser.add_argument('--saida', default=DIRETORIO_PADRAO, help="Diretório dos relatórios")
+    parser.add_argument('--relatorios', nargs='+', choices=RELATORIOS, default=RELATORIOS,
+                        help="Relatórios gerados")
+    parser.add_argument('--produtos', nargs='+', choices=dashboard_renda_gastos.PRODUTOS,
+                        default=dashboard_renda_gastos.PRODUTOS, help="Produtos do relatório de renda")
+    parser.add_argument('--faixas-renda', nargs='+', default=FAIXAS_RENDA_PADRAO, metavar='MIN-MAX',
+                        help="Faixas de renda (USD); um lado vazio usa o limite do dataset")
+    parser.add_argument('--faixas-idade', nargs='+', default=FAIXAS_IDADE_PADRAO, metavar='MIN-MAX',
+                        help="Faixas etárias; um lado vazio usa o limite do dataset")
+    parser.add_argument('--educacao', nargs='+', choices=list(dashboard_marketing.FILTROS_EDUCACAO),
+                        default=list(dashboard_marketing.FILTROS_EDUCACAO), help="Filtros de educação")
+    parser.add_argument('--formato', choices=['png', 'svg'], default='png', help="Formato das figuras")
+    parser.add_argument('--processos', type=int, help="Processos do pool (padrão: um por núcleo)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    trabalhos = build_grid(args.csv, args.relatorios, args.produtos,
+                           [parse_range(f) for f in args.faixas_renda],
+                           [parse_range(f) for f in args.faixas_idade], args.educacao)
+    registros = generate_reports(trabalhos, args.csv, args.saida, args.formato, args.processos)
+
+    falhas = [r for r in registros if r['erro'] is not None]
+    print(f"✅ {len(registros) - len(falhas)} relatórios gravados em '{args.saida}' "
+          f"em {time.perf_counter() - inicio:.1f} s")
+    for r in falhas:
+        print(f"⚠️ {r['relatorio']}/{r['nome']}: {r['erro']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Testes do pré-cálculo em segundo plano (``ifood.prefetch``).
+
+Uso (a partir do diretório ``streamlit/``):
+    python -m pytest -q tests
+"""
+
+import threading
+import time
+
+from ifood.prefetch import Prefetcher
+from ifood.result_cache import ResultCache, cache_key
+
+
+def _bloquear(prefetcher: Prefetcher) -> threading.Event:
+    """Ocupa o único worker até o evento devolvido ser liberado."""
+    liberar = threading.Event()
+    prefetcher.prefetch([(cache_key('bloqueio', 'v'), lambda: liberar.wait(5))], sessao='outra')
+    time.sleep(0.05)
+    return liberar
+
+
+def _esperar(prefetcher: Prefetcher) -> None:
+    limite = time.time() + 5
+    while prefetcher.stats()['em_andamento'] and time.time() < limite:
+        time.sleep(0.01)
+    assert prefetcher.stats()['em_andamento'] == 0
+
+
+def _chave(i: int):
+    return cache_key('vizinhos', 'v', i=i)
+
+
+def test_chave_repetida_na_geracao_seguinte_e_calculada():
+    prefetcher = Prefetcher(ResultCache(), workers=1)
+    liberar = _bloquear(prefetcher)
+    prefetcher.prefetch([(_chave(i), lambda i=i: i) for i in (1, 2)], sessao='A')
+    prefetcher.prefetch([(_chave(i), lambda i=i: i) for i in (2, 3)], sessao='A')
+    liberar.set()
+    _esperar(prefetcher)
+
+    assert _chave(1) not in prefetcher.cache
+    assert prefetcher.cache.get(_chave(2)) == 2
+    assert prefetcher.cache.get(_chave(3)) == 3
+    assert prefetcher._sessoes == {}
+
+
+def test_interacao_de_uma_sessao_nao_descarta_vizinhos_de_outra():
+    prefetcher = Prefetcher(ResultCache(), workers=1)
+    liberar = _bloquear(prefetcher)
+    prefetcher.prefetch([(_chave(1), lambda: 1)], sessao='A')
+    prefetcher.prefetch([(_chave(1), lambda: 1), (_chave(2), lambda: 2)], sessao='B')
+    prefetcher.prefetch([(_chave(3), lambda: 3)], sessao='A')
+    liberar.set()
+    _esperar(prefetcher)
+
+    assert prefetcher.cache.get(_chave(1)) == 1
+    assert prefetcher.cache.get(_chave(2)) == 2
+    assert prefetcher.cache.get(_chave(3)) == 3